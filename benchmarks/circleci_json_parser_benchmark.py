@@ -0,0 +1,78 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Compare the loading modes of CircleCI JSON test metadata over synthetic files."""
+
+import argparse
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from benchmarks.parser_memory_benchmark import build_metadata_tree
+from scripts.metric_reporter.circleci_json_parser import (
+    CircleCIJobTestMetadata,
+    CircleCIJsonParser,
+)
+
+
+def load_with_json_module(metadata_path: Path) -> list[CircleCIJobTestMetadata]:
+    """Load the files with `json.load` and validate the decoded data, as a reference.
+
+    Args:
+        metadata_path (Path): The metadata directory.
+
+    Returns:
+        list[CircleCIJobTestMetadata]: The parsed test metadata.
+    """
+    metadata_list: list[CircleCIJobTestMetadata] = []
+    for metadata_file_path in sorted(metadata_path.iterdir()):
+        with metadata_file_path.open() as file:
+            data: dict[str, Any] = json.load(file)
+            metadata_list.append(CircleCIJobTestMetadata(**data))
+    return metadata_list
+
+
+def time_load(load: Callable[[], list[CircleCIJobTestMetadata]]) -> tuple[float, int]:
+    """Run a load function and return the elapsed wall time and the number of test items.
+
+    Args:
+        load (Callable[[], list[CircleCIJobTestMetadata]]): The load function.
+
+    Returns:
+        tuple[float, int]: The elapsed wall time in seconds and the number of test items.
+    """
+    start = time.perf_counter()
+    metadata_list = load()
+    elapsed = time.perf_counter() - start
+    return elapsed, sum(len(metadata.test_metadata or []) for metadata in metadata_list)
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=200, help="Number of metadata files")
+    parser.add_argument("--tests", type=int, default=2000, help="Number of test items per file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    with tempfile.TemporaryDirectory() as directory:
+        metadata_path = Path(directory) / "circle_ci"
+        build_metadata_tree(metadata_path, args.jobs, args.tests)
+        loads: list[tuple[str, Callable[[], list[CircleCIJobTestMetadata]]]] = [
+            ("json.load reference", lambda: load_with_json_module(metadata_path)),
+            ("validated from JSON", lambda: CircleCIJsonParser().parse(metadata_path)),
+        ]
+        for label, load in loads:
+            elapsed, items = time_load(load)
+            print(
+                f"{label}: {elapsed:.2f}s, {args.jobs / elapsed:.0f} files/s, "
+                f"{items / elapsed:.0f} items/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Measure sequential and asynchronous CircleCI scraper throughput against a local mock server."""
+
+import argparse
+import logging
+import tempfile
+from pathlib import Path
+
+from tests.circleci_scraper.mock_circleci_server import (
+    MockCircleCIServer,
+    MockCircleCIServerConfig,
+    MockCircleCIServerStats,
+    build_scraper_config,
+    run_scraper,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def report(label: str, elapsed: float, stats: MockCircleCIServerStats, output_dir: Path) -> None:
+    """Print the throughput of a scrape.
+
+    Args:
+        label (str): The label of the scrape.
+        elapsed (float): The elapsed wall time in seconds.
+        stats (MockCircleCIServerStats): The requests answered by the server during the scrape.
+        output_dir (Path): The directory the test results were written to.
+    """
+    jobs = sum(1 for _ in output_dir.glob("**/circle_ci/*.json"))
+    print(
+        f"{label}: {elapsed:.2f}s, {stats.requests / elapsed:.0f} requests/s "
+        f"({stats.errors} errors), {jobs / elapsed:.1f} jobs/s, "
+        f"{stats.bytes_sent / elapsed / 2**20:.2f} MiB/s"
+    )
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pipelines", type=int, default=20, help="Number of pipelines")
+    parser.add_argument("--jobs", type=int, default=4, help="Number of jobs per workflow")
+    parser.add_argument("--test-items", type=int, default=50, help="Number of tests per job")
+    parser.add_argument("--artifacts", type=int, default=2, help="Number of artifacts per job")
+    parser.add_argument("--page-size", type=int, default=20, help="Number of items per page")
+    parser.add_argument("--latency", type=float, default=0.02, help="Response latency (s)")
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Fraction of failed requests (0-1)"
+    )
+    parser.add_argument("--concurrency", type=int, default=8, help="Async request limit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    server_config = MockCircleCIServerConfig(
+        pipelines=args.pipelines,
+        jobs_per_workflow=args.jobs,
+        test_items_per_job=args.test_items,
+        artifacts_per_job=args.artifacts,
+        page_size=args.page_size,
+        latency=args.latency,
+        error_rate=args.error_rate,
+    )
+    with MockCircleCIServer(server_config) as server:
+        scraper_config = build_scraper_config(server, args.concurrency)
+        with tempfile.TemporaryDirectory() as sync_dir, tempfile.TemporaryDirectory() as async_dir:
+            sync_time = run_scraper(scraper_config, Path(sync_dir), use_async=False)
+            report("sequential scrape", sync_time, server.stats, Path(sync_dir))
+            server.reset_stats()
+            async_time = run_scraper(scraper_config, Path(async_dir), use_async=True)
+            report(
+                f"async scrape (concurrency={args.concurrency})",
+                async_time,
+                server.stats,
+                Path(async_dir),
+            )
+
+    print(f"speedup: {sync_time / async_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Compare sequential and process pool JUnit XML parsing over a synthetic artifact tree."""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from scripts.metric_reporter.junit_xml_parser import JUnitXmlParser
+
+
+def build_junit_xml(job_number: int, file_index: int, test_cases: int) -> str:
+    """Build the content of a synthetic JUnit XML file.
+
+    Args:
+        job_number (int): The job number, used in the suite name.
+        file_index (int): The index of the file within the job.
+        test_cases (int): The number of test cases.
+
+    Returns:
+        str: The JUnit XML content.
+    """
+    cases = []
+    for case in range(test_cases):
+        if case % 10 == 0:
+            detail = '<failure message="assertion failed" type="AssertionError">trace</failure>'
+        elif case % 10 == 1:
+            detail = "<skipped/>"
+        else:
+            detail = ""
+        cases.append(
+            f'<testcase name="test_{case}" classname="suite_{job_number}_{file_index}" '
+            f'time="0.125"><properties><property name="owner" value="team"/></properties>'
+            f"{detail}<system-out>output of test {case}</system-out></testcase>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<testsuites name="report-{file_index}" tests="{test_cases}">'
+        f'<testsuite name="suite_{job_number}_{file_index}" tests="{test_cases}" failures="0" '
+        f'skipped="0" time="1.5">{"".join(cases)}</testsuite></testsuites>'
+    )
+
+
+def build_artifact_tree(
+    artifact_path: Path, jobs: int, files_per_job: int, test_cases: int
+) -> None:
+    """Write a synthetic artifact tree of '<job_number>/<index>-report.xml' files.
+
+    Args:
+        artifact_path (Path): The artifact directory to populate.
+        jobs (int): The number of job directories.
+        files_per_job (int): The number of XML files per job.
+        test_cases (int): The number of test cases per file.
+    """
+    for job_number in range(1, jobs + 1):
+        job_path = artifact_path / str(job_number)
+        job_path.mkdir(parents=True)
+        for file_index in range(files_per_job):
+            (job_path / f"{file_index}-report.xml").write_text(
+                build_junit_xml(job_number, file_index, test_cases)
+            )
+
+
+def time_parse(artifact_path: Path, workers: int) -> float:
+    """Parse the artifact tree and return the elapsed wall time in seconds.
+
+    Args:
+        artifact_path (Path): The artifact directory.
+        workers (int): The number of parser processes.
+
+    Returns:
+        float: The elapsed wall time in seconds.
+    """
+    start = time.perf_counter()
+    JUnitXmlParser(workers).parse(artifact_path)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=200, help="Number of job directories")
+    parser.add_argument("--files", type=int, default=15, help="Number of XML files per job")
+    parser.add_argument("--test-cases", type=int, default=50, help="Number of test cases per file")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="Number of parser processes"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    with tempfile.TemporaryDirectory() as directory:
+        artifact_path = Path(directory)
+        build_artifact_tree(artifact_path, args.jobs, args.files, args.test_cases)
+        sequential_time = time_parse(artifact_path, 1)
+        parallel_time = time_parse(artifact_path, args.workers)
+
+    file_count = args.jobs * args.files
+    print(f"sequential parse of {file_count} files: {sequential_time:.2f}s")
+    print(f"parallel parse (workers={args.workers}): {parallel_time:.2f}s")
+    print(f"speedup: {sequential_time / parallel_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Measure the memory held by parsed JUnit XML artifacts and CircleCI test metadata."""
+
+import argparse
+import json
+import logging
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+from benchmarks.junit_xml_parser_benchmark import build_artifact_tree
+from scripts.metric_reporter.circleci_json_parser import CircleCIJsonParser
+from scripts.metric_reporter.junit_xml_parser import JUnitXmlParser
+
+
+def build_metadata_tree(metadata_path: Path, jobs: int, tests: int) -> None:
+    """Write synthetic CircleCI test metadata files named '<job_number>.json'.
+
+    Args:
+        metadata_path (Path): The metadata directory to populate.
+        jobs (int): The number of job files.
+        tests (int): The number of test results per job.
+    """
+    metadata_path.mkdir(parents=True)
+    results = ["success", "failure", "skipped", "system-out"]
+    for job_number in range(1, jobs + 1):
+        data: dict[str, Any] = {
+            "job": {
+                "dependencies": [],
+                "job_number": job_number,
+                "id": str(job_number),
+                "started_at": "2024-01-01T00:00:00Z",
+                "name": "test-job",
+                "project_slug": "test/test-project",
+                "status": "success",
+                "type": "build",
+                "stopped_at": "2024-01-01T01:00:00Z",
+            },
+            "test_metadata": [
+                {
+                    "classname": f"suite_{job_number}",
+                    "name": f"test_{test}",
+                    "result": results[test % len(results)],
+                    "message": "",
+                    "run_time": 0.125,
+                    "source": "source",
+                }
+                for test in range(tests)
+            ],
+        }
+        (metadata_path / f"{job_number}.json").write_text(json.dumps(data))
+
+
+def measure(parse: Callable[[], Any]) -> tuple[float, int, int]:
+    """Run a parse function while tracing memory allocations.
+
+    Args:
+        parse (Callable[[], Any]): The parse function.
+
+    Returns:
+        tuple[float, int, int]: The elapsed time in seconds, the bytes still held by the
+                                result and the peak bytes allocated while parsing.
+    """
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        result = parse()
+        elapsed = time.perf_counter() - start
+        held, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return elapsed, held, peak
+
+
+def report(label: str, items: int, elapsed: float, held: int, peak: int) -> None:
+    """Print the measurements of a parse.
+
+    Args:
+        label (str): The label of the parse.
+        items (int): The number of test cases or test results parsed.
+        elapsed (float): The elapsed time in seconds.
+        held (int): The bytes held by the result.
+        peak (int): The peak bytes allocated while parsing.
+    """
+    print(
+        f"{label}: {items} items in {elapsed:.2f}s, held {held / 2**20:.1f} MiB "
+        f"({held / items:.0f} bytes/item), peak {peak / 2**20:.1f} MiB"
+    )
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=200, help="Number of jobs")
+    parser.add_argument("--files", type=int, default=10, help="Number of XML files per job")
+    parser.add_argument(
+        "--test-cases", type=int, default=100, help="Number of test cases per file"
+    )
+    parser.add_argument("--tests", type=int, default=1000, help="Number of test results per job")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    with tempfile.TemporaryDirectory() as directory:
+        artifact_path = Path(directory) / "junit"
+        metadata_path = Path(directory) / "circle_ci"
+        build_artifact_tree(artifact_path, args.jobs, args.files, args.test_cases)
+        build_metadata_tree(metadata_path, args.jobs, args.tests)
+
+        report(
+            "JUnit XML test cases",
+            args.jobs * args.files * args.test_cases,
+            *measure(lambda: JUnitXmlParser().parse(artifact_path)),
+        )
+        report(
+            "CircleCI test metadata",
+            args.jobs * args.tests,
+            *measure(lambda: CircleCIJsonParser().parse(metadata_path)),
+        )
+
+
+if __name__ == "__main__":
+    main()
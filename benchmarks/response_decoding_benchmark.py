@@ -0,0 +1,121 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Compare decoding CircleCI API pages from parsed JSON and from raw bytes."""
+
+import argparse
+import json
+import timeit
+from typing import Any, Callable
+
+import requests
+from pydantic import BaseModel
+
+from scripts.circleci_scraper.client import PipelineGroup, TestMetadataGroup
+from tests.circleci_scraper.mock_circleci_server import (
+    MockCircleCIServer,
+    MockCircleCIServerConfig,
+)
+
+
+class LegacyVersionControlSystem(BaseModel):
+    """The VCS model before it was trimmed to the fields used by the scraper."""
+
+    branch: str | None = None
+    commit: dict[str, Any] | None = None
+    origin_repository_url: str | None = None
+    provider_name: str | None = None
+    review_id: str | None = None
+    revision: str | None = None
+    target_repository_url: str | None = None
+
+
+class LegacyPipeline(BaseModel):
+    """The Pipeline model before it was trimmed to the fields used by the scraper."""
+
+    created_at: str | None
+    errors: list[Any]
+    id: str
+    number: int
+    project_slug: str
+    state: str
+    trigger: dict[str, Any]
+    updated_at: str | None = None
+    vcs: LegacyVersionControlSystem | None = None
+
+
+class LegacyPipelineGroup(BaseModel):
+    """The PipelineGroup model with the untrimmed Pipeline model."""
+
+    next_page_token: str | None = None
+    items: list[LegacyPipeline]
+
+
+def record_page(url: str) -> bytes:
+    """Fetch the raw body of an API page.
+
+    Args:
+        url (str): The URL of the page.
+
+    Returns:
+        bytes: The response body.
+    """
+    response = requests.get(url, timeout=10)
+    response.raise_for_status()
+    return response.content
+
+
+def time_decoding(decode: Callable[[], Any], repeat: int) -> float:
+    """Time the fastest of several rounds of decoding.
+
+    Args:
+        decode (Callable[[], Any]): The decoding function.
+        repeat (int): The number of rounds.
+
+    Returns:
+        float: The fastest round in milliseconds.
+    """
+    return min(timeit.repeat(decode, number=1, repeat=repeat)) * 1000
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=2000, help="Number of items per page")
+    parser.add_argument("--repeat", type=int, default=20, help="Number of timed rounds")
+    args = parser.parse_args()
+
+    server_config = MockCircleCIServerConfig(
+        pipelines=args.items, test_items_per_job=args.items, page_size=args.items
+    )
+    with MockCircleCIServer(server_config) as server:
+        pipelines_page = record_page(f"{server.base_url}/pipeline?org-slug=gh/mozilla")
+        tests_page = record_page(f"{server.base_url}/project/gh/mozilla/fxa/1/tests")
+
+    benchmarks: list[tuple[str, bytes, Callable[[bytes], Any], Callable[[bytes], Any]]] = [
+        (
+            "pipelines",
+            pipelines_page,
+            lambda body: LegacyPipelineGroup(**json.loads(body)),
+            PipelineGroup.model_validate_json,
+        ),
+        (
+            "test metadata",
+            tests_page,
+            lambda body: TestMetadataGroup(**json.loads(body)),
+            TestMetadataGroup.model_validate_json,
+        ),
+    ]
+    for name, page, legacy_decode, fast_decode in benchmarks:
+        legacy_time = time_decoding(lambda: legacy_decode(page), args.repeat)
+        fast_time = time_decoding(lambda: fast_decode(page), args.repeat)
+        print(
+            f"{name} page ({args.items} items, {len(page)} bytes): "
+            f"json + model {legacy_time:.2f}ms, model_validate_json {fast_time:.2f}ms, "
+            f"speedup {legacy_time / fast_time:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""AsyncCircleCIClient and related objects"""
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from scripts.circleci_scraper.cassette import Cassette
+from scripts.circleci_scraper.client import (
+    ArtifactGroup,
+    CircleCIClient,
+    JobGroup,
+    PipelineGroup,
+    TestMetadataGroup,
+    WorkflowGroup,
+)
+from scripts.circleci_scraper.config import CircleCIScraperConfig
+from scripts.circleci_scraper.metrics import ScraperMetrics
+from scripts.circleci_scraper.response_cache import ResponseCache
+
+R = TypeVar("R")
+
+
+class AsyncCircleCIClient:
+    """Asynchronous counterpart to the CircleCIClient.
+
+    Requests are delegated to a CircleCIClient running on a bounded thread pool, so no more than
+    the configured 'concurrency' number of requests are in flight at any time, regardless of how
+    many coroutines are awaiting results.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(
+        self,
+        circleci_scraper_config: CircleCIScraperConfig,
+        response_cache: ResponseCache | None = None,
+        cassette: Cassette | None = None,
+        metrics: ScraperMetrics | None = None,
+    ):
+        """Initialize the AsyncCircleCIClient.
+
+        Args:
+            circleci_scraper_config (CircleCIScraperConfig): The CircleCI config information.
+            response_cache (ResponseCache | None): Where job pages are kept once all of their
+                                                   jobs have finished, so they are not
+                                                   requested again. Defaults to None.
+            cassette (Cassette | None): Where every response is recorded to, or replayed from
+                                        without contacting CircleCI. Defaults to None.
+            metrics (ScraperMetrics | None): Where requests, pages and bytes are counted.
+                                             Defaults to new, empty ScraperMetrics.
+        """
+        self._client = CircleCIClient(circleci_scraper_config, response_cache, cassette, metrics)
+        self._concurrency = circleci_scraper_config.concurrency
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._concurrency, thread_name_prefix="circleci"
+        )
+
+    @property
+    def client(self) -> CircleCIClient:
+        """The synchronous client used to issue requests."""
+        return self._client
+
+    @property
+    def concurrency(self) -> int:
+        """The number of requests that can be in flight at any time."""
+        return self._concurrency
+
+    async def run(self, function: Callable[..., R], *args: Any) -> R:
+        """Run a blocking call within the global concurrency limit.
+
+        Args:
+            function (Callable[..., R]): The blocking function to call.
+            *args (Any): The positional arguments for the function.
+
+        Returns:
+            R: The return value of the function.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(function, *args))
+
+    def close(self) -> None:
+        """Wait for in-flight requests to complete and release the thread pool."""
+        self._executor.shutdown(wait=True)
+
+    async def get_pipelines(
+        self, organization: str, next_page_token: str | None = None
+    ) -> PipelineGroup:
+        """Retrieve pipelines for the specified organization.
+
+        Args:
+            organization (str): The organization name.
+            next_page_token (str | None): The token for the next page of results. Defaults to None.
+
+        Returns:
+            PipelineGroup: The response from the API as a Pipelines object.
+
+        Raises:
+            CircleCIClientError: If the request to the API fails.
+        """
+        return await self.run(self._client.get_pipelines, organization, next_page_token)
+
+    async def get_workflows(
+        self, pipeline_id: str, next_page_token: str | None = None
+    ) -> WorkflowGroup:
+        """Retrieve workflows for the specified pipeline.
+
+        Args:
+            pipeline_id (str): The pipeline ID.
+            next_page_token (str | None): The token for the next page of results. Defaults to None.
+
+        Returns:
+            WorkflowGroup: The response from the API.
+
+        Raises:
+            CircleCIClientError: If the request to the API fails.
+        """
+        return await self.run(self._client.get_workflows, pipeline_id, next_page_token)
+
+    async def get_jobs(self, workflow_id: str, next_page_token: str | None = None) -> JobGroup:
+        """Retrieve jobs for the specified workflow.
+
+        Args:
+            workflow_id (str): The workflow ID.
+            next_page_token (str | None): The token for the next page of results. Defaults to None.
+
+        Returns:
+            JobGroup: The response from the API.
+
+        Raises:
+            CircleCIClientError: If the request to the API fails.
+        """
+        return await self.run(self._client.get_jobs, workflow_id, next_page_token)
+
+    async def get_test_metadata(
+        self,
+        organization: str,
+        repository: str,
+        job_number: str,
+        next_page_token: str | None = None,
+    ) -> TestMetadataGroup:
+        """Retrieve test metadata for the specified job.
+
+        Args:
+            organization (str): The organization name.
+            repository (str): The repository name.
+            job_number (str): The job number.
+            next_page_token (str | None): The token for the next page of results. Defaults to None.
+
+        Returns:
+            TestMetadataGroup: The response from the API.
+
+        Raises:
+            CircleCIClientError: If the request to the API fails.
+        """
+        return await self.run(
+            self._client.get_test_metadata, organization, repository, job_number, next_page_token
+        )
+
+    async def get_job_artifacts(
+        self,
+        organization: str,
+        repository: str,
+        job_number: str,
+        next_page_token: str | None = None,
+    ) -> ArtifactGroup:
+        """Retrieve job artifacts for the specified job.
+
+        Args:
+            organization (str): The organization name.
+            repository (str): The repository name.
+            job_number (str): The job number.
+            next_page_token (str | None): The token for the next page of results. Defaults to None.
+
+        Returns:
+            ArtifactGroup: The response from the API.
+
+        Raises:
+            CircleCIClientError: If the request to the API fails.
+        """
+        return await self.run(
+            self._client.get_job_artifacts, organization, repository, job_number, next_page_token
+        )
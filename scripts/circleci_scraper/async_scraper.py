@@ -0,0 +1,421 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""AsyncCircleCIScraper and related objects"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, ContextManager, TypeVar
+
+from scripts.circleci_scraper.async_client import AsyncCircleCIClient
+from scripts.circleci_scraper.client import (
+    Artifact,
+    ArtifactGroup,
+    Job,
+    JobGroup,
+    Pipeline,
+    PipelineGroup,
+    TERMINAL_WORKFLOW_STATUSES,
+    TestMetadataGroup,
+    Workflow,
+    WorkflowGroup,
+)
+from scripts.circleci_scraper.config import CircleCIScraperPipelineConfig
+from scripts.circleci_scraper.journal import ProcessedPipeline, ScrapeJournal
+from scripts.circleci_scraper.scraper import ArtifactDownloadResult, CircleCIScraper
+from scripts.circleci_scraper.watermark import WatermarkStore
+from scripts.common.config import CommonConfig
+
+R = TypeVar("R")
+
+
+class AsyncCircleCIScraper(CircleCIScraper):
+    """Export CircleCI test metadata and artifacts using concurrent API requests.
+
+    Pages of a single listing are still fetched in order, since each page token comes from the
+    previous response, but the workflows, jobs, test metadata and artifacts found on those pages
+    are fanned out concurrently. The output written to disk is identical to the CircleCIScraper.
+
+    Paging waits while twice the client's concurrency of pipelines are being exported, so the
+    listing does not get far ahead of the exports. Files are written on worker threads, off the
+    event loop.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(
+        self,
+        common_config: CommonConfig,
+        client: AsyncCircleCIClient,
+        max_artifact_size: int | None = None,
+        watermark_store: WatermarkStore | None = None,
+        journal: ScrapeJournal | None = None,
+    ):
+        """Initialize the AsyncCircleCIScraper.
+
+        Artifact downloads share the client's concurrency limit with the API requests.
+        Pipelines are timed from the start to the end of their export, concurrent pipelines of a
+        repository overlapping in its total time.
+
+        Args:
+            common_config (CommonConfig): Directory information to store test results.
+            client (AsyncCircleCIClient): The asynchronous CircleCI client to interact with the
+                                          API.
+            max_artifact_size (int | None): The maximum size of an artifact in bytes. Larger
+                                            artifacts are skipped. Defaults to None, no limit.
+            watermark_store (WatermarkStore | None): Where the newest fully processed pipeline
+                                                     of each branch is kept, so later runs can
+                                                     stop paging there. Defaults to None.
+            journal (ScrapeJournal | None): Where the progress of the run is kept, so an
+                                            interrupted run can be resumed. Defaults to None.
+        """
+        super().__init__(
+            common_config,
+            client.client,
+            max_artifact_size,
+            watermark_store=watermark_store,
+            journal=journal,
+        )
+        self._async_client = client
+
+    def export_test_metadata_and_artifacts(
+        self,
+        pipeline_configs: list[CircleCIScraperPipelineConfig],
+        date_limit: datetime | None = None,
+        full: bool = False,
+        resume: bool = False,
+    ) -> None:
+        """Export test metadata and artifacts for a list of pipelines.
+
+        Args:
+            pipeline_configs (list[CircleCIScraperPipelineConfig]): A list of pipeline
+                                                                    configurations.
+            date_limit (datetime | None): The date limit for fetching data. Defaults to None.
+            full (bool): Ignore the watermarks and page back to the date limit. Defaults to
+                         False.
+            resume (bool): Continue from the journal of an interrupted run. Defaults to False.
+
+        Raises:
+            CircleCIClientError: If there is an error in the CircleCI API request.
+            CircleCIScraperError: If there is an error in downloading the artifacts.
+            WatermarkStoreError: If the watermarks cannot be saved.
+            ScrapeJournalError: If the journal cannot be saved.
+        """
+        asyncio.run(
+            self._export_test_metadata_and_artifacts(pipeline_configs, date_limit, full, resume)
+        )
+
+    async def _export_test_metadata_and_artifacts(
+        self,
+        pipeline_configs: list[CircleCIScraperPipelineConfig],
+        date_limit: datetime | None,
+        full: bool,
+        resume: bool,
+    ) -> None:
+        self.download_statistics = {}
+        self._export_index = self._scan_export_index()
+        async with self._task_group() as task_group:
+            for organization, organization_configs in self._group_by_organization(
+                pipeline_configs
+            ).items():
+                task_group.create_task(
+                    self._export_test_metadata_and_artifacts_by_organization(
+                        organization, organization_configs, date_limit, full, resume
+                    )
+                )
+        self.log_download_statistics()
+
+    @staticmethod
+    @asynccontextmanager
+    async def _task_group() -> AsyncIterator[asyncio.TaskGroup]:
+        # A failed task cancels the others, which are awaited before the error is raised. The
+        # error is raised as is rather than in an ExceptionGroup, as the CircleCIScraper would.
+        try:
+            async with asyncio.TaskGroup() as task_group:
+                yield task_group
+        except BaseExceptionGroup as error_group:
+            raise error_group.exceptions[0] from None
+
+    async def _export_test_metadata_and_artifacts_by_organization(
+        self,
+        organization: str,
+        pipeline_configs: list[CircleCIScraperPipelineConfig],
+        date_limit: datetime | None,
+        full: bool,
+        resume: bool,
+    ) -> None:
+        repositories = ", ".join(config.repository for config in pipeline_configs)
+        self.logger.info(f"Scrape {organization}: {repositories}")
+        progress = self._start_journal(organization, resume)
+        processed_pipelines = [
+            list(progress.repository(config.repository).pipelines) for config in pipeline_configs
+        ]
+        resumed_pipeline_ids = self._resumed_pipeline_ids(processed_pipelines)
+        tasks: list[list[asyncio.Future[bool]]] = [[] for _ in pipeline_configs]
+        # The token and pipeline tasks of each page of the listing, the last page being paged
+        pages: deque[tuple[str | None, list[asyncio.Future[bool]]]] = deque(
+            [(progress.page_token, [])]
+        )
+        active_configs = self._active_configs(pipeline_configs, progress)
+        pipeline_slots = asyncio.Semaphore(2 * self._async_client.concurrency)
+        try:
+            while active_configs:
+                page_token, page_tasks = pages[-1]
+                pipelines: PipelineGroup = await self._async_client.get_pipelines(
+                    organization, page_token
+                )
+                for pipeline in pipelines.items:
+                    if self._is_past_date_limit(pipeline, date_limit):
+                        self._finish_configs(organization, pipeline_configs, active_configs)
+                        break
+                    for index in self._matching_configs(
+                        pipeline_configs, active_configs, pipeline
+                    ):
+                        pipeline_config = pipeline_configs[index]
+                        if self._is_scrape_boundary(pipeline_config, pipeline, full):
+                            active_configs.discard(index)
+                            self._finish_journal_repository(organization, pipeline_config)
+                            continue
+                        if pipeline.id in resumed_pipeline_ids[index]:
+                            continue
+                        await pipeline_slots.acquire()
+                        task = asyncio.ensure_future(
+                            self._export_pipeline(pipeline.id, pipeline_config)
+                        )
+                        task.add_done_callback(lambda _: pipeline_slots.release())
+                        task.add_done_callback(
+                            partial(
+                                self._on_pipeline_exported,
+                                organization,
+                                pipeline_config,
+                                pipeline,
+                                processed_pipelines[index],
+                                pages,
+                            )
+                        )
+                        tasks[index].append(task)
+                        page_tasks.append(task)
+                if not pipelines.next_page_token:
+                    break
+                pages.append((pipelines.next_page_token, []))
+                self._advance_journal_page(organization, pages)
+        except asyncio.CancelledError:
+            for config_tasks in tasks:
+                for pipeline_task in config_tasks:
+                    pipeline_task.cancel()
+            raise
+        finally:
+            # Pipelines still being exported when paging or another pipeline fails are finished
+            # and journaled before the error is raised, so a resumed run does not repeat them
+            results = await asyncio.gather(
+                *(task for config_tasks in tasks for task in config_tasks),
+                return_exceptions=True,
+            )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        for pipeline_config, config_pipelines in zip(pipeline_configs, processed_pipelines):
+            self._advance_watermarks(pipeline_config, config_pipelines)
+        if self._journal:
+            self._journal.finish(organization)
+
+    async def _export_pipeline(
+        self, pipeline_id: str, pipeline_config: CircleCIScraperPipelineConfig
+    ) -> bool:
+        start = time.perf_counter()
+        complete = await self._export_test_metadata_and_artifacts_by_pipeline_id(
+            pipeline_id,
+            pipeline_config.organization,
+            pipeline_config.repository,
+            pipeline_config.workflows,
+        )
+        self._add_repository_time(pipeline_config.repository, time.perf_counter() - start)
+        return complete
+
+    def _on_pipeline_exported(
+        self,
+        organization: str,
+        pipeline_config: CircleCIScraperPipelineConfig,
+        pipeline: Pipeline,
+        processed_pipelines: list[ProcessedPipeline],
+        pages: deque[tuple[str | None, list[asyncio.Future[bool]]]],
+        task: asyncio.Future[bool],
+    ) -> None:
+        if not self._is_exported(task):
+            return
+        processed_pipeline = ProcessedPipeline.from_pipeline(pipeline, task.result())
+        processed_pipelines.append(processed_pipeline)
+        self._record_journal_pipeline(organization, pipeline_config, processed_pipeline)
+        self._advance_journal_page(organization, pages)
+
+    @staticmethod
+    def _is_exported(task: asyncio.Future[bool]) -> bool:
+        return task.done() and not task.cancelled() and task.exception() is None
+
+    def _advance_journal_page(
+        self, organization: str, pages: deque[tuple[str | None, list[asyncio.Future[bool]]]]
+    ) -> None:
+        # Pipelines finish out of order, so a resumed run starts at the first page with a
+        # pipeline that is not exported yet, or else at the page being paged. Leading pages
+        # whose pipelines are all exported are dropped, so they are not checked again.
+        if not self._journal:
+            return
+        while len(pages) > 1 and all(self._is_exported(task) for task in pages[0][1]):
+            pages.popleft()
+        self._journal.set_page_token(organization, pages[0][0])
+
+    @staticmethod
+    async def _timed(awaitable: Awaitable[R], timer: ContextManager[None]) -> R:
+        # The timer starts once the task runs, not when it is created
+        with timer:
+            return await awaitable
+
+    async def _export_test_metadata_and_artifacts_by_pipeline_id(
+        self,
+        pipeline_id: str,
+        organization: str,
+        repository: str,
+        workflow_configs: dict[str, list[str]],
+    ) -> bool:
+        complete = True
+        tasks: list[asyncio.Task[bool]] = []
+        next_page_token: str | None = None
+        async with self._task_group() as task_group:
+            while True:
+                workflows: WorkflowGroup = await self._async_client.get_workflows(
+                    pipeline_id, next_page_token
+                )
+                for workflow in workflows.items:
+                    if workflow.name in workflow_configs:
+                        job_names = workflow_configs[workflow.name]
+                        if workflow.status not in TERMINAL_WORKFLOW_STATUSES:
+                            complete = False
+                        tasks.append(
+                            task_group.create_task(
+                                self._timed(
+                                    self._export_test_metadata_and_artifacts_workflow_id(
+                                        organization, repository, workflow, job_names
+                                    ),
+                                    self._metrics.time(
+                                        "workflow_export_duration_seconds",
+                                        repository=repository,
+                                        workflow=workflow.name,
+                                    ),
+                                )
+                            )
+                        )
+                next_page_token = workflows.next_page_token
+                if not next_page_token:
+                    break
+        return all(task.result() for task in tasks) and complete
+
+    async def _export_test_metadata_and_artifacts_workflow_id(
+        self,
+        organization: str,
+        repository: str,
+        workflow: Workflow,
+        job_names: list[str],
+    ) -> bool:
+        artifact_tasks: list[asyncio.Task[list[ArtifactDownloadResult]]] = []
+        next_page_token: str | None = None
+        async with self._task_group() as task_group:
+            while True:
+                jobs: JobGroup = await self._async_client.get_jobs(workflow.id, next_page_token)
+                for job in jobs.items:
+                    if job.name in job_names:
+                        if not job.job_number:
+                            # This happens when workflows are cancelled before a number is
+                            # assigned to the test job
+                            logging.warning(
+                                f"Skipping data for workflow {workflow.id} because the job "
+                                f"number is missing for "
+                                f"{organization}>{repository}>{workflow.name}>{job.name}"
+                            )
+                            continue
+                        if not self._has_metadata(repository, workflow.name, job):
+                            task_group.create_task(
+                                self._timed(
+                                    self._export_test_metadata_by_job(
+                                        organization, repository, workflow.name, job
+                                    ),
+                                    self._time_job(repository, workflow.name, job, "metadata"),
+                                )
+                            )
+                        if not self._has_artifacts(repository, workflow.name, job):
+                            artifact_tasks.append(
+                                task_group.create_task(
+                                    self._timed(
+                                        self._export_test_artifacts_by_job(
+                                            organization, repository, workflow.name, job
+                                        ),
+                                        self._time_job(
+                                            repository, workflow.name, job, "artifacts"
+                                        ),
+                                    )
+                                )
+                            )
+                next_page_token = jobs.next_page_token
+                if not next_page_token:
+                    break
+        return all(result.downloaded for task in artifact_tasks for result in task.result())
+
+    async def _export_test_metadata_by_job(
+        self,
+        organization: str,
+        repository: str,
+        workflow_name: str,
+        job: Job,
+    ) -> None:
+        file_content: dict[str, Any] = {"job": job.model_dump(), "test_metadata": []}
+        next_page_token: str | None = None
+        while True:
+            test_metadata: TestMetadataGroup = await self._async_client.get_test_metadata(
+                organization, repository, str(job.job_number), next_page_token
+            )
+            file_content["test_metadata"] += [item.model_dump() for item in test_metadata.items]
+            next_page_token = test_metadata.next_page_token
+            if not next_page_token:
+                break
+        if not file_content["test_metadata"]:
+            self.logger.info(f"There is no test metadata for job {str(job.job_number)}")
+            return
+        await asyncio.to_thread(
+            self.export_test_metadata, repository, workflow_name, job, file_content
+        )
+
+    async def _export_test_artifacts_by_job(
+        self,
+        organization: str,
+        repository: str,
+        workflow_name: str,
+        job: Job,
+    ) -> list[ArtifactDownloadResult]:
+        test_artifacts: list[Artifact] = []
+        next_page_token: str | None = None
+        while True:
+            artifacts: ArtifactGroup = await self._async_client.get_job_artifacts(
+                organization, repository, str(job.job_number), next_page_token
+            )
+            test_artifacts += [item for item in artifacts.items if item.path.endswith(".xml")]
+            next_page_token = artifacts.next_page_token
+            if not next_page_token:
+                break
+        pending_downloads: list[tuple[str, str]] = await asyncio.to_thread(
+            self._pending_artifact_downloads, repository, workflow_name, job, test_artifacts
+        )
+        results: list[ArtifactDownloadResult] = await asyncio.gather(
+            *(
+                self._async_client.run(self._try_download_artifact, file_name, url)
+                for file_name, url in pending_downloads
+            )
+        )
+        await asyncio.to_thread(
+            self._record_download_results, repository, workflow_name, job, test_artifacts, results
+        )
+        return results
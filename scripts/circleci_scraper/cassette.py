@@ -0,0 +1,225 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Cassette and related objects"""
+
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from http import HTTPStatus
+from pathlib import Path
+from typing import Iterable, Iterator, Literal
+
+import requests
+from pydantic import BaseModel
+from requests.structures import CaseInsensitiveDict
+
+from scripts.common.error import BaseError
+
+CassetteMode = Literal["record", "replay"]
+
+
+class CassetteStatistics(BaseModel):
+    """Counts of the responses recorded to or replayed from a Cassette."""
+
+    recorded: int = 0
+    replayed: int = 0
+    missing: int = 0
+    body_bytes: int = 0
+
+
+class CassetteError(BaseError):
+    """Custom exception class for Cassette errors."""
+
+    pass
+
+
+class Cassette:
+    """Local recording of the HTTP responses received by a CircleCIClient.
+
+    In 'record' mode the final response of every request, including artifact bodies, is stored
+    by request URL in a SQLite database, with zlib compressed bodies. Streamed bodies are
+    compressed as they are read, rather than buffered. Request headers, and so
+    the API token, are not stored. In 'replay' mode the stored responses are served instead of
+    contacting CircleCI, optionally after a simulated latency. The cassette may be shared by the
+    threads of a CircleCIClient; access to the connection is serialized.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, path: Path, mode: CassetteMode, latency: float = 0.0) -> None:
+        """Initialize the Cassette, creating the database in 'record' mode.
+
+        Args:
+            path (Path): The path of the SQLite database file.
+            mode (CassetteMode): Whether to 'record' responses or 'replay' recorded ones.
+            latency (float): The delay in seconds before each replayed response. Defaults to 0.
+
+        Raises:
+            CassetteError: If the database cannot be opened, or does not exist in 'replay' mode.
+        """
+        self._path = path
+        self._mode = mode
+        self._latency = latency
+        self._lock = threading.Lock()
+        self.statistics = CassetteStatistics()
+        try:
+            if mode == "record":
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self._connection = sqlite3.connect(path, check_same_thread=False)
+                self._connection.executescript(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "url TEXT PRIMARY KEY, status INTEGER, content_type TEXT, body BLOB);"
+                    "CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT);"
+                )
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO metadata (key, value) VALUES ('recorded_at', ?)",
+                    (datetime.now(timezone.utc).isoformat(),),
+                )
+                self._connection.commit()
+            else:
+                self._connection = sqlite3.connect(
+                    f"file:{path}?mode=ro", uri=True, check_same_thread=False
+                )
+            row = self._connection.execute(
+                "SELECT value FROM metadata WHERE key = 'recorded_at'"
+            ).fetchone()
+        except (OSError, sqlite3.Error) as error:
+            error_msg = f"Unable to open the cassette at {path}"
+            self.logger.error(error_msg, exc_info=error)
+            raise CassetteError(error_msg, error)
+        self.recorded_at: datetime | None = datetime.fromisoformat(row[0]) if row else None
+
+    @property
+    def recording(self) -> bool:
+        """Whether responses are recorded, rather than replayed."""
+        return self._mode == "record"
+
+    def record(self, url: str, response: requests.Response) -> None:
+        """Store a response, reading its whole body.
+
+        Args:
+            url (str): The request URL, including its query string.
+            response (requests.Response): The response to store. Its body remains readable.
+
+        Raises:
+            CassetteError: If the database cannot be written.
+        """
+        body = response.content
+        self._store(url, response, zlib.compress(body), len(body))
+
+    def record_stream(
+        self, url: str, response: requests.Response, chunks: Iterable[bytes]
+    ) -> Iterator[bytes]:
+        """Store a streamed response while its body is read.
+
+        The chunks are compressed as they pass through, so the body is never held in memory
+        uncompressed. The response is only stored once its body has been read to the end; a
+        body abandoned part way, such as an artifact over the maximum size, is not recorded.
+
+        Args:
+            url (str): The request URL, including its query string.
+            response (requests.Response): The response to store.
+            chunks (Iterable[bytes]): The chunks of the response body.
+
+        Yields:
+            bytes: The next chunk of the response body.
+
+        Raises:
+            CassetteError: If the database cannot be written.
+        """
+        compressor = zlib.compressobj()
+        compressed_chunks: list[bytes] = []
+        size = 0
+        for chunk in chunks:
+            compressed_chunks.append(compressor.compress(chunk))
+            size += len(chunk)
+            yield chunk
+        compressed_chunks.append(compressor.flush())
+        self._store(url, response, b"".join(compressed_chunks), size)
+
+    def _store(
+        self, url: str, response: requests.Response, compressed_body: bytes, size: int
+    ) -> None:
+        with self._lock:
+            try:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO responses (url, status, content_type, body) "
+                    "VALUES (?, ?, ?, ?)",
+                    (
+                        url,
+                        response.status_code,
+                        response.headers.get("Content-Type"),
+                        compressed_body,
+                    ),
+                )
+                self._connection.commit()
+            except sqlite3.Error as error:
+                error_msg = f"Unable to write the response of {url} to the cassette"
+                self.logger.error(error_msg, exc_info=error)
+                raise CassetteError(error_msg, error)
+            self.statistics.recorded += 1
+            self.statistics.body_bytes += size
+
+    def replay(self, url: str) -> requests.Response | None:
+        """Build the recorded response of a request, after the simulated latency.
+
+        Args:
+            url (str): The request URL, including its query string.
+
+        Returns:
+            requests.Response | None: The recorded response, or None if the request was not
+                                      recorded.
+
+        Raises:
+            CassetteError: If the database cannot be read.
+        """
+        if self._latency:
+            time.sleep(self._latency)
+        with self._lock:
+            try:
+                row = self._connection.execute(
+                    "SELECT status, content_type, body FROM responses WHERE url = ?", (url,)
+                ).fetchone()
+            except sqlite3.Error as error:
+                error_msg = f"Unable to read the response of {url} from the cassette"
+                self.logger.error(error_msg, exc_info=error)
+                raise CassetteError(error_msg, error)
+            if row is None:
+                self.statistics.missing += 1
+                return None
+            status, content_type, compressed_body = row
+            body = zlib.decompress(compressed_body)
+            self.statistics.replayed += 1
+            self.statistics.body_bytes += len(body)
+        response = requests.Response()
+        response.status_code = status
+        response.reason = HTTPStatus(status).phrase
+        response.url = url
+        response.headers = CaseInsensitiveDict({"Content-Type": content_type or ""})
+        # The body is already read, so it can also be iterated in chunks
+        response._content = body
+        response._content_consumed = True  # type: ignore[attr-defined]
+        return response
+
+    def log_statistics(self) -> None:
+        """Log the recorded or replayed responses."""
+        if self.recording:
+            self.logger.info(
+                f"Cassette: recorded {self.statistics.recorded} responses, "
+                f"{self.statistics.body_bytes} bytes, to {self._path}"
+            )
+        else:
+            self.logger.info(
+                f"Cassette: replayed {self.statistics.replayed} responses, "
+                f"{self.statistics.body_bytes} bytes, {self.statistics.missing} missing"
+            )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
@@ -5,41 +5,74 @@
 """CircleCIClient and related objects"""
 
 import logging
-from typing import Any, Type, TypeVar
+import time
+from typing import Any, Callable, Iterable, Iterator, Type, TypeVar
 
 import requests
 from pydantic import BaseModel, ValidationError
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
+from urllib3.util.retry import Retry
 
+from scripts.circleci_scraper.cassette import Cassette
 from scripts.circleci_scraper.config import CircleCIScraperConfig
+from scripts.circleci_scraper.metrics import ScraperMetrics
+from scripts.circleci_scraper.rate_limiter import RateLimiter, parse_retry_after
+from scripts.circleci_scraper.response_cache import ResponseCache
 from scripts.common.error import BaseError
+from scripts.common.profiler import stage
 
 T = TypeVar("T", bound=BaseModel)
 
+# Workflows in these states will not run again, so their jobs and results no longer change
+TERMINAL_WORKFLOW_STATUSES = frozenset(
+    {"success", "failed", "error", "canceled", "not_run", "unauthorized"}
+)
+TERMINAL_JOB_STATUSES = frozenset(
+    {
+        "success",
+        "failed",
+        "canceled",
+        "not_run",
+        "infrastructure_fail",
+        "timedout",
+        "unauthorized",
+        "terminated-unknown",
+    }
+)
+
+# The API and the artifact storage are served from different hosts, each host gets its own pool
+POOL_CONNECTIONS = 4
+# Throttled requests (429) are retried by the RateLimiter, which pauses all threads
+RETRY_STATUS_CODES = frozenset({500, 502, 503, 504})
+TOO_MANY_REQUESTS = 429
+RATE_LIMIT_RETRIES = 8
+RATE_LIMIT_BACKOFF = 1.0
+MAX_RATE_LIMIT_BACKOFF = 60.0
+REQUEST_TIMEOUT = 10
+ARTIFACT_CHUNK_SIZE = 64 * 1024
+ARTIFACT_ENDPOINT = "artifact_download"
+LISTING_STAGE = "listing"
+METADATA_FETCH_STAGE = "metadata fetch"
+
+
+# Pipeline and VCS models only declare the fields used by the scraper, the remaining fields of
+# the API response are skipped when decoding. Jobs and test metadata are exported in full.
+
 
 class VersionControlSystem(BaseModel):
     """CircleCI VCS."""
 
     branch: str | None = None
-    commit: dict[str, Any] | None = None
-    origin_repository_url: str | None = None
-    provider_name: str | None = None
-    review_id: str | None = None
-    revision: str | None = None
-    target_repository_url: str | None = None
 
 
 class Pipeline(BaseModel):
     """CircleCI Pipeline."""
 
     created_at: str | None
-    errors: list[Any]
     id: str
     number: int
     project_slug: str
-    state: str
-    trigger: dict[str, Any]
-    updated_at: str | None = None
     vcs: VersionControlSystem | None = None
 
 
@@ -125,6 +158,16 @@ class ArtifactGroup(BaseModel):
     items: list[Artifact]
 
 
+# The 'endpoint' metric label of the requests for each listing
+ENDPOINT_LABELS: dict[type[BaseModel], str] = {
+    PipelineGroup: "pipelines",
+    WorkflowGroup: "workflows",
+    JobGroup: "jobs",
+    TestMetadataGroup: "tests",
+    ArtifactGroup: "artifacts",
+}
+
+
 class CircleCIClientError(BaseError):
     """Custom exception class for CircleCIClient errors."""
 
@@ -136,15 +179,115 @@ class CircleCIClient:
 
     logger = logging.getLogger(__name__)
 
-    def __init__(self, circleci_scraper_config: CircleCIScraperConfig):
+    def __init__(
+        self,
+        circleci_scraper_config: CircleCIScraperConfig,
+        response_cache: ResponseCache | None = None,
+        cassette: Cassette | None = None,
+        metrics: ScraperMetrics | None = None,
+    ):
         """Initialize the CircleCIClient.
 
         Args:
             circleci_scraper_config (CircleCIScraperConfig): The CircleCI config information.
+            response_cache (ResponseCache | None): Where job pages are kept once all of their
+                                                   jobs have finished, so they are not
+                                                   requested again. Defaults to None.
+            cassette (Cassette | None): Where every response is recorded to, or replayed from
+                                        without contacting CircleCI. Defaults to None.
+            metrics (ScraperMetrics | None): Where requests, pages and bytes are counted.
+                                             Defaults to new, empty ScraperMetrics.
         """
         self._token: str = circleci_scraper_config.token
         self._vcs_slug: str = circleci_scraper_config.vcs_slug
         self._base_url: str = circleci_scraper_config.base_url
+        self._session: requests.Session = self._build_session(circleci_scraper_config)
+        self._rate_limiter = RateLimiter(circleci_scraper_config.requests_per_second)
+        self._response_cache = response_cache
+        self._cassette = cassette
+        self._metrics = metrics or ScraperMetrics()
+
+    @property
+    def metrics(self) -> ScraperMetrics:
+        """The metrics of the requests made by the client."""
+        return self._metrics
+
+    @staticmethod
+    def _build_session(circleci_scraper_config: CircleCIScraperConfig) -> requests.Session:
+        # Connections are kept alive and reused across requests, including artifact downloads.
+        # Only idempotent GET requests are retried.
+        retry = Retry(
+            total=circleci_scraper_config.max_retries,
+            backoff_factor=circleci_scraper_config.backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False,
+            # Otherwise urllib3 retries throttled responses itself, bypassing the RateLimiter
+            respect_retry_after_header=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=POOL_CONNECTIONS,
+            pool_maxsize=circleci_scraper_config.pool_size,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _get(self, url: str, endpoint: str, **kwargs: Any) -> requests.Response:
+        if self._cassette:
+            cassette_url = self._cassette_url(url, kwargs.get("params"))
+            if not self._cassette.recording:
+                start = time.perf_counter()
+                replayed_response = self._cassette.replay(cassette_url)
+                if replayed_response is None:
+                    self._count_request(endpoint, "error", start)
+                    raise RequestException(f"No recorded response for {cassette_url}")
+                self._count_request(endpoint, str(replayed_response.status_code), start)
+                return replayed_response
+        # Throttled requests are retried after the delay requested by the API, during which no
+        # other thread of the client makes requests either
+        attempt = 0
+        while True:
+            self._rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response: requests.Response = self._session.get(
+                    url, timeout=REQUEST_TIMEOUT, **kwargs
+                )
+            except RequestException:
+                self._count_request(endpoint, "error", start)
+                raise
+            self._count_request(endpoint, str(response.status_code), start)
+            self._rate_limiter.update(response.headers)
+            if response.status_code != TOO_MANY_REQUESTS or attempt == RATE_LIMIT_RETRIES:
+                # Successful streamed bodies are recorded while they are read, by the caller
+                if self._cassette and not (kwargs.get("stream") and response.ok):
+                    self._cassette.record(cassette_url, response)
+                return response
+            response.close()
+            retry_after = parse_retry_after(response.headers)
+            delay = (
+                retry_after
+                if retry_after is not None
+                else min(RATE_LIMIT_BACKOFF * 2**attempt, MAX_RATE_LIMIT_BACKOFF)
+            )
+            self.logger.warning(f"Rate limited by {url}, pausing requests for {delay:.1f}s")
+            self._rate_limiter.cool_down(delay)
+            attempt += 1
+
+    @staticmethod
+    def _cassette_url(url: str, params: dict[str, Any] | None = None) -> str:
+        # Keyed by the requested URL, artifact downloads are redirected to another host
+        return str(requests.Request("GET", url, params=params).prepare().url)
+
+    def _count_request(self, endpoint: str, status: str, start: float) -> None:
+        # Streamed artifact downloads are timed until their headers are received
+        self._metrics.increment("requests_total", endpoint=endpoint, status=status)
+        self._metrics.observe(
+            "request_duration_seconds", time.perf_counter() - start, endpoint=endpoint
+        )
 
     def _headers(self) -> dict[str, str]:
         return {"Circle-Token": self._token, "Accept": "application/json"}
@@ -153,20 +296,86 @@ class CircleCIClient:
         self, endpoint: str, response_model: Type[T], params: dict[str, Any] | None = None
     ) -> T:
         url = f"{self._base_url}/{endpoint}"
+        endpoint_label = ENDPOINT_LABELS[response_model]
         self.logger.info(f"Making API request to {url} with params {params}")
         try:
-            response: requests.Response = requests.get(
-                url, headers=self._headers(), params=params, timeout=10
+            response: requests.Response = self._get(
+                url, endpoint_label, headers=self._headers(), params=params
             )
             response.raise_for_status()
-            response_json: dict[str, Any] = response.json()
-            return response_model(**response_json)
+            self._metrics.increment(
+                "response_bytes_total", len(response.content), endpoint=endpoint_label
+            )
+            self._metrics.increment("pages_total", entity=endpoint_label)
+            # Validate the raw body in a single pass, without building intermediate dicts
+            return response_model.model_validate_json(response.content)
         except (RequestException, ValidationError) as error:
+            # Look up by base class, requests raises subclasses such as HTTPError
             error_mapping: dict[type, str] = {
                 RequestException: f"Request to {url} failed",
                 ValidationError: f"Unexpected schema for '{endpoint}' endpoint",
             }
-            error_msg = error_mapping[type(error)]
+            error_msg = next(
+                message
+                for error_type, message in error_mapping.items()
+                if isinstance(error, error_type)
+            )
+            self.logger.error(error_msg, exc_info=error)
+            raise CircleCIClientError(error_msg, error)
+
+    def _make_cached_request(
+        self, endpoint: str, response_model: Type[T], is_final: Callable[[T], bool]
+    ) -> T:
+        if self._response_cache:
+            body = self._response_cache.get(endpoint)
+            self._metrics.increment(
+                "response_cache_lookups_total", result="miss" if body is None else "hit"
+            )
+            if body is not None:
+                try:
+                    cached_response = response_model.model_validate_json(body)
+                    self._metrics.increment("pages_total", entity=ENDPOINT_LABELS[response_model])
+                    return cached_response
+                except ValidationError:
+                    # Cached by a version with a different schema, fetch it again
+                    self.logger.warning(f"Ignoring outdated cached response for '{endpoint}'")
+        response = self._make_request(endpoint, response_model)
+        if self._response_cache and is_final(response):
+            self._response_cache.put(endpoint, response.model_dump_json())
+        return response
+
+    def iter_artifact(self, url: str, chunk_size: int = ARTIFACT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Stream the content of an artifact in chunks.
+
+        The response is not buffered in memory; the connection is released once the iterator is
+        exhausted or closed.
+
+        Args:
+            url (str): The URL of the artifact.
+            chunk_size (int): The maximum size of each chunk in bytes. Defaults to 64 KiB.
+
+        Yields:
+            bytes: The next chunk of the artifact content.
+
+        Raises:
+            CircleCIClientError: If the request for the artifact fails.
+        """
+        self.logger.info(f"Downloading artifact from {url}")
+        try:
+            with self._get(url, ARTIFACT_ENDPOINT, stream=True) as response:
+                response.raise_for_status()
+                chunks: Iterable[bytes] = response.iter_content(chunk_size)
+                if self._cassette and self._cassette.recording:
+                    chunks = self._cassette.record_stream(
+                        self._cassette_url(url), response, chunks
+                    )
+                for chunk in chunks:
+                    self._metrics.increment(
+                        "response_bytes_total", len(chunk), endpoint=ARTIFACT_ENDPOINT
+                    )
+                    yield chunk
+        except RequestException as error:
+            error_msg = f"Request to {url} failed"
             self.logger.error(error_msg, exc_info=error)
             raise CircleCIClientError(error_msg, error)
 
@@ -189,7 +398,8 @@ class CircleCIClient:
             f"pipeline?org-slug={self._vcs_slug}/{organization}"
             f"{(f'&page-token={next_page_token}' if next_page_token else '')}"
         )
-        return self._make_request(endpoint, PipelineGroup)
+        with stage(LISTING_STAGE):
+            return self._make_request(endpoint, PipelineGroup)
 
     def get_workflows(self, pipeline_id: str, next_page_token: str | None = None) -> WorkflowGroup:
         """Retrieve workflows for the specified pipeline.
@@ -208,7 +418,10 @@ class CircleCIClient:
             f"pipeline/{pipeline_id}/workflow"
             f"{(f'?page-token={next_page_token}' if next_page_token else '')}"
         )
-        return self._make_request(endpoint, WorkflowGroup)
+        # Not cached: rerunning a workflow adds a new workflow to the pipeline, even once all of
+        # its workflows have finished
+        with stage(LISTING_STAGE):
+            return self._make_request(endpoint, WorkflowGroup)
 
     def get_jobs(self, workflow_id: str, next_page_token: str | None = None) -> JobGroup:
         """Retrieve jobs for the specified workflow.
@@ -227,7 +440,15 @@ class CircleCIClient:
             f"workflow/{workflow_id}/job"
             f"{(f'?page-token={next_page_token}' if next_page_token else '')}"
         )
-        return self._make_request(endpoint, JobGroup)
+        with stage(LISTING_STAGE):
+            return self._make_cached_request(
+                endpoint,
+                JobGroup,
+                lambda jobs: (
+                    bool(jobs.items)
+                    and all(job.status in TERMINAL_JOB_STATUSES for job in jobs.items)
+                ),
+            )
 
     def get_test_metadata(
         self,
@@ -254,7 +475,8 @@ class CircleCIClient:
             f"project/{self._vcs_slug}/{organization}/{repository}/{job_number}/tests"
             f"{(f'?page-token={next_page_token}' if next_page_token else '')}"
         )
-        return self._make_request(endpoint, TestMetadataGroup)
+        with stage(METADATA_FETCH_STAGE):
+            return self._make_request(endpoint, TestMetadataGroup)
 
     def get_job_artifacts(
         self,
@@ -281,4 +503,5 @@ class CircleCIClient:
             f"project/{self._vcs_slug}/{organization}/{repository}/{job_number}/artifacts"
             f"{(f'?page-token={next_page_token}' if next_page_token else '')}"
         )
-        return self._make_request(endpoint, ArtifactGroup)
+        with stage(LISTING_STAGE):
+            return self._make_request(endpoint, ArtifactGroup)
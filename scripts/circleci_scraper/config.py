@@ -12,11 +12,17 @@ from typing import Any, Literal, cast
 
 from pydantic import BaseModel, ValidationError, Field
 
-from scripts.common.config import BaseConfig, InvalidConfigError
+from scripts.common.config import DIRECTORY_PATTERN, BaseConfig, InvalidConfigError
 
 REPOSITORY_PATTERN = r"^[a-zA-Z0-9-_]+$"
 TOKEN_PATTERN = r"^\S+$"  # nosec B105
-URL_PATTERN = r"^https?://[a-zA-Z0-9.-]+(/[a-zA-Z0-9._~-]*)*$"
+URL_PATTERN = r"^https?://[a-zA-Z0-9.-]+(:[0-9]+)?(/[a-zA-Z0-9._~-]*)*$"
+DEFAULT_CONCURRENCY = 8
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_DOWNLOAD_WORKERS = 4
+DEFAULT_STATE_DIR = "scraper_state"
 
 
 class CircleCIScraperPipelineConfig(BaseModel):
@@ -37,6 +43,15 @@ class CircleCIScraperConfig(BaseModel):
     pipelines: list[CircleCIScraperPipelineConfig]
     days_of_data: int | None
     date_limit: datetime | None
+    concurrency: int = Field(default=DEFAULT_CONCURRENCY, gt=0)
+    pool_size: int = Field(default=DEFAULT_POOL_SIZE, gt=0)
+    max_retries: int = Field(default=DEFAULT_MAX_RETRIES, ge=0)
+    backoff_factor: float = Field(default=DEFAULT_BACKOFF_FACTOR, ge=0)
+    max_artifact_size: int | None = Field(default=None, gt=0)
+    download_workers: int = Field(default=DEFAULT_DOWNLOAD_WORKERS, gt=0)
+    state_dir: str = Field(default=DEFAULT_STATE_DIR, pattern=DIRECTORY_PATTERN)
+    requests_per_second: float | None = Field(default=None, gt=0)
+    metrics_dir: str | None = Field(default=None, pattern=DIRECTORY_PATTERN)
 
 
 class Config(BaseConfig):
@@ -81,13 +96,45 @@ class Config(BaseConfig):
                 pipelines=pipelines,
                 days_of_data=days_of_data,
                 date_limit=date_limit,
+                concurrency=config_parser.getint(
+                    "circleci_scraper", "concurrency", fallback=DEFAULT_CONCURRENCY
+                ),
+                pool_size=config_parser.getint(
+                    "circleci_scraper", "pool_size", fallback=DEFAULT_POOL_SIZE
+                ),
+                max_retries=config_parser.getint(
+                    "circleci_scraper", "max_retries", fallback=DEFAULT_MAX_RETRIES
+                ),
+                backoff_factor=config_parser.getfloat(
+                    "circleci_scraper", "backoff_factor", fallback=DEFAULT_BACKOFF_FACTOR
+                ),
+                max_artifact_size=config_parser.getint(
+                    "circleci_scraper", "max_artifact_size", fallback=None
+                ),
+                download_workers=config_parser.getint(
+                    "circleci_scraper", "download_workers", fallback=DEFAULT_DOWNLOAD_WORKERS
+                ),
+                state_dir=config_parser.get(
+                    "circleci_scraper", "state_dir", fallback=DEFAULT_STATE_DIR
+                ),
+                requests_per_second=config_parser.getfloat(
+                    "circleci_scraper", "requests_per_second", fallback=None
+                ),
+                metrics_dir=config_parser.get("circleci_scraper", "metrics_dir", fallback=None),
             )
-        except (NoSectionError, NoOptionError, json.JSONDecodeError, ValidationError) as error:
+        except (
+            NoSectionError,
+            NoOptionError,
+            json.JSONDecodeError,
+            ValidationError,
+            ValueError,
+        ) as error:
             error_mapping: dict[type, str] = {
                 NoSectionError: "The 'circleci_scraper' section is missing",
                 NoOptionError: "Missing config option in 'circleci_scraper' section",
                 json.JSONDecodeError: "Invalid JSON format in 'circleci_scraper.pipelines' section",
                 ValidationError: "Unexpected value or schema in 'circleci_scraper' section",
+                ValueError: "Invalid numeric value in 'circleci_scraper' section",
             }
             error_msg = error_mapping[type(error)]
             self.logger.error(error_msg, exc_info=error)
@@ -0,0 +1,144 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""ExportIndex and related objects"""
+
+import logging
+from pathlib import Path
+
+from scripts.common.atomic_write import TEMP_FILE_SUFFIX
+
+# Written to a job's artifact directory once all of its artifacts have been downloaded
+ARTIFACTS_COMPLETE_MARKER = ".complete"
+
+
+class ExportIndex:
+    """In-memory index of the jobs already exported to the test result directory.
+
+    The index is built with a single scan of the directory tree, so already exported jobs can be
+    skipped before their test metadata and artifacts are requested from the API.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self) -> None:
+        """Initialize an empty ExportIndex."""
+        self._metadata: dict[tuple[str, str, str], set[int]] = {}
+        self._artifacts: dict[tuple[str, str, str], set[int]] = {}
+
+    @classmethod
+    def scan(
+        cls, test_result_dir: Path, test_metadata_dir: str, test_artifact_dir: str
+    ) -> "ExportIndex":
+        """Build an ExportIndex from the files in the test result directory.
+
+        The expected structure is
+        '<test_result_dir>/<repository>/<workflow>/<job>/<test_metadata_dir>/<job_number>.json'
+        for test metadata and
+        '<test_result_dir>/<repository>/<workflow>/<job>/<test_artifact_dir>/<job_number>/' for
+        artifacts, which count as exported once they contain the completion marker. Temporary
+        files left by an interrupted run are removed.
+
+        Args:
+            test_result_dir (Path): The test result directory.
+            test_metadata_dir (str): The name of the test metadata directories.
+            test_artifact_dir (str): The name of the test artifact directories.
+
+        Returns:
+            ExportIndex: The index of the exported jobs.
+        """
+        index = cls()
+        temp_file_paths: list[Path] = []
+        for job_path in test_result_dir.glob("*/*/*"):
+            repository, workflow_name, job_name = job_path.relative_to(test_result_dir).parts
+            key = (repository, workflow_name, job_name)
+            metadata_path = job_path / test_metadata_dir
+            if metadata_path.is_dir():
+                metadata_file_paths = list(metadata_path.iterdir())
+                index._metadata[key] = {
+                    int(path.stem)
+                    for path in metadata_file_paths
+                    if path.suffix == ".json" and path.stem.isdigit()
+                }
+                temp_file_paths += [
+                    path for path in metadata_file_paths if path.suffix == TEMP_FILE_SUFFIX
+                ]
+            artifact_path = job_path / test_artifact_dir
+            if artifact_path.is_dir():
+                index._artifacts[key] = set()
+                for path in artifact_path.iterdir():
+                    if not path.name.isdigit():
+                        continue
+                    if (path / ARTIFACTS_COMPLETE_MARKER).exists():
+                        index._artifacts[key].add(int(path.name))
+                    else:
+                        # Only the artifacts of incomplete jobs can have been interrupted
+                        temp_file_paths += path.glob(f"*{TEMP_FILE_SUFFIX}")
+        for temp_file_path in temp_file_paths:
+            temp_file_path.unlink(missing_ok=True)
+        if temp_file_paths:
+            index.logger.info(f"Removed {len(temp_file_paths)} files of interrupted writes")
+        index.logger.info(
+            f"Found {sum(len(jobs) for jobs in index._metadata.values())} exported test metadata "
+            f"and {sum(len(jobs) for jobs in index._artifacts.values())} exported artifact jobs"
+        )
+        return index
+
+    def has_metadata(
+        self, repository: str, workflow_name: str, job_name: str, job_number: int
+    ) -> bool:
+        """Check whether the test metadata of a job has been exported.
+
+        Args:
+            repository (str): The repository name.
+            workflow_name (str): The workflow name.
+            job_name (str): The job name.
+            job_number (int): The job number.
+
+        Returns:
+            bool: True if the test metadata has been exported.
+        """
+        return job_number in self._metadata.get((repository, workflow_name, job_name), set())
+
+    def has_artifacts(
+        self, repository: str, workflow_name: str, job_name: str, job_number: int
+    ) -> bool:
+        """Check whether all artifacts of a job have been exported.
+
+        Args:
+            repository (str): The repository name.
+            workflow_name (str): The workflow name.
+            job_name (str): The job name.
+            job_number (int): The job number.
+
+        Returns:
+            bool: True if all artifacts have been exported.
+        """
+        return job_number in self._artifacts.get((repository, workflow_name, job_name), set())
+
+    def add_metadata(
+        self, repository: str, workflow_name: str, job_name: str, job_number: int
+    ) -> None:
+        """Record that the test metadata of a job has been exported.
+
+        Args:
+            repository (str): The repository name.
+            workflow_name (str): The workflow name.
+            job_name (str): The job name.
+            job_number (int): The job number.
+        """
+        self._metadata.setdefault((repository, workflow_name, job_name), set()).add(job_number)
+
+    def add_artifacts(
+        self, repository: str, workflow_name: str, job_name: str, job_number: int
+    ) -> None:
+        """Record that all artifacts of a job have been exported.
+
+        Args:
+            repository (str): The repository name.
+            workflow_name (str): The workflow name.
+            job_name (str): The job name.
+            job_number (int): The job number.
+        """
+        self._artifacts.setdefault((repository, workflow_name, job_name), set()).add(job_number)
@@ -0,0 +1,311 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""ScrapeJournal and related objects"""
+
+import logging
+from pathlib import Path
+from typing import Iterator, Literal
+
+from pydantic import BaseModel, ValidationError
+
+from scripts.circleci_scraper.client import Pipeline
+from scripts.common.atomic_write import atomic_write
+from scripts.common.error import BaseError
+
+
+class ProcessedPipeline(BaseModel):
+    """A pipeline whose configured workflows have been exported for a repository."""
+
+    id: str
+    number: int
+    created_at: str | None = None
+    branch: str | None = None
+    # Whether all workflows had finished and all artifacts were downloaded
+    complete: bool
+
+    @classmethod
+    def from_pipeline(cls, pipeline: Pipeline, complete: bool) -> "ProcessedPipeline":
+        """Build a ProcessedPipeline from a pipeline of the API.
+
+        Args:
+            pipeline (Pipeline): The pipeline.
+            complete (bool): Whether the pipeline is fully processed.
+
+        Returns:
+            ProcessedPipeline: The processed pipeline.
+        """
+        return cls(
+            id=pipeline.id,
+            number=pipeline.number,
+            created_at=pipeline.created_at,
+            branch=pipeline.vcs.branch if pipeline.vcs else None,
+            complete=complete,
+        )
+
+
+class RepositoryProgress(BaseModel):
+    """The progress of a scrape for a repository."""
+
+    pipelines: list[ProcessedPipeline] = []
+    # Whether the scrape reached the date limit or watermark of the repository
+    finished: bool = False
+
+
+class OrganizationProgress(BaseModel):
+    """The progress of a scrape through the pipeline listing of an organization.
+
+    'page_token' is the token of the first page of the listing with pipelines that are not yet
+    processed, None for the first page.
+    """
+
+    page_token: str | None = None
+    repositories: dict[str, RepositoryProgress] = {}
+
+    def repository(self, repository: str) -> RepositoryProgress:
+        """Get the progress of a repository, adding it if missing.
+
+        Args:
+            repository (str): The repository name.
+
+        Returns:
+            RepositoryProgress: The progress of the repository.
+        """
+        return self.repositories.setdefault(repository, RepositoryProgress())
+
+
+class JournalRecord(BaseModel):
+    """A change to the progress of an organization, one line of the journal file."""
+
+    event: Literal["start", "pipeline", "finish_repository", "page_token", "finish"]
+    organization: str
+    repository: str | None = None
+    pipeline: ProcessedPipeline | None = None
+    page_token: str | None = None
+
+
+class ScrapeJournalError(BaseError):
+    """Custom exception class for ScrapeJournal errors."""
+
+    pass
+
+
+class ScrapeJournal:
+    """Persist the progress of the scrape of each organization, so an interrupted run resumes.
+
+    The journal is a JSON lines file to which a record is appended for every processed pipeline
+    and every page of a pipeline listing, so each write is independent of the progress so far.
+    It is compacted to the progress of the organizations still being scraped when the scrape of
+    an organization starts or completes. A resumed run starts at the recorded page and skips the
+    processed pipelines, whose completeness is kept to advance the watermarks.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, path: Path) -> None:
+        """Initialize the ScrapeJournal, loading the progress of a previous run from the path.
+
+        Args:
+            path (Path): The path of the JSON lines file holding the journal.
+
+        Raises:
+            ScrapeJournalError: If the journal file cannot be read or has an unexpected format.
+        """
+        self._path = path
+        self._organizations: dict[str, OrganizationProgress] = self._load()
+
+    def _load(self) -> dict[str, OrganizationProgress]:
+        organizations: dict[str, OrganizationProgress] = {}
+        if not self._path.exists():
+            return organizations
+        try:
+            content = self._path.read_text()
+            lines = content.splitlines()
+            for number, line in enumerate(lines, start=1):
+                try:
+                    record = JournalRecord.model_validate_json(line)
+                except ValidationError:
+                    if number == len(lines) and not content.endswith("\n"):
+                        # The run was killed while appending the record
+                        self.logger.warning(f"Ignoring the incomplete last record of {self._path}")
+                        break
+                    raise
+                self._apply(organizations, record)
+        except (OSError, KeyError, ValueError) as error:
+            error_msg = f"Unable to load the scrape journal from {self._path}"
+            self.logger.error(error_msg, exc_info=error)
+            raise ScrapeJournalError(error_msg, error)
+        return organizations
+
+    @staticmethod
+    def _apply(organizations: dict[str, OrganizationProgress], record: JournalRecord) -> None:
+        # Records of an organization follow its "start" record, otherwise a KeyError is raised
+        if record.event == "start":
+            organizations[record.organization] = OrganizationProgress()
+        elif record.event == "finish":
+            organizations.pop(record.organization)
+        elif record.event == "page_token":
+            organizations[record.organization].page_token = record.page_token
+        elif record.repository is None:
+            raise ValueError(f"Record '{record.event}' of {record.organization} has no repository")
+        elif record.event == "finish_repository":
+            organizations[record.organization].repository(record.repository).finished = True
+        elif record.pipeline is not None:
+            repository = organizations[record.organization].repository(record.repository)
+            repository.pipelines.append(record.pipeline)
+        else:
+            raise ValueError(f"Record '{record.event}' of {record.organization} has no pipeline")
+
+    def start(self, organization: str, resume: bool) -> OrganizationProgress:
+        """Start the scrape of an organization.
+
+        Args:
+            organization (str): The organization name.
+            resume (bool): Continue from the progress of an interrupted run, if any, rather
+                           than discarding it.
+
+        Returns:
+            OrganizationProgress: The progress to continue from, empty unless resuming.
+
+        Raises:
+            ScrapeJournalError: If the journal file cannot be written.
+        """
+        progress = self._organizations.get(organization)
+        if progress and resume:
+            pipelines = sum(
+                len(repository_progress.pipelines)
+                for repository_progress in progress.repositories.values()
+            )
+            self.logger.info(
+                f"Resuming the scrape of {organization} after {pipelines} processed pipelines"
+            )
+        else:
+            if progress:
+                self.logger.info(
+                    f"Discarding the progress of an interrupted scrape of {organization}"
+                )
+            elif resume:
+                self.logger.info(f"No interrupted scrape of {organization} to resume")
+            progress = self._organizations[organization] = OrganizationProgress()
+        self.compact()
+        return progress
+
+    def record_pipeline(
+        self, organization: str, repository: str, pipeline: ProcessedPipeline
+    ) -> None:
+        """Record a processed pipeline of a repository.
+
+        Args:
+            organization (str): The organization name.
+            repository (str): The repository name.
+            pipeline (ProcessedPipeline): The processed pipeline.
+
+        Raises:
+            ScrapeJournalError: If the journal file cannot be written.
+        """
+        self._organizations[organization].repository(repository).pipelines.append(pipeline)
+        self._append(
+            JournalRecord(
+                event="pipeline",
+                organization=organization,
+                repository=repository,
+                pipeline=pipeline,
+            )
+        )
+
+    def finish_repository(self, organization: str, repository: str) -> None:
+        """Record that the scrape of a repository reached its date limit or watermark.
+
+        Args:
+            organization (str): The organization name.
+            repository (str): The repository name.
+
+        Raises:
+            ScrapeJournalError: If the journal file cannot be written.
+        """
+        progress = self._organizations[organization].repository(repository)
+        if not progress.finished:
+            progress.finished = True
+            self._append(
+                JournalRecord(
+                    event="finish_repository", organization=organization, repository=repository
+                )
+            )
+
+    def set_page_token(self, organization: str, page_token: str | None) -> None:
+        """Record the first page of the pipeline listing with pipelines not yet processed.
+
+        Args:
+            organization (str): The organization name.
+            page_token (str | None): The page token, None for the first page.
+
+        Raises:
+            ScrapeJournalError: If the journal file cannot be written.
+        """
+        progress = self._organizations[organization]
+        if progress.page_token != page_token:
+            progress.page_token = page_token
+            self._append(
+                JournalRecord(event="page_token", organization=organization, page_token=page_token)
+            )
+
+    def finish(self, organization: str) -> None:
+        """Remove the progress of an organization whose scrape is complete.
+
+        Args:
+            organization (str): The organization name.
+
+        Raises:
+            ScrapeJournalError: If the journal file cannot be written.
+        """
+        self._organizations.pop(organization, None)
+        self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the journal with only the records of the current progress, atomically.
+
+        Raises:
+            ScrapeJournalError: If the journal file cannot be written.
+        """
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with atomic_write(self._path, "w") as file:
+                for organization, progress in sorted(self._organizations.items()):
+                    for record in self._progress_records(organization, progress):
+                        file.write(record.model_dump_json() + "\n")
+        except OSError as error:
+            error_msg = f"Unable to save the scrape journal to {self._path}"
+            self.logger.error(error_msg, exc_info=error)
+            raise ScrapeJournalError(error_msg, error)
+
+    @staticmethod
+    def _progress_records(
+        organization: str, progress: OrganizationProgress
+    ) -> Iterator[JournalRecord]:
+        yield JournalRecord(event="start", organization=organization)
+        if progress.page_token is not None:
+            yield JournalRecord(
+                event="page_token", organization=organization, page_token=progress.page_token
+            )
+        for repository, repository_progress in sorted(progress.repositories.items()):
+            for pipeline in repository_progress.pipelines:
+                yield JournalRecord(
+                    event="pipeline",
+                    organization=organization,
+                    repository=repository,
+                    pipeline=pipeline,
+                )
+            if repository_progress.finished:
+                yield JournalRecord(
+                    event="finish_repository", organization=organization, repository=repository
+                )
+
+    def _append(self, record: JournalRecord) -> None:
+        try:
+            with self._path.open("a") as file:
+                file.write(record.model_dump_json() + "\n")
+        except OSError as error:
+            error_msg = f"Unable to save the scrape journal to {self._path}"
+            self.logger.error(error_msg, exc_info=error)
+            raise ScrapeJournalError(error_msg, error)
@@ -6,48 +6,252 @@
 
 import argparse
 import logging
+import time
+from contextlib import nullcontext
+from datetime import timedelta
+from pathlib import Path
 
-from client import CircleCIClient, CircleCIClientError
-from config import Config, InvalidConfigError
-from scraper import CircleCIScraper, CircleCIScraperError
+from scripts.circleci_scraper.async_client import AsyncCircleCIClient
+from scripts.circleci_scraper.async_scraper import AsyncCircleCIScraper
+from scripts.circleci_scraper.cassette import Cassette, CassetteError
+from scripts.circleci_scraper.client import CircleCIClient, CircleCIClientError
+from scripts.circleci_scraper.config import Config, InvalidConfigError
+from scripts.circleci_scraper.journal import ScrapeJournal, ScrapeJournalError
+from scripts.circleci_scraper.metrics import ScraperMetrics
+from scripts.circleci_scraper.response_cache import ResponseCache, ResponseCacheError
+from scripts.circleci_scraper.scraper import CircleCIScraper, CircleCIScraperError
+from scripts.circleci_scraper.watermark import WatermarkStore, WatermarkStoreError
+from scripts.common.profiler import StageProfiler
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 
-def main(config_file: str = "config.ini") -> None:
+WATERMARK_FILE_NAME = "watermarks.json"
+RESPONSE_CACHE_FILE_NAME = "responses.sqlite"
+JOURNAL_FILE_NAME = "journal.jsonl"
+METRICS_FILE_NAME = "metrics.json"
+# The node exporter's textfile collector only reads files ending in '.prom'
+METRICS_TEXTFILE_NAME = "circleci_scraper.prom"
+
+
+def main(
+    config_file: str = "config.ini",
+    use_async: bool = False,
+    full: bool = False,
+    record: str | None = None,
+    replay: str | None = None,
+    replay_latency: float = 0.0,
+    profile: bool = False,
+    profile_dir: str | None = None,
+    resume: bool = False,
+) -> None:
     """Run the CircleCI scraper.
 
     Args:
         config_file (str): Path to the configuration file. Defaults to 'config.ini'.
+        use_async (bool): Fan out API requests concurrently, bounded by the 'concurrency' config
+                          option. Defaults to False.
+        full (bool): Ignore the watermarks of previous runs and scrape back to the date limit.
+                     Defaults to False.
+        record (str | None): Path of a cassette to record every response to. Defaults to None.
+        replay (str | None): Path of a cassette to replay the responses from, instead of
+                             contacting CircleCI. Defaults to None.
+        replay_latency (float): Simulated latency in seconds of replayed responses.
+                                Defaults to 0.
+        profile (bool): Time the stages of the run and print them ranked by self time.
+                        Defaults to False.
+        profile_dir (str | None): Directory to write the cProfile statistics and tracemalloc
+                                  snapshots of each stage to, which implies 'profile'.
+                                  Defaults to None.
+        resume (bool): Continue from the journal of an interrupted run. Defaults to False.
     """
-    try:
-        config = Config(config_file)
-        date_limit = config.circleci_scraper_config.date_limit
-        logger.info(
-            f"Scraping data from {date_limit.strftime('%Y-%m-%d %H:%M:%S')} to now."
-            if date_limit
-            else "Scraping all available data."
-        )
-        client = CircleCIClient(config.circleci_scraper_config)
-        scraper = CircleCIScraper(config.common_config, client)
-        scraper.export_test_metadata_and_artifacts(
-            config.circleci_scraper_config.pipelines, config.circleci_scraper_config.date_limit
-        )
-        logger.info("Scraping complete")
-    except InvalidConfigError as error:
-        logger.error(f"Configuration error: {error}")
-    except CircleCIClientError as error:
-        logger.error(f"CircleCI Client error: {error}")
-    except CircleCIScraperError as error:
-        logger.error(f"CircleCI Scraper error: {error}")
-    except Exception as error:
-        logger.error(f"Unexpected error: {error}", exc_info=error)
+    profiler = (
+        StageProfiler(Path(profile_dir) if profile_dir else None)
+        if profile or profile_dir
+        else None
+    )
+    with profiler or nullcontext():
+        try:
+            config = Config(config_file)
+            cassette: Cassette | None = None
+            if record:
+                cassette = Cassette(Path(record), "record")
+            elif replay:
+                cassette = Cassette(Path(replay), "replay", replay_latency)
+            date_limit = config.circleci_scraper_config.date_limit
+            days_of_data = config.circleci_scraper_config.days_of_data
+            if cassette and cassette.recorded_at and not cassette.recording and days_of_data:
+                # Replays stop at the same pipeline as the recording, however long ago it was made
+                date_limit = cassette.recorded_at - timedelta(days=float(days_of_data))
+            logger.info(
+                f"Scraping data from {date_limit.strftime('%Y-%m-%d %H:%M:%S')} to now."
+                if date_limit
+                else "Scraping all available data."
+            )
+            # With a cassette every request is recorded or replayed, so neither the watermarks nor
+            # the response cache of previous runs are used
+            watermark_store = (
+                None
+                if cassette
+                else WatermarkStore(
+                    Path(config.circleci_scraper_config.state_dir, WATERMARK_FILE_NAME)
+                )
+            )
+            response_cache = (
+                None
+                if cassette
+                else ResponseCache(
+                    Path(config.circleci_scraper_config.state_dir, RESPONSE_CACHE_FILE_NAME)
+                )
+            )
+            journal = (
+                None
+                if cassette
+                else ScrapeJournal(
+                    Path(config.circleci_scraper_config.state_dir, JOURNAL_FILE_NAME)
+                )
+            )
+            if resume and cassette:
+                logger.warning("Runs with a cassette have no journal, ignoring --resume")
+            metrics = ScraperMetrics()
+            start = time.perf_counter()
+            success = False
+            try:
+                if use_async:
+                    async_client = AsyncCircleCIClient(
+                        config.circleci_scraper_config, response_cache, cassette, metrics
+                    )
+                    async_scraper = AsyncCircleCIScraper(
+                        config.common_config,
+                        async_client,
+                        config.circleci_scraper_config.max_artifact_size,
+                        watermark_store,
+                        journal,
+                    )
+                    try:
+                        async_scraper.export_test_metadata_and_artifacts(
+                            config.circleci_scraper_config.pipelines, date_limit, full, resume
+                        )
+                    finally:
+                        async_client.close()
+                else:
+                    client = CircleCIClient(
+                        config.circleci_scraper_config, response_cache, cassette, metrics
+                    )
+                    scraper = CircleCIScraper(
+                        config.common_config,
+                        client,
+                        config.circleci_scraper_config.max_artifact_size,
+                        config.circleci_scraper_config.download_workers,
+                        watermark_store,
+                        journal,
+                    )
+                    scraper.export_test_metadata_and_artifacts(
+                        config.circleci_scraper_config.pipelines, date_limit, full, resume
+                    )
+                success = True
+            finally:
+                if response_cache:
+                    response_cache.close()
+                if cassette:
+                    cassette.log_statistics()
+                    cassette.close()
+                # Failed runs are reported too, so slow or failing scrapes can be alerted on
+                metrics.set("run_duration_seconds", time.perf_counter() - start)
+                metrics.set("run_success", int(success))
+                metrics.set("last_run_timestamp_seconds", time.time())
+                metrics.log_summary()
+                metrics_dir = Path(
+                    config.circleci_scraper_config.metrics_dir
+                    or config.circleci_scraper_config.state_dir
+                )
+                try:
+                    metrics.write(
+                        metrics_dir / METRICS_FILE_NAME, metrics_dir / METRICS_TEXTFILE_NAME
+                    )
+                except OSError as error:
+                    # Not raised, it would replace the error of a failed run
+                    logger.error(f"Unable to write the metrics to {metrics_dir}", exc_info=error)
+            logger.info("Scraping complete")
+        except InvalidConfigError as error:
+            logger.error(f"Configuration error: {error}")
+        except CircleCIClientError as error:
+            logger.error(f"CircleCI Client error: {error}")
+        except CircleCIScraperError as error:
+            logger.error(f"CircleCI Scraper error: {error}")
+        except WatermarkStoreError as error:
+            logger.error(f"Watermark error: {error}")
+        except ResponseCacheError as error:
+            logger.error(f"Response cache error: {error}")
+        except CassetteError as error:
+            logger.error(f"Cassette error: {error}")
+        except ScrapeJournalError as error:
+            logger.error(f"Scrape journal error: {error}")
+        except Exception as error:
+            logger.error(f"Unexpected error: {error}", exc_info=error)
+
+    if profiler:
+        print(profiler.summary())
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run the CircleCI Scraper")
     parser.add_argument("--config", help="Path to the config.ini file", default="config.ini")
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Issue API requests concurrently, bounded by the 'concurrency' config option",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the watermarks of previous runs and scrape back to the date limit",
+    )
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument(
+        "--record",
+        metavar="CASSETTE",
+        help="Record every response, including artifacts, to a cassette file",
+    )
+    cassette_group.add_argument(
+        "--replay",
+        metavar="CASSETTE",
+        help="Replay the responses recorded in a cassette file instead of contacting CircleCI",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=0.0,
+        metavar="SECONDS",
+        help="Simulated latency of each replayed response",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time the stages of the run and print them ranked by self time",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        metavar="DIR",
+        help="Also write cProfile statistics and tracemalloc snapshots of each stage to DIR",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run from the scrape journal in the 'state_dir'",
+    )
     args = parser.parse_args()
-    main(args.config)
+    main(
+        args.config,
+        args.use_async,
+        args.full,
+        args.record,
+        args.replay,
+        args.replay_latency,
+        args.profile,
+        args.profile_dir,
+        args.resume,
+    )
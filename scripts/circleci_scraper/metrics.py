@@ -0,0 +1,325 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""ScraperMetrics and related objects"""
+
+import bisect
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Literal
+
+from pydantic import BaseModel
+
+from scripts.common.atomic_write import atomic_write
+
+METRIC_PREFIX = "circleci_scraper_"
+# Upper bounds in seconds, from a fast API page to a slow job export
+DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+LabelSet = tuple[tuple[str, str], ...]
+
+
+class MetricDefinition(BaseModel):
+    """The type and description of a metric."""
+
+    type: Literal["counter", "gauge", "histogram"]
+    help: str
+
+
+METRICS: dict[str, MetricDefinition] = {
+    "requests_total": MetricDefinition(
+        type="counter", help="HTTP requests by endpoint and response status."
+    ),
+    "request_duration_seconds": MetricDefinition(
+        type="histogram", help="Time until the response of an HTTP request, by endpoint."
+    ),
+    "response_bytes_total": MetricDefinition(
+        type="counter", help="Bytes of response bodies received, by endpoint."
+    ),
+    "pages_total": MetricDefinition(
+        type="counter", help="Pages of API listings read, including cached ones, by entity."
+    ),
+    "response_cache_lookups_total": MetricDefinition(
+        type="counter", help="Response cache lookups by result."
+    ),
+    "jobs_skipped_total": MetricDefinition(
+        type="counter", help="Jobs skipped because they were already exported, by kind."
+    ),
+    "jobs_exported_total": MetricDefinition(
+        type="counter", help="Test metadata files written, by repository."
+    ),
+    "artifacts_total": MetricDefinition(
+        type="counter",
+        help="Artifact downloads by repository and result: downloaded, failed or skipped.",
+    ),
+    "artifact_bytes_total": MetricDefinition(
+        type="counter", help="Bytes of artifacts downloaded, by repository."
+    ),
+    "job_export_duration_seconds": MetricDefinition(
+        type="histogram", help="Time to export the test metadata or the artifacts of a job."
+    ),
+    "workflow_export_duration_seconds": MetricDefinition(
+        type="histogram", help="Time to export the jobs of a workflow."
+    ),
+    "repository_export_seconds_total": MetricDefinition(
+        type="counter", help="Time spent exporting the pipelines of a repository."
+    ),
+    "run_duration_seconds": MetricDefinition(type="gauge", help="Duration of the last scrape."),
+    "run_success": MetricDefinition(
+        type="gauge", help="Whether the last scrape completed without error."
+    ),
+    "last_run_timestamp_seconds": MetricDefinition(
+        type="gauge", help="Unix time at which the last scrape ended."
+    ),
+}
+
+
+class MetricSample(BaseModel):
+    """The value of a counter or gauge for a set of labels."""
+
+    labels: dict[str, str]
+    value: float
+
+
+class HistogramSample(BaseModel):
+    """The observations of a histogram for a set of labels.
+
+    'buckets' holds the cumulative number of observations at or below each upper bound.
+    """
+
+    labels: dict[str, str]
+    count: int
+    sum: float
+    buckets: dict[str, int]
+
+
+class MetricsSnapshot(BaseModel):
+    """All metrics of a run, keyed by metric name without the prefix."""
+
+    counters: dict[str, list[MetricSample]] = {}
+    gauges: dict[str, list[MetricSample]] = {}
+    histograms: dict[str, list[HistogramSample]] = {}
+
+
+class ScraperMetrics:
+    """Counters, gauges and latency histograms collected during a scrape.
+
+    Metrics are identified by a name from METRICS and a set of labels. Recording is thread
+    safe, so a single instance is shared by the threads of a CircleCIClient and the scraper. At
+    the end of a run the metrics are written as JSON and in the Prometheus text format, for the
+    textfile collector of the node exporter.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self) -> None:
+        """Initialize the ScraperMetrics with no recorded values."""
+        self._lock = threading.Lock()
+        self._values: dict[str, dict[LabelSet, float]] = {}
+        # Per bucket, not cumulative, counts; the last one is for observations above all bounds
+        self._buckets: dict[str, dict[LabelSet, list[int]]] = {}
+        self._sums: dict[str, dict[LabelSet, float]] = {}
+
+    @staticmethod
+    def _label_set(name: str, labels: dict[str, str]) -> LabelSet:
+        if name not in METRICS:
+            raise KeyError(f"Unknown metric '{name}'")
+        return tuple(sorted(labels.items()))
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        """Add to a counter.
+
+        Args:
+            name (str): The metric name.
+            value (float): The amount to add. Defaults to 1.
+            **labels (str): The labels of the counter.
+        """
+        label_set = self._label_set(name, labels)
+        with self._lock:
+            values = self._values.setdefault(name, {})
+            values[label_set] = values.get(label_set, 0) + value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        """Set a gauge.
+
+        Args:
+            name (str): The metric name.
+            value (float): The value of the gauge.
+            **labels (str): The labels of the gauge.
+        """
+        label_set = self._label_set(name, labels)
+        with self._lock:
+            self._values.setdefault(name, {})[label_set] = value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Record an observation in a histogram.
+
+        Args:
+            name (str): The metric name.
+            value (float): The observed value, in seconds for durations.
+            **labels (str): The labels of the histogram.
+        """
+        label_set = self._label_set(name, labels)
+        bucket = bisect.bisect_left(DURATION_BUCKETS, value)
+        with self._lock:
+            buckets = self._buckets.setdefault(name, {}).setdefault(
+                label_set, [0] * (len(DURATION_BUCKETS) + 1)
+            )
+            buckets[bucket] += 1
+            sums = self._sums.setdefault(name, {})
+            sums[label_set] = sums.get(label_set, 0.0) + value
+
+    @contextmanager
+    def time(self, name: str, **labels: str) -> Iterator[None]:
+        """Observe the wall time of a block in a histogram, also if it raises.
+
+        Args:
+            name (str): The metric name.
+            **labels (str): The labels of the histogram.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> MetricsSnapshot:
+        """Copy the recorded metrics.
+
+        Returns:
+            MetricsSnapshot: The metrics, with the samples of each metric sorted by labels.
+        """
+        snapshot = MetricsSnapshot()
+        with self._lock:
+            for name, values in sorted(self._values.items()):
+                samples = [
+                    MetricSample(labels=dict(label_set), value=value)
+                    for label_set, value in sorted(values.items())
+                ]
+                if METRICS[name].type == "counter":
+                    snapshot.counters[name] = samples
+                else:
+                    snapshot.gauges[name] = samples
+            for name, label_buckets in sorted(self._buckets.items()):
+                snapshot.histograms[name] = []
+                for label_set, buckets in sorted(label_buckets.items()):
+                    cumulative: dict[str, int] = {}
+                    count = 0
+                    for bound, bucket_count in zip([*DURATION_BUCKETS, math.inf], buckets):
+                        count += bucket_count
+                        cumulative[self._format_value(bound)] = count
+                    snapshot.histograms[name].append(
+                        HistogramSample(
+                            labels=dict(label_set),
+                            count=count,
+                            sum=self._sums[name][label_set],
+                            buckets=cumulative,
+                        )
+                    )
+        return snapshot
+
+    @staticmethod
+    def _format_value(value: float) -> str:
+        if math.isinf(value):
+            return "+Inf"
+        return str(int(value)) if value == int(value) else repr(value)
+
+    @staticmethod
+    def _format_labels(labels: dict[str, str]) -> str:
+        if not labels:
+            return ""
+        escaped = (
+            (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for name, value in labels.items()
+        )
+        return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+    def to_prometheus(self) -> str:
+        """Format the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics, one HELP and TYPE header per metric followed by its samples.
+        """
+        snapshot = self.snapshot()
+        lines: list[str] = []
+        for name, samples in sorted({**snapshot.counters, **snapshot.gauges}.items()):
+            metric = METRIC_PREFIX + name
+            lines += [
+                f"# HELP {metric} {METRICS[name].help}",
+                f"# TYPE {metric} {METRICS[name].type}",
+            ]
+            lines += [
+                f"{metric}{self._format_labels(sample.labels)} {self._format_value(sample.value)}"
+                for sample in samples
+            ]
+        for name, histogram_samples in snapshot.histograms.items():
+            metric = METRIC_PREFIX + name
+            lines += [f"# HELP {metric} {METRICS[name].help}", f"# TYPE {metric} histogram"]
+            for histogram_sample in histogram_samples:
+                for bound, count in histogram_sample.buckets.items():
+                    labels = self._format_labels({**histogram_sample.labels, "le": bound})
+                    lines.append(f"{metric}_bucket{labels} {count}")
+                labels = self._format_labels(histogram_sample.labels)
+                lines.append(f"{metric}_sum{labels} {self._format_value(histogram_sample.sum)}")
+                lines.append(f"{metric}_count{labels} {histogram_sample.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, json_path: Path, textfile_path: Path) -> None:
+        """Write the metrics as JSON and as a Prometheus textfile, replacing previous files.
+
+        The files are replaced atomically, so the textfile collector never reads a partial file.
+
+        Args:
+            json_path (Path): The path of the JSON file.
+            textfile_path (Path): The path of the Prometheus textfile, which the textfile
+                                  collector requires to end in '.prom'.
+
+        Raises:
+            OSError: If a file cannot be written.
+        """
+        for path, content in [
+            (json_path, self.snapshot().model_dump_json(indent=2)),
+            (textfile_path, self.to_prometheus()),
+        ]:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with atomic_write(path, "w") as file:
+                file.write(content)
+        self.logger.info(f"Metrics written to {json_path} and {textfile_path}")
+
+    def log_summary(self) -> None:
+        """Log the requests, time and bytes of each endpoint, the slowest endpoint first.
+
+        The response cache hits and misses are logged too, if the cache was looked up.
+        """
+        snapshot = self.snapshot()
+        requests: dict[str, float] = {}
+        for sample in snapshot.counters.get("requests_total", []):
+            endpoint = sample.labels["endpoint"]
+            requests[endpoint] = requests.get(endpoint, 0) + sample.value
+        received = {
+            sample.labels["endpoint"]: sample.value
+            for sample in snapshot.counters.get("response_bytes_total", [])
+        }
+        durations = {
+            sample.labels["endpoint"]: sample.sum
+            for sample in snapshot.histograms.get("request_duration_seconds", [])
+        }
+        for endpoint, duration in sorted(durations.items(), key=lambda item: -item[1]):
+            self.logger.info(
+                f"Endpoint {endpoint}: {requests.get(endpoint, 0):.0f} requests in "
+                f"{duration:.1f}s, {received.get(endpoint, 0):.0f} bytes"
+            )
+        lookups = {
+            sample.labels["result"]: sample.value
+            for sample in snapshot.counters.get("response_cache_lookups_total", [])
+        }
+        if lookups:
+            self.logger.info(
+                f"Response cache: {lookups.get('hit', 0):.0f} hits, "
+                f"{lookups.get('miss', 0):.0f} misses"
+            )
@@ -0,0 +1,121 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""RateLimiter and related objects"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Mapping
+
+# X-RateLimit-Reset values above this are absolute epoch timestamps rather than a delay
+EPOCH_THRESHOLD = 1_000_000_000
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> float | None:
+    """Parse the delay requested by a 'Retry-After' header.
+
+    Args:
+        headers (Mapping[str, str]): The response headers.
+
+    Returns:
+        float | None: The delay in seconds, or None if the header is missing or invalid.
+    """
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def parse_rate_limit_reset(headers: Mapping[str, str]) -> float | None:
+    """Parse the delay until the rate limit window resets, if the limit is exhausted.
+
+    Args:
+        headers (Mapping[str, str]): The response headers.
+
+    Returns:
+        float | None: The delay in seconds, or None if requests remain or the headers are
+                      missing or invalid.
+    """
+    remaining = headers.get("X-RateLimit-Remaining")
+    reset = headers.get("X-RateLimit-Reset")
+    if remaining is None or reset is None:
+        return None
+    try:
+        if int(remaining) > 0:
+            return None
+        reset_value = float(reset)
+    except ValueError:
+        return None
+    if reset_value > EPOCH_THRESHOLD:
+        return max(reset_value - time.time(), 0.0)
+    return max(reset_value, 0.0)
+
+
+class RateLimiter:
+    """Schedule requests shared by several threads within a rate limit.
+
+    Requests are paced by a token bucket holding up to one second of requests. When the API
+    signals throttling, all threads pause until the requested cool-down has passed.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, requests_per_second: float | None = None) -> None:
+        """Initialize the RateLimiter.
+
+        Args:
+            requests_per_second (float | None): The sustained request rate. Defaults to None,
+                                                requests are only delayed by cool-downs.
+        """
+        self._interval = 1 / requests_per_second if requests_per_second else 0.0
+        self._burst = max(int(requests_per_second or 1), 1)
+        self._lock = threading.Lock()
+        # The theoretical arrival time of the next request, which advances by one interval per
+        # request and may run ahead of the clock by up to the burst size
+        self._next_request_at = 0.0
+        self._resume_at = 0.0
+
+    def acquire(self) -> None:
+        """Block until a request may be made."""
+        with self._lock:
+            now = time.monotonic()
+            next_request_at = max(self._next_request_at, now)
+            start = max(now, next_request_at - (self._burst - 1) * self._interval, self._resume_at)
+            self._next_request_at = max(next_request_at, start) + self._interval
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def cool_down(self, seconds: float) -> None:
+        """Pause all requests for the given time.
+
+        Args:
+            seconds (float): The time in seconds before requests may resume.
+        """
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """Cool down until the rate limit window resets if the response exhausted it.
+
+        Args:
+            headers (Mapping[str, str]): The response headers.
+        """
+        reset = parse_rate_limit_reset(headers)
+        if reset:
+            self.logger.warning(f"Rate limit exhausted, pausing requests for {reset:.1f}s")
+            self.cool_down(reset)
@@ -0,0 +1,101 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""ResponseCache and related objects"""
+
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+
+from scripts.common.error import BaseError
+
+
+class ResponseCacheError(BaseError):
+    """Custom exception class for ResponseCache errors."""
+
+    pass
+
+
+class ResponseCache:
+    """Permanent on-disk store for API responses that will not change anymore.
+
+    Responses are keyed by endpoint and stored as JSON in a SQLite database. The cache may be
+    shared by the threads of a CircleCIClient; access to the connection is serialized.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, path: Path) -> None:
+        """Initialize the ResponseCache, creating the database if it does not exist.
+
+        Args:
+            path (Path): The path of the SQLite database file.
+
+        Raises:
+            ResponseCacheError: If the database cannot be opened.
+        """
+        self._path = path
+        self._lock = threading.Lock()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses (endpoint TEXT PRIMARY KEY, body TEXT)"
+            )
+            self._connection.commit()
+        except (OSError, sqlite3.Error) as error:
+            error_msg = f"Unable to open the response cache at {path}"
+            self.logger.error(error_msg, exc_info=error)
+            raise ResponseCacheError(error_msg, error)
+
+    def get(self, endpoint: str) -> str | None:
+        """Get the cached response body of an endpoint.
+
+        Args:
+            endpoint (str): The API endpoint, including its query string.
+
+        Returns:
+            str | None: The cached JSON body, or None if the endpoint is not cached.
+
+        Raises:
+            ResponseCacheError: If the database cannot be read.
+        """
+        with self._lock:
+            try:
+                row = self._connection.execute(
+                    "SELECT body FROM responses WHERE endpoint = ?", (endpoint,)
+                ).fetchone()
+            except sqlite3.Error as error:
+                error_msg = f"Unable to read '{endpoint}' from the response cache"
+                self.logger.error(error_msg, exc_info=error)
+                raise ResponseCacheError(error_msg, error)
+            return None if row is None else str(row[0])
+
+    def put(self, endpoint: str, body: str) -> None:
+        """Store the response body of an endpoint.
+
+        Args:
+            endpoint (str): The API endpoint, including its query string.
+            body (str): The JSON body to store.
+
+        Raises:
+            ResponseCacheError: If the database cannot be written.
+        """
+        with self._lock:
+            try:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO responses (endpoint, body) VALUES (?, ?)",
+                    (endpoint, body),
+                )
+                self._connection.commit()
+            except sqlite3.Error as error:
+                error_msg = f"Unable to write '{endpoint}' to the response cache"
+                self.logger.error(error_msg, exc_info=error)
+                raise ResponseCacheError(error_msg, error)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
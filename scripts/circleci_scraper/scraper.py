@@ -6,15 +6,19 @@
 
 import json
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, ContextManager
 
-import requests
-from requests.exceptions import RequestException
+from pydantic import BaseModel
 
-from client import (
+from scripts.circleci_scraper.client import (
     CircleCIClient,
+    CircleCIClientError,
+    Pipeline,
+    TERMINAL_WORKFLOW_STATUSES,
     PipelineGroup,
     WorkflowGroup,
     JobGroup,
@@ -25,8 +29,20 @@ from client import (
     Workflow,
 )
 from scripts.circleci_scraper.config import CircleCIScraperPipelineConfig
+from scripts.circleci_scraper.export_index import ARTIFACTS_COMPLETE_MARKER, ExportIndex
+from scripts.circleci_scraper.journal import (
+    OrganizationProgress,
+    ProcessedPipeline,
+    ScrapeJournal,
+)
+from scripts.circleci_scraper.watermark import Watermark, WatermarkStore
+from scripts.common.atomic_write import atomic_write
 from scripts.common.config import CommonConfig
 from scripts.common.error import BaseError
+from scripts.common.profiler import stage
+
+ARTIFACT_DOWNLOAD_STAGE = "artifact download"
+DISK_WRITE_STAGE = "disk write"
 
 
 class CircleCIScraperError(BaseError):
@@ -35,28 +51,86 @@ class CircleCIScraperError(BaseError):
     pass
 
 
+class ArtifactTooLargeError(BaseError):
+    """Raised internally when an artifact exceeds the maximum download size."""
+
+    pass
+
+
+class ArtifactDownloadResult(BaseModel):
+    """The outcome of a single artifact download."""
+
+    file_name: str
+    url: str
+    size: int = 0
+    error: str | None = None
+    # Whether the artifact exceeded the maximum size and was not downloaded
+    skipped: bool = False
+
+    @property
+    def downloaded(self) -> bool:
+        """Whether the artifact was written to its destination file."""
+        return self.error is None and not self.skipped
+
+
+class ArtifactDownloadStatistics(BaseModel):
+    """Artifact download totals for a repository."""
+
+    files: int = 0
+    bytes: int = 0
+    failures: int = 0
+    skipped: int = 0
+    time: float = 0
+
+
 class CircleCIScraper:
     """Export CircleCI test metadata and artifacts."""
 
     logger = logging.getLogger(__name__)
 
-    def __init__(self, common_config: CommonConfig, client: CircleCIClient):
+    def __init__(
+        self,
+        common_config: CommonConfig,
+        client: CircleCIClient,
+        max_artifact_size: int | None = None,
+        download_workers: int = 1,
+        watermark_store: WatermarkStore | None = None,
+        journal: ScrapeJournal | None = None,
+    ):
         """Initialize the CircleCIScraper.
 
         Args:
             common_config (CommonConfig): Directory information to store test results.
             client (CircleCIClient): The CircleCI client to interact with the API.
-
+            max_artifact_size (int | None): The maximum size of an artifact in bytes. Larger
+                                            artifacts are skipped. Defaults to None, no limit.
+            download_workers (int): The number of artifacts of a job downloaded in parallel.
+                                    Defaults to 1.
+            watermark_store (WatermarkStore | None): Where the newest fully processed pipeline
+                                                     of each branch is kept, so later runs can
+                                                     stop paging there. Defaults to None.
+            journal (ScrapeJournal | None): Where the progress of the run is kept, so an
+                                            interrupted run can be resumed. Defaults to None.
         """
         self._client = client
+        self._max_artifact_size = max_artifact_size
+        self._download_workers = download_workers
+        self._watermark_store = watermark_store
+        self._journal = journal
+        self.download_statistics: dict[str, ArtifactDownloadStatistics] = {}
         self._test_result_dir = common_config.test_result_dir
         self._test_metadata_dir = common_config.test_metadata_dir
         self._test_artifact_dir = common_config.test_artifact_dir
+        self._export_index = ExportIndex()
+        self._metrics = client.metrics
+        self._download_executor: ThreadPoolExecutor | None = None
 
     def export_test_metadata_and_artifacts(
         self,
         pipeline_configs: list[CircleCIScraperPipelineConfig],
         date_limit: datetime | None = None,
+        full: bool = False,
+        resume: bool = False,
     ) -> None:
         """Export test metadata and artifacts for a list of pipelines.
 
@@ -64,56 +138,291 @@ class CircleCIScraper:
             pipeline_configs (list[CircleCIScraperPipelineConfig]): A list of pipeline
                                                                     configurations.
             date_limit (datetime | None): The date limit for fetching data. Defaults to None.
+            full (bool): Ignore the watermarks and page back to the date limit. Defaults to
+                         False.
+            resume (bool): Continue from the journal of an interrupted run. Defaults to False.
 
         Raises:
             CircleCIClientError: If there is an error in the CircleCI API request.
             CircleCIScraperError: If there is an error in downloading the artifacts.
+            WatermarkStoreError: If the watermarks cannot be saved.
+            ScrapeJournalError: If the journal cannot be saved.
         """
-        for pipeline_config in pipeline_configs:
-            self.logger.info(f"Scrape {pipeline_config.organization}/{pipeline_config.repository}")
-            self.export_test_metadata_and_artifacts_by_pipeline(pipeline_config, date_limit)
+        self.download_statistics = {}
+        self._export_index = self._scan_export_index()
+        try:
+            for organization, organization_configs in self._group_by_organization(
+                pipeline_configs
+            ).items():
+                repositories = ", ".join(config.repository for config in organization_configs)
+                self.logger.info(f"Scrape {organization}: {repositories}")
+                self.export_test_metadata_and_artifacts_by_organization(
+                    organization, organization_configs, date_limit, full, resume
+                )
+        finally:
+            self.close()
+        self.log_download_statistics()
+
+    def close(self) -> None:
+        """Wait for in-flight artifact downloads to complete and release the download threads.
+
+        This is done at the end of every export_test_metadata_and_artifacts run. A later
+        download starts a new pool.
+        """
+        if self._download_executor:
+            self._download_executor.shutdown(wait=True)
+            self._download_executor = None
+
+    def log_download_statistics(self) -> None:
+        """Log the artifact download totals of each repository."""
+        for repository, statistics in self.download_statistics.items():
+            self.logger.info(
+                f"Downloaded {statistics.files} artifacts ({statistics.bytes} bytes, "
+                f"{statistics.failures} failed, {statistics.skipped} skipped) for {repository} "
+                f"in {statistics.time:.1f}s"
+            )
+
+    def _download_statistics(self, repository: str) -> ArtifactDownloadStatistics:
+        return self.download_statistics.setdefault(repository, ArtifactDownloadStatistics())
 
-    def export_test_metadata_and_artifacts_by_pipeline(
-        self, pipeline_config: CircleCIScraperPipelineConfig, date_limit: datetime | None = None
+    def _add_repository_time(self, repository: str, elapsed: float) -> None:
+        self._download_statistics(repository).time += elapsed
+        self._metrics.increment("repository_export_seconds_total", elapsed, repository=repository)
+
+    def _scan_export_index(self) -> ExportIndex:
+        return ExportIndex.scan(
+            Path(self._test_result_dir), self._test_metadata_dir, self._test_artifact_dir
+        )
+
+    def export_test_metadata_and_artifacts_by_organization(
+        self,
+        organization: str,
+        pipeline_configs: list[CircleCIScraperPipelineConfig],
+        date_limit: datetime | None = None,
+        full: bool = False,
+        resume: bool = False,
     ) -> None:
-        """Export test metadata and artifacts for a single pipeline.
+        """Export test metadata and artifacts for the pipeline configurations of an organization.
+
+        The organization's pipeline listing is paged once and each pipeline is dispatched to the
+        configurations of its project. Paging stops once every configuration has reached its
+        date limit or watermark.
 
         Args:
-            pipeline_config (CircleCIScraperPipelineConfig): A pipeline configuration.
+            organization (str): The organization name.
+            pipeline_configs (list[CircleCIScraperPipelineConfig]): The pipeline configurations
+                                                                    of the organization.
             date_limit (datetime | None): The date limit for fetching data. Defaults to None.
+            full (bool): Ignore the watermarks and page back to the date limit. Defaults to
+                         False.
+            resume (bool): Continue from the journal of an interrupted run. Defaults to False.
 
         Raises:
             CircleCIClientError: If there is an error in the CircleCI API request.
             CircleCIScraperError: If there is an error in downloading the artifacts.
+            WatermarkStoreError: If the watermarks cannot be saved.
+            ScrapeJournalError: If the journal cannot be saved.
         """
-        next_page_token: str | None = None
-        while True:
-            pipelines: PipelineGroup = self._client.get_pipelines(
-                pipeline_config.organization, next_page_token
-            )
+        progress = self._start_journal(organization, resume)
+        processed_pipelines = [
+            list(progress.repository(config.repository).pipelines) for config in pipeline_configs
+        ]
+        resumed_pipeline_ids = self._resumed_pipeline_ids(processed_pipelines)
+        active_configs = self._active_configs(pipeline_configs, progress)
+        next_page_token = progress.page_token
+        while active_configs:
+            pipelines: PipelineGroup = self._client.get_pipelines(organization, next_page_token)
             for pipeline in pipelines.items:
-                # Filter for branches, usually we only observe 'main' or equivalent
-                if (
-                    pipeline_config.branches
-                    and pipeline.vcs
-                    and pipeline.vcs.branch not in pipeline_config.branches
-                ):
-                    continue
-                # Filter for date limit
-                created_at_datetime = datetime.strptime(
-                    pipeline.created_at, "%Y-%m-%dT%H:%M:%S.%fZ"
-                ).replace(tzinfo=timezone.utc)
-                if date_limit and created_at_datetime < date_limit:
-                    return
-                self.export_test_metadata_and_artifacts_by_pipeline_id(
-                    pipeline.id,
-                    pipeline_config.organization,
-                    pipeline_config.repository,
-                    pipeline_config.workflows,
-                )
+                if self._is_past_date_limit(pipeline, date_limit):
+                    self._finish_configs(organization, pipeline_configs, active_configs)
+                    break
+                for index in self._matching_configs(pipeline_configs, active_configs, pipeline):
+                    pipeline_config = pipeline_configs[index]
+                    if self._is_scrape_boundary(pipeline_config, pipeline, full):
+                        active_configs.discard(index)
+                        self._finish_journal_repository(organization, pipeline_config)
+                        continue
+                    if pipeline.id in resumed_pipeline_ids[index]:
+                        continue
+                    start = time.perf_counter()
+                    complete = self.export_test_metadata_and_artifacts_by_pipeline_id(
+                        pipeline.id,
+                        pipeline_config.organization,
+                        pipeline_config.repository,
+                        pipeline_config.workflows,
+                    )
+                    self._add_repository_time(
+                        pipeline_config.repository, time.perf_counter() - start
+                    )
+                    processed_pipeline = ProcessedPipeline.from_pipeline(pipeline, complete)
+                    processed_pipelines[index].append(processed_pipeline)
+                    self._record_journal_pipeline(
+                        organization, pipeline_config, processed_pipeline
+                    )
             next_page_token = pipelines.next_page_token
             if not next_page_token:
                 break
+            if self._journal:
+                self._journal.set_page_token(organization, next_page_token)
+        for pipeline_config, config_pipelines in zip(pipeline_configs, processed_pipelines):
+            self._advance_watermarks(pipeline_config, config_pipelines)
+        if self._journal:
+            self._journal.finish(organization)
+
+    def _start_journal(self, organization: str, resume: bool) -> OrganizationProgress:
+        if not self._journal:
+            return OrganizationProgress()
+        return self._journal.start(organization, resume)
+
+    @staticmethod
+    def _active_configs(
+        pipeline_configs: list[CircleCIScraperPipelineConfig], progress: OrganizationProgress
+    ) -> set[int]:
+        # Configurations that reached their boundary before the run was interrupted are done
+        return {
+            index
+            for index, pipeline_config in enumerate(pipeline_configs)
+            if not progress.repository(pipeline_config.repository).finished
+        }
+
+    @staticmethod
+    def _resumed_pipeline_ids(
+        processed_pipelines: list[list[ProcessedPipeline]],
+    ) -> list[set[str]]:
+        # Only pipelines of the page a resumed run starts at can already have been processed
+        return [{pipeline.id for pipeline in pipelines} for pipelines in processed_pipelines]
+
+    def _record_journal_pipeline(
+        self,
+        organization: str,
+        pipeline_config: CircleCIScraperPipelineConfig,
+        processed_pipeline: ProcessedPipeline,
+    ) -> None:
+        if self._journal:
+            self._journal.record_pipeline(
+                organization, pipeline_config.repository, processed_pipeline
+            )
+
+    def _finish_journal_repository(
+        self, organization: str, pipeline_config: CircleCIScraperPipelineConfig
+    ) -> None:
+        if self._journal:
+            self._journal.finish_repository(organization, pipeline_config.repository)
+
+    @staticmethod
+    def _group_by_organization(
+        pipeline_configs: list[CircleCIScraperPipelineConfig],
+    ) -> dict[str, list[CircleCIScraperPipelineConfig]]:
+        organizations: dict[str, list[CircleCIScraperPipelineConfig]] = {}
+        for pipeline_config in pipeline_configs:
+            organizations.setdefault(pipeline_config.organization, []).append(pipeline_config)
+        return organizations
+
+    def _matching_configs(
+        self,
+        pipeline_configs: list[CircleCIScraperPipelineConfig],
+        active_configs: set[int],
+        pipeline: Pipeline,
+    ) -> list[int]:
+        # The project slug has the form '<vcs>/<organization>/<repository>'
+        project = pipeline.project_slug.split("/")[1:]
+        return [
+            index
+            for index, pipeline_config in enumerate(pipeline_configs)
+            if index in active_configs
+            and project == [pipeline_config.organization, pipeline_config.repository]
+            and not self._is_excluded_branch(pipeline_config, pipeline)
+        ]
+
+    @staticmethod
+    def _is_excluded_branch(
+        pipeline_config: CircleCIScraperPipelineConfig, pipeline: Pipeline
+    ) -> bool:
+        # Filter for branches, usually we only observe 'main' or equivalent
+        return bool(
+            pipeline_config.branches
+            and pipeline.vcs
+            and pipeline.vcs.branch not in pipeline_config.branches
+        )
+
+    @staticmethod
+    def _parse_created_at(created_at: str) -> datetime:
+        return datetime.strptime(created_at, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=timezone.utc)
+
+    @staticmethod
+    def _branch(pipeline: Pipeline) -> str | None:
+        return pipeline.vcs.branch if pipeline.vcs else None
+
+    def _is_past_date_limit(self, pipeline: Pipeline, date_limit: datetime | None) -> bool:
+        # Pipelines are listed newest first, so paging stops for every configuration at the
+        # first pipeline of the organization that is older than the date limit, whether or not
+        # it belongs to a configured project and branch
+        return bool(
+            date_limit
+            and pipeline.created_at
+            and self._parse_created_at(pipeline.created_at) < date_limit
+        )
+
+    def _finish_configs(
+        self,
+        organization: str,
+        pipeline_configs: list[CircleCIScraperPipelineConfig],
+        active_configs: set[int],
+    ) -> None:
+        for index in sorted(active_configs):
+            self._finish_journal_repository(organization, pipeline_configs[index])
+        active_configs.clear()
+
+    def _is_scrape_boundary(
+        self,
+        pipeline_config: CircleCIScraperPipelineConfig,
+        pipeline: Pipeline,
+        full: bool,
+    ) -> bool:
+        # Paging stops for a configuration at the first of its pipelines that was already fully
+        # processed by a previous run
+        if not pipeline.created_at or full or not self._watermark_store:
+            return False
+        watermark = self._watermark_store.get(
+            pipeline_config.organization, pipeline_config.repository, self._branch(pipeline)
+        )
+        return bool(
+            watermark
+            and self._parse_created_at(pipeline.created_at)
+            <= self._parse_created_at(watermark.created_at)
+        )
+
+    def _advance_watermarks(
+        self,
+        pipeline_config: CircleCIScraperPipelineConfig,
+        processed_pipelines: list[ProcessedPipeline],
+    ) -> None:
+        if not self._watermark_store:
+            return
+        # Watermarks only move up to the newest pipeline that is older than every incomplete
+        # pipeline of this run, otherwise pipelines that are still running would never be
+        # revisited. Pipeline numbers increase with creation, oldest first.
+        watermarks: dict[str | None, Watermark] = {}
+        for pipeline in sorted(processed_pipelines, key=lambda pipeline: pipeline.number):
+            if not pipeline.complete:
+                break
+            if pipeline.created_at:
+                watermarks[pipeline.branch] = Watermark(
+                    pipeline_id=pipeline.id,
+                    pipeline_number=pipeline.number,
+                    created_at=pipeline.created_at,
+                )
+        if not watermarks:
+            return
+        for branch, watermark in watermarks.items():
+            self._watermark_store.set(
+                pipeline_config.organization, pipeline_config.repository, branch, watermark
+            )
+            self.logger.info(
+                f"Watermark for {pipeline_config.organization}/{pipeline_config.repository}/"
+                f"{branch} set to pipeline {watermark.pipeline_number}"
+            )
+        self._watermark_store.save()
 
     def export_test_metadata_and_artifacts_by_pipeline_id(
         self,
@@ -121,7 +430,7 @@ class CircleCIScraper:
         organization: str,
         repository: str,
         workflow_configs: dict[str, list[str]],
-    ) -> None:
+    ) -> bool:
         """Export test metadata and artifacts for a specific pipeline ID.
 
         Args:
@@ -130,22 +439,37 @@ class CircleCIScraper:
             repository (str): The repository name.
             workflow_configs (dict[str, list[str]]): The workflow configurations.
 
+        Returns:
+            bool: True if the pipeline is fully processed, meaning all of its configured
+                  workflows have finished and all of their artifacts were downloaded.
+
         Raises:
             CircleCIClientError: If there is an error in the CircleCI API request.
             CircleCIScraperError: If there is an error in downloading the artifacts.
         """
+        complete = True
         next_page_token: str | None = None
         while True:
             workflows: WorkflowGroup = self._client.get_workflows(pipeline_id, next_page_token)
             for workflow in workflows.items:
                 if workflow.name in workflow_configs:
                     job_names = workflow_configs[workflow.name]
-                    self.export_test_metadata_and_artifacts_workflow_id(
-                        organization, repository, workflow, job_names
-                    )
+                    if workflow.status not in TERMINAL_WORKFLOW_STATUSES:
+                        complete = False
+                    with self._metrics.time(
+                        "workflow_export_duration_seconds",
+                        repository=repository,
+                        workflow=workflow.name,
+                    ):
+                        exported = self.export_test_metadata_and_artifacts_workflow_id(
+                            organization, repository, workflow, job_names
+                        )
+                    if not exported:
+                        complete = False
             next_page_token = workflows.next_page_token
             if not next_page_token:
                 break
+        return complete
 
     def export_test_metadata_and_artifacts_workflow_id(
         self,
@@ -153,7 +477,7 @@ class CircleCIScraper:
         repository: str,
         workflow: Workflow,
         job_names: list[str],
-    ) -> None:
+    ) -> bool:
         """Export test metadata and artifacts for a specific workflow ID.
 
         Args:
@@ -162,10 +486,14 @@ class CircleCIScraper:
             workflow (Workflow): The workflow.
             job_names (list[str]): A list of job names.
 
+        Returns:
+            bool: True if all artifacts of the workflow's jobs were downloaded.
+
         Raises:
             CircleCIClientError: If there is an error in the CircleCI API request.
             CircleCIScraperError: If there is an error in downloading the artifacts.
         """
+        complete = True
         next_page_token: str | None = None
         while True:
             jobs: JobGroup = self._client.get_jobs(workflow.id, next_page_token)
@@ -179,11 +507,52 @@ class CircleCIScraper:
                             f"missing for {organization}>{repository}>{workflow.name}>{job.name}"
                         )
                         continue
-                    self.export_test_metadata_by_job(organization, repository, workflow.name, job)
-                    self.export_test_artifacts_by_job(organization, repository, workflow.name, job)
+                    if not self._has_metadata(repository, workflow.name, job):
+                        with self._time_job(repository, workflow.name, job, "metadata"):
+                            self.export_test_metadata_by_job(
+                                organization, repository, workflow.name, job
+                            )
+                    if not self._has_artifacts(repository, workflow.name, job):
+                        with self._time_job(repository, workflow.name, job, "artifacts"):
+                            results = self.export_test_artifacts_by_job(
+                                organization, repository, workflow.name, job
+                            )
+                        if not all(result.downloaded for result in results):
+                            complete = False
             next_page_token = jobs.next_page_token
             if not next_page_token:
                 break
+        return complete
+
+    def _time_job(
+        self, repository: str, workflow_name: str, job: Job, stage: str
+    ) -> ContextManager[None]:
+        # Labelled by job name rather than number, so the number of series stays bounded
+        return self._metrics.time(
+            "job_export_duration_seconds",
+            repository=repository,
+            workflow=workflow_name,
+            job=job.name,
+            stage=stage,
+        )
+
+    def _has_metadata(self, repository: str, workflow_name: str, job: Job) -> bool:
+        if job.job_number is None or not self._export_index.has_metadata(
+            repository, workflow_name, job.name, job.job_number
+        ):
+            return False
+        self.logger.info(f"Test metadata of job {job.job_number} already exported, skipping.")
+        self._metrics.increment("jobs_skipped_total", repository=repository, kind="metadata")
+        return True
+
+    def _has_artifacts(self, repository: str, workflow_name: str, job: Job) -> bool:
+        if job.job_number is None or not self._export_index.has_artifacts(
+            repository, workflow_name, job.name, job.job_number
+        ):
+            return False
+        self.logger.info(f"Artifacts of job {job.job_number} already exported, skipping.")
+        self._metrics.increment("jobs_skipped_total", repository=repository, kind="artifacts")
+        return True
 
     def export_test_metadata_by_job(
         self,
@@ -204,7 +573,7 @@ class CircleCIScraper:
             CircleCIClientError: If there is an error in the CircleCI API request.
             CircleCIScraperError: If there is an error in downloading the artifacts.
         """
-        file_content: dict[str, Any] = {"job": job.dict(), "test_metadata": []}
+        file_content: dict[str, Any] = {"job": job.model_dump(), "test_metadata": []}
         next_page_token: str | None = None
         while True:
             test_metadata: TestMetadataGroup = self._client.get_test_metadata(
@@ -212,7 +581,7 @@ class CircleCIScraper:
             )
             if not test_metadata:
                 break
-            file_content["test_metadata"] += [item.dict() for item in test_metadata.items]
+            file_content["test_metadata"] += [item.model_dump() for item in test_metadata.items]
             next_page_token = test_metadata.next_page_token
             if not next_page_token:
                 break
@@ -236,20 +605,20 @@ class CircleCIScraper:
             CircleCIClientError: If there is an error in the CircleCI API request.
             CircleCIScraperError: If there is an error in downloading the artifacts.
         """
-        test_metadata_directory = (
-            Path(self._test_result_dir)
-            / repository
-            / workflow_name
-            / job.name
-            / self._test_metadata_dir
-        )
+        test_metadata_directory = self._test_metadata_directory(repository, workflow_name, job)
         test_metadata_directory.mkdir(parents=True, exist_ok=True)
         file_path = test_metadata_directory / f"{job.job_number}.json"
         if file_path.exists():
             self.logger.info(f"{file_path} already exists, skipping download.")
         else:
-            file_path.write_text(json.dumps(file_content, default=str))
+            # Written to a temporary file first, so an interrupted run never leaves a truncated
+            # file that later runs would take for an exported job
+            with stage(DISK_WRITE_STAGE), atomic_write(file_path, "w") as file:
+                file.write(json.dumps(file_content, default=str))
             self.logger.info(f"Output {file_path}")
+            self._metrics.increment("jobs_exported_total", repository=repository)
+        if job.job_number is not None:
+            self._export_index.add_metadata(repository, workflow_name, job.name, job.job_number)
 
     def export_test_artifacts_by_job(
         self,
@@ -257,7 +626,7 @@ class CircleCIScraper:
         repository: str,
         workflow_name: str,
         job: Job,
-    ) -> None:
+    ) -> list[ArtifactDownloadResult]:
         """Export test artifacts for a specific job.
 
         Args:
@@ -266,6 +635,9 @@ class CircleCIScraper:
             workflow_name (str): The workflow name.
             job (Job): The job details.
 
+        Returns:
+            list[ArtifactDownloadResult]: The results of the downloads attempted.
+
         Raises:
             CircleCIClientError: If there is an error in the CircleCI API request.
             CircleCIScraperError: If there is an error in downloading the artifacts.
@@ -282,24 +654,104 @@ class CircleCIScraper:
             next_page_token = artifacts.next_page_token
             if not next_page_token:
                 break
-        self.export_test_artifacts(repository, workflow_name, job, test_artifacts)
+        return self.export_test_artifacts(repository, workflow_name, job, test_artifacts)
 
     def export_test_artifacts(
         self, repository: str, workflow_name: str, job: Job, artifacts: list[Artifact]
-    ):
+    ) -> list[ArtifactDownloadResult]:
         """Export a given list of test artifacts.
 
+        Artifacts are downloaded in parallel by a pool of 'download_workers' threads, shared by
+        the jobs of a run. A failed download is logged and counted in 'download_statistics'
+        without stopping the others.
+
         Args:
             repository (str): The repository name.
             workflow_name (str): The workflow name.
             job (Job): The job details.
             artifacts (list[Artifact]): The list of artifacts.
 
-        Raises:
-            CircleCIClientError: If there is an error in the CircleCI API request.
-            CircleCIScraperError: If there is an error in downloading the artifacts.
+        Returns:
+            list[ArtifactDownloadResult]: The outcome of each download.
         """
-        artifact_directory = (
+        pending_downloads = self._pending_artifact_downloads(
+            repository, workflow_name, job, artifacts
+        )
+        results: list[ArtifactDownloadResult] = []
+        if pending_downloads:
+            file_names, urls = zip(*pending_downloads)
+            results = list(
+                self._download_pool().map(self._try_download_artifact, file_names, urls)
+            )
+        self._record_download_results(repository, workflow_name, job, artifacts, results)
+        return results
+
+    def _download_pool(self) -> ThreadPoolExecutor:
+        if self._download_executor is None:
+            self._download_executor = ThreadPoolExecutor(
+                max_workers=self._download_workers, thread_name_prefix="download"
+            )
+        return self._download_executor
+
+    def _try_download_artifact(self, file_name: str, url: str) -> ArtifactDownloadResult:
+        try:
+            size = self.download_artifact(file_name, url)
+            if size is None:
+                return ArtifactDownloadResult(file_name=file_name, url=url, skipped=True)
+            return ArtifactDownloadResult(file_name=file_name, url=url, size=size)
+        except CircleCIScraperError as error:
+            # The failure is already logged, siblings are still downloaded and the missing file
+            # is retried on the next run
+            return ArtifactDownloadResult(file_name=file_name, url=url, error=str(error))
+
+    def _record_download_results(
+        self,
+        repository: str,
+        workflow_name: str,
+        job: Job,
+        artifacts: list[Artifact],
+        results: list[ArtifactDownloadResult],
+    ) -> None:
+        statistics = self._download_statistics(repository)
+        for result in results:
+            if result.error:
+                statistics.failures += 1
+                outcome = "failed"
+            elif result.skipped:
+                statistics.skipped += 1
+                outcome = "skipped"
+            else:
+                statistics.files += 1
+                statistics.bytes += result.size
+                self._metrics.increment("artifact_bytes_total", result.size, repository=repository)
+                outcome = "downloaded"
+            self._metrics.increment("artifacts_total", repository=repository, result=outcome)
+        # Jobs without artifacts are not marked, their artifacts may not have been uploaded yet.
+        # Jobs with skipped artifacts are not marked either, so they are retried on the next run.
+        if (
+            artifacts
+            and job.job_number is not None
+            and all(result.downloaded for result in results)
+        ):
+            marker_path = (
+                self._test_artifact_directory(repository, workflow_name, job)
+                / ARTIFACTS_COMPLETE_MARKER
+            )
+            with stage(DISK_WRITE_STAGE):
+                marker_path.touch()
+            self._export_index.add_artifacts(repository, workflow_name, job.name, job.job_number)
+
+    def _test_metadata_directory(self, repository: str, workflow_name: str, job: Job) -> Path:
+        return (
+            Path(self._test_result_dir)
+            / repository
+            / workflow_name
+            / job.name
+            / self._test_metadata_dir
+        )
+
+    def _test_artifact_directory(self, repository: str, workflow_name: str, job: Job) -> Path:
+        return (
             Path(self._test_result_dir)
             / repository
             / workflow_name
@@ -307,31 +759,57 @@ class CircleCIScraper:
             / self._test_artifact_dir
             / str(job.job_number)
         )
+
+    def _pending_artifact_downloads(
+        self, repository: str, workflow_name: str, job: Job, artifacts: list[Artifact]
+    ) -> list[tuple[str, str]]:
+        # Returns (file name, url) pairs for the artifacts that are not yet on disk
+        artifact_directory = self._test_artifact_directory(repository, workflow_name, job)
         if artifacts:
             artifact_directory.mkdir(parents=True, exist_ok=True)
+        pending_downloads: list[tuple[str, str]] = []
         for index, artifact in enumerate(artifacts):
             file_path = artifact_directory / f"{index}-{Path(artifact.path).name}"
             if file_path.exists():
                 self.logger.info(f"{file_path} already exists, skipping download.")
             else:
-                self.download_artifact(str(file_path), artifact.url)
+                pending_downloads.append((str(file_path), artifact.url))
+        return pending_downloads
 
-    def download_artifact(self, file_name: str, url: str) -> None:
+    def download_artifact(self, file_name: str, url: str) -> int | None:
         """Download an artifact from the specified URL.
 
+        The artifact is streamed to a temporary file which is renamed to the destination once
+        complete, so an existing destination file is always a complete download.
+
         Args:
             file_name (str): The name of the destination file.
             url (str): The URL of the artifact to download.
 
+        Returns:
+            int | None: The number of bytes written, None if the artifact exceeds the maximum
+                        size and was skipped.
+
         Raises:
             CircleCIScraperError: If there is an error in downloading the artifact.
         """
+        size = 0
         try:
-            response: requests.Response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            with open(file_name, "wb") as file:
-                file.write(response.content)
+            with stage(ARTIFACT_DOWNLOAD_STAGE), atomic_write(Path(file_name)) as file:
+                for chunk in self._client.iter_artifact(url):
+                    size += len(chunk)
+                    if self._max_artifact_size is not None and size > self._max_artifact_size:
+                        raise ArtifactTooLargeError(f"Artifact from {url} is too large")
+                    with stage(DISK_WRITE_STAGE):
+                        file.write(chunk)
             self.logger.info(f"Output {file_name}")
-        except RequestException as error:
+            return size
+        except ArtifactTooLargeError:
+            self.logger.warning(
+                f"Skipping artifact from {url}, it exceeds the maximum size of "
+                f"{self._max_artifact_size} bytes"
+            )
+            return None
+        except (CircleCIClientError, OSError) as error:
             self.logger.error(f"Failed to download artifact from {url}", exc_info=error)
             raise CircleCIScraperError(f"Failed to download artifact from {url}", error)
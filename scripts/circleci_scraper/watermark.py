@@ -0,0 +1,107 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""WatermarkStore and related objects"""
+
+import json
+import logging
+from pathlib import Path
+
+from pydantic import BaseModel, ValidationError
+
+from scripts.common.atomic_write import atomic_write
+from scripts.common.error import BaseError
+
+
+class Watermark(BaseModel):
+    """The newest pipeline of a branch below which every pipeline has been fully processed."""
+
+    pipeline_id: str
+    pipeline_number: int
+    created_at: str
+
+
+class WatermarkStoreError(BaseError):
+    """Custom exception class for WatermarkStore errors."""
+
+    pass
+
+
+class WatermarkStore:
+    """Persist scrape watermarks keyed by organization, repository and branch."""
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, path: Path) -> None:
+        """Initialize the WatermarkStore, loading existing watermarks from the given path.
+
+        Args:
+            path (Path): The path of the JSON file holding the watermarks.
+
+        Raises:
+            WatermarkStoreError: If the watermark file cannot be read or has an unexpected format.
+        """
+        self._path = path
+        self._watermarks: dict[str, Watermark] = self._load()
+
+    def _load(self) -> dict[str, Watermark]:
+        if not self._path.exists():
+            return {}
+        try:
+            data = json.loads(self._path.read_text())
+            return {key: Watermark(**value) for key, value in data.items()}
+        except (OSError, json.JSONDecodeError, ValidationError, AttributeError) as error:
+            error_msg = f"Unable to load the watermarks from {self._path}"
+            self.logger.error(error_msg, exc_info=error)
+            raise WatermarkStoreError(error_msg, error)
+
+    @staticmethod
+    def _key(organization: str, repository: str, branch: str | None) -> str:
+        return f"{organization}/{repository}/{branch or ''}"
+
+    def get(self, organization: str, repository: str, branch: str | None) -> Watermark | None:
+        """Get the watermark of a branch.
+
+        Args:
+            organization (str): The organization name.
+            repository (str): The repository name.
+            branch (str | None): The branch name.
+
+        Returns:
+            Watermark | None: The watermark, or None if the branch has not been scraped yet.
+        """
+        return self._watermarks.get(self._key(organization, repository, branch))
+
+    def set(
+        self, organization: str, repository: str, branch: str | None, watermark: Watermark
+    ) -> None:
+        """Set the watermark of a branch. Call `save` to persist it.
+
+        Args:
+            organization (str): The organization name.
+            repository (str): The repository name.
+            branch (str | None): The branch name.
+            watermark (Watermark): The new watermark.
+        """
+        self._watermarks[self._key(organization, repository, branch)] = watermark
+
+    def save(self) -> None:
+        """Write the watermarks to disk.
+
+        Raises:
+            WatermarkStoreError: If the watermark file cannot be written.
+        """
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with atomic_write(self._path, "w") as file:
+                json.dump(
+                    {key: value.model_dump() for key, value in self._watermarks.items()},
+                    file,
+                    indent=2,
+                    sort_keys=True,
+                )
+        except OSError as error:
+            error_msg = f"Unable to save the watermarks to {self._path}"
+            self.logger.error(error_msg, exc_info=error)
+            raise WatermarkStoreError(error_msg, error)
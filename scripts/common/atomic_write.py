@@ -0,0 +1,58 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Atomic file writing for the ecosystem test scripts."""
+
+import os
+import secrets
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Iterator
+
+# Temporary files are hidden and never share the extension of the file being written, so
+# partially written files are never picked up as complete ones
+TEMP_FILE_SUFFIX = ".part"
+
+# Temporary files are created with the mode of any new file, from which the kernel clears the
+# bits of the process umask, so that other users, such as a metrics collector, can read the
+# destination as they could a file written in place
+NEW_FILE_MODE = 0o666
+
+
+def _create_temp_file(path: Path) -> tuple[int, Path]:
+    # Like tempfile.mkstemp, but not restricted to the owner. The umask is applied by the
+    # kernel, as reading it would mean briefly changing it for every thread of the process.
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL
+    for _ in range(tempfile.TMP_MAX):
+        temp_path = path.parent / f".{path.name}.{secrets.token_hex(4)}{TEMP_FILE_SUFFIX}"
+        try:
+            return os.open(temp_path, flags, NEW_FILE_MODE), temp_path
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"No unused temporary file name found for {path}")
+
+
+@contextmanager
+def atomic_write(path: Path, mode: str = "wb") -> Iterator[IO[Any]]:
+    """Open a temporary file next to the given path and move it into place on success.
+
+    The destination only ever exists with its complete content. If an exception is raised while
+    writing, the temporary file is removed and the destination is left untouched.
+
+    Args:
+        path (Path): The destination path.
+        mode (str): The mode to open the temporary file with, 'wb' or 'w'. Defaults to 'wb'.
+
+    Yields:
+        IO[Any]: The temporary file object.
+    """
+    file_descriptor, temp_path = _create_temp_file(path)
+    try:
+        with os.fdopen(file_descriptor, mode) as file:
+            yield file
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
@@ -27,3 +27,11 @@ class BaseError(Exception):
         if self.inner_exception:
             return f"{super().__str__()} (caused by {self.inner_exception})"
         return super().__str__()
+
+    def __reduce__(self) -> tuple[type, tuple[str, Exception | None]]:
+        """Support pickling, so errors raised in worker processes keep their inner exception.
+
+        Returns:
+            tuple[type, tuple[str, Exception | None]]: The class and its constructor arguments.
+        """
+        return self.__class__, (super().__str__(), self.inner_exception)
@@ -0,0 +1,225 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Stage-level profiling for the ecosystem test scripts.
+
+Code marks its stages with `stage(name)`, which does nothing unless a StageProfiler is active.
+"""
+
+import cProfile
+import logging
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from types import TracebackType
+from typing import Iterator
+
+from pydantic import BaseModel
+
+
+class StageStatistics(BaseModel):
+    """Time and memory totals of a stage.
+
+    'self_time' excludes the time of stages nested in it on the same thread. 'held' is the net
+    change in traced memory over all calls and 'peak' the highest traced memory above the
+    memory at the start of a call; both are 0 unless memory is traced.
+    """
+
+    calls: int = 0
+    total_time: float = 0
+    self_time: float = 0
+    held: int = 0
+    peak: int = 0
+
+
+class _Span:
+    def __init__(self, name: str, profile: cProfile.Profile | None, memory: int) -> None:
+        self.name = name
+        self.profile = profile
+        self.memory = memory
+        self.peak = memory
+        self.child_time = 0.0
+
+
+_active_profiler: "StageProfiler | None" = None
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as a stage of the active StageProfiler.
+
+    Args:
+        name (str): The stage name.
+    """
+    profiler = _active_profiler
+    if profiler is None:
+        yield
+    else:
+        with profiler.span(name):
+            yield
+
+
+class StageProfiler:
+    """Collect the wall time of each stage, and optionally its memory and cProfile statistics.
+
+    Use as a context manager around a run, which activates the profiler for `stage`. Stages may
+    be nested and run on several threads. With an output directory, memory is traced with
+    tracemalloc, a '<stage>.tracemalloc' snapshot is written there when the call of a stage
+    holding the most memory so far ends, and '<stage>.pstats' cProfile statistics are written
+    there on exit. Only one cProfile profiler can be active at a time, so
+    statistics are collected for the stages on the main thread; since Python 3.12 they include
+    the calls of other threads running at the same time. Memory figures of stages overlapping
+    on several threads are approximate, as tracemalloc counts the memory of all threads.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, output_dir: Path | None = None) -> None:
+        """Initialize the StageProfiler.
+
+        Args:
+            output_dir (Path | None): Where to write the cProfile statistics and tracemalloc
+                                      snapshots of each stage. Defaults to None, timing only.
+        """
+        self._output_dir = output_dir
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiles: dict[str, cProfile.Profile] = {}
+        self._snapshot_held: dict[str, int] = {}
+        self._start = 0.0
+        self.elapsed = 0.0
+        self.statistics: dict[str, StageStatistics] = {}
+
+    @property
+    def traces_memory(self) -> bool:
+        """Whether memory and cProfile statistics are collected."""
+        return self._output_dir is not None
+
+    def __enter__(self) -> "StageProfiler":
+        global _active_profiler
+        if self._output_dir:
+            self._output_dir.mkdir(parents=True, exist_ok=True)
+            tracemalloc.start()
+        _active_profiler = self
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        global _active_profiler
+        self.elapsed = time.perf_counter() - self._start
+        _active_profiler = None
+        if self._output_dir:
+            tracemalloc.stop()
+            for name, profile in self._profiles.items():
+                pstats.Stats(profile).dump_stats(self._output_dir / f"{self._slug(name)}.pstats")
+            self.logger.info(f"Stage profiles written to {self._output_dir}")
+
+    @staticmethod
+    def _slug(name: str) -> str:
+        return name.lower().replace(" ", "_")
+
+    def _stack(self) -> list[_Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        stack: list[_Span] = self._local.stack
+        return stack
+
+    def _stage_profile(self, name: str) -> cProfile.Profile | None:
+        if not self._output_dir or threading.current_thread() is not threading.main_thread():
+            return None
+        return self._profiles.setdefault(name, cProfile.Profile())
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time a block as a call of a stage.
+
+        Args:
+            name (str): The stage name.
+        """
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        profile = self._stage_profile(name)
+        if parent and parent.profile:
+            parent.profile.disable()
+        if profile:
+            profile.enable()
+        memory = 0
+        if self.traces_memory:
+            memory, peak = tracemalloc.get_traced_memory()
+            if parent:
+                parent.peak = max(parent.peak, peak)
+            tracemalloc.reset_peak()
+        span = _Span(name, profile, memory)
+        stack.append(span)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            if profile:
+                profile.disable()
+            if parent:
+                parent.child_time += elapsed
+                if parent.profile:
+                    parent.profile.enable()
+            held = 0
+            if self.traces_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                span.peak = max(span.peak, peak)
+                held = current - span.memory
+                if parent:
+                    parent.peak = max(parent.peak, span.peak)
+            self._record(span, elapsed, held)
+
+    def _record(self, span: _Span, elapsed: float, held: int) -> None:
+        with self._lock:
+            statistics = self.statistics.setdefault(span.name, StageStatistics())
+            statistics.calls += 1
+            statistics.total_time += elapsed
+            statistics.self_time += elapsed - span.child_time
+            statistics.held += held
+            statistics.peak = max(statistics.peak, span.peak - span.memory)
+            if self._output_dir and held > self._snapshot_held.get(span.name, 0):
+                # The allocations when the call of the stage holding the most memory ended
+                self._snapshot_held[span.name] = held
+                tracemalloc.take_snapshot().dump(
+                    str(self._output_dir / f"{self._slug(span.name)}.tracemalloc")
+                )
+
+    def summary(self) -> str:
+        """Format the statistics of the stages, ranked by self time.
+
+        Returns:
+            str: A table with a line per stage.
+        """
+        lines = [f"Stage profile of {self.elapsed:.2f}s, ranked by self time:"]
+        header = f"  {'stage':<20}{'calls':>8}{'self (s)':>11}{'total (s)':>11}{'self %':>8}"
+        if self.traces_memory:
+            header += f"{'held (MiB)':>12}{'peak (MiB)':>12}"
+        lines.append(header)
+        for name, statistics in sorted(
+            self.statistics.items(), key=lambda item: -item[1].self_time
+        ):
+            share = statistics.self_time / self.elapsed * 100 if self.elapsed else 0
+            line = (
+                f"  {name:<20}{statistics.calls:>8}{statistics.self_time:>11.3f}"
+                f"{statistics.total_time:>11.3f}{share:>7.1f}%"
+            )
+            if self.traces_memory:
+                line += f"{statistics.held / 2**20:>12.1f}{statistics.peak / 2**20:>12.1f}"
+            lines.append(line)
+        if sum(statistics.self_time for statistics in self.statistics.values()) > self.elapsed:
+            lines.append(
+                "  Stages ran on several threads, so their times add up to more than the run."
+            )
+        return "\n".join(lines)
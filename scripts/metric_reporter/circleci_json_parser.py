@@ -6,8 +6,9 @@
 
 import json
 import logging
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Collection
 
 from pydantic import BaseModel, ValidationError
 
@@ -28,8 +29,14 @@ class CircleCIJob(BaseModel):
     stopped_at: str
 
 
-class CircleCITestMetadata(BaseModel):
-    """Represents test metadata for a CircleCI job."""
+@dataclass(slots=True)
+class CircleCITestMetadata:
+    """Represents test metadata for a CircleCI job.
+
+    A job may have thousands of test results, so this is a slotted dataclass, which takes a
+    fraction of the memory of a pydantic model. It is validated as a field of
+    CircleCIJobTestMetadata when a file is parsed.
+    """
 
     classname: str
     name: str
@@ -57,11 +64,16 @@ class CircleCIJsonParser:
 
     logger = logging.getLogger(__name__)
 
-    def parse(self, metadata_path: Path) -> list[CircleCIJobTestMetadata]:
+    def parse(
+        self, metadata_path: Path, jobs: Collection[int] | None = None
+    ) -> list[CircleCIJobTestMetadata]:
         """Parse CircleCI JSON test metadata from the specified directory.
 
         Args:
             metadata_path (Path): The path to the directory containing the test metadata files.
+            jobs (Collection[int] | None): Only parse the files of these job numbers, named
+                                           '<job_number>.json'. Defaults to None, parsing all
+                                           files.
 
         Returns:
             list[CircleCIJobTestMetadata]: A list of CircleCIJobTestMetadata objects.
@@ -70,22 +82,47 @@ class CircleCIJsonParser:
             CircleCIJsonParserError: If there are errors reading files, or if there are issues with
                                      parsing the JSON data.
         """
-        metadata_list: list[CircleCIJobTestMetadata] = []
-        metadata_file_paths: list[Path] = sorted(metadata_path.iterdir())
-        for metadata_file_path in metadata_file_paths:
-            self.logger.info(f"Parsing {metadata_file_path}")
-            try:
-                with metadata_file_path.open() as file:
-                    data: dict[str, Any] = json.load(file)
-                    metadata = CircleCIJobTestMetadata(**data)
-                    metadata_list.append(metadata)
-            except (OSError, json.JSONDecodeError, ValidationError) as error:
-                error_mapping: dict[type, str] = {
-                    OSError: f"Error reading the file {metadata_file_path}",
-                    json.JSONDecodeError: f"Invalid JSON format for file {metadata_file_path}",
-                    ValidationError: f"Unexpected value or schema in file {metadata_file_path}",
-                }
-                error_msg: str = error_mapping[type(error)]
-                self.logger.error(error_msg, exc_info=error)
-                raise CircleCIJsonParserError(error_msg, error)
-        return metadata_list
+        metadata_file_paths: list[Path] = sorted(
+            # Temporary files of interrupted scraper writes do not end in '.json'
+            metadata_path.glob("*.json")
+            if jobs is None
+            else (
+                metadata_path / f"{job}.json"
+                for job in jobs
+                if (metadata_path / f"{job}.json").is_file()
+            )
+        )
+        return [self.parse_file(file_path) for file_path in metadata_file_paths]
+
+    def parse_file(self, metadata_file_path: Path) -> CircleCIJobTestMetadata:
+        """Parse a CircleCI JSON test metadata file.
+
+        The content is decoded and validated in one step.
+
+        Args:
+            metadata_file_path (Path): The path to the JSON file.
+
+        Returns:
+            CircleCIJobTestMetadata: The parsed test metadata.
+
+        Raises:
+            CircleCIJsonParserError: If there is an error reading or parsing the JSON file.
+        """
+        self.logger.info(f"Parsing {metadata_file_path}")
+        try:
+            return CircleCIJobTestMetadata.model_validate_json(metadata_file_path.read_bytes())
+        except (OSError, json.JSONDecodeError, ValidationError) as error:
+            error_mapping: dict[type, str] = {
+                OSError: f"Error reading the file {metadata_file_path}",
+                json.JSONDecodeError: f"Invalid JSON format for file {metadata_file_path}",
+                ValidationError: f"Unexpected value or schema in file {metadata_file_path}",
+            }
+            error_type: type = type(error)
+            # Decoding and validating in one step reports invalid JSON as a validation error
+            if isinstance(error, ValidationError) and any(
+                detail["type"] == "json_invalid" for detail in error.errors()
+            ):
+                error_type = json.JSONDecodeError
+            error_msg: str = error_mapping[error_type]
+            self.logger.error(error_msg, exc_info=error)
+            raise CircleCIJsonParserError(error_msg, error)
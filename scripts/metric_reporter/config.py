@@ -7,6 +7,7 @@
 import logging
 import re
 from configparser import NoSectionError, NoOptionError
+from enum import Enum
 from pathlib import Path
 
 from pydantic import BaseModel, ValidationError, Field
@@ -25,10 +26,26 @@ class MetricReporterArgs(BaseModel):
     results_csv_report_path: Path
 
 
+class OutputFormat(Enum):
+    """Format of the test suite reports."""
+
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
+DEFAULT_PARSE_WORKERS = 1
+DEFAULT_STATE_DIR = "metric_reporter_state"
+DEFAULT_OUTPUT_FORMATS = "csv"
+
+
 class MetricReporterConfig(BaseModel):
     """Model for Metric Reporter configuration."""
 
     reports_dir: str = Field(..., pattern=DIRECTORY_PATTERN)
+    parse_workers: int = Field(default=DEFAULT_PARSE_WORKERS, gt=0)
+    state_dir: str = Field(default=DEFAULT_STATE_DIR, pattern=DIRECTORY_PATTERN)
+    output_formats: set[OutputFormat] = Field(default={OutputFormat.CSV}, min_length=1)
+    parquet_test_cases: bool = False
 
 
 class Config(BaseConfig):
@@ -54,12 +71,38 @@ class Config(BaseConfig):
     def _parse_metric_reporter_config(self) -> MetricReporterConfig:
         try:
             reports_dir: str = self.config_parser.get("metric_reporter", "reports_dir")
-            return MetricReporterConfig(reports_dir=reports_dir)
-        except (NoSectionError, NoOptionError, ValidationError) as error:
+            parse_workers: int = self.config_parser.getint(
+                "metric_reporter", "parse_workers", fallback=DEFAULT_PARSE_WORKERS
+            )
+            state_dir: str = self.config_parser.get(
+                "metric_reporter", "state_dir", fallback=DEFAULT_STATE_DIR
+            )
+            output_formats: str = self.config_parser.get(
+                "metric_reporter", "output_formats", fallback=DEFAULT_OUTPUT_FORMATS
+            )
+            parquet_test_cases: bool = self.config_parser.getboolean(
+                "metric_reporter", "parquet_test_cases", fallback=False
+            )
+            # Validated from a dict, so the format names are converted to OutputFormat members
+            return MetricReporterConfig.model_validate(
+                {
+                    "reports_dir": reports_dir,
+                    "parse_workers": parse_workers,
+                    "state_dir": state_dir,
+                    "output_formats": {
+                        output_format.strip()
+                        for output_format in output_formats.split(",")
+                        if output_format.strip()
+                    },
+                    "parquet_test_cases": parquet_test_cases,
+                }
+            )
+        except (NoSectionError, NoOptionError, ValidationError, ValueError) as error:
             error_mapping: dict[type, str] = {
                 NoSectionError: "The 'metric_reporter' section is missing",
                 NoOptionError: "Missing config option in 'metric_reporter' section",
                 ValidationError: "Unexpected value or schema in 'metric_reporter' section",
+                ValueError: "Invalid numeric or boolean value in 'metric_reporter' section",
             }
             error_msg: str = error_mapping[type(error)]
             self.logger.error(error_msg, exc_info=error)
@@ -78,29 +121,30 @@ class Config(BaseConfig):
         #             ├── test_suite/
         #                 ├── metadata_dir/
         #                 ├── artifact_dir/
+        # Only the first three levels are listed, the metadata and artifact directories, which
+        # hold a file or directory per job, are never descended into.
         try:
             test_metric_args_list: list[MetricReporterArgs] = []
             test_result_path = Path(self.common_config.test_result_dir)
-            for directory_path, directory_names, files in test_result_path.walk():
-                for directory_name in directory_names:
-                    current_path = Path(directory_path) / directory_name
-                    artifact_path = current_path / self.common_config.test_artifact_dir
-                    metadata_path = current_path / self.common_config.test_metadata_dir
-                    if artifact_path.exists() or metadata_path.exists():
-                        repository = self._normalize_name(Path(directory_path).parents[0].name)
-                        test_suite = self._normalize_name(directory_name, "_")
-                        test_metric_args = MetricReporterArgs(
-                            repository=repository,
-                            workflow=directory_path.name,
-                            test_suite=test_suite,
-                            metadata_path=metadata_path,
-                            artifact_path=artifact_path,
-                            results_csv_report_path=(
-                                Path(self.metric_reporter_config.reports_dir)
-                                / f"{repository}_{test_suite}_results.csv"
-                            ),
-                        )
-                        test_metric_args_list.append(test_metric_args)
+            for test_suite_path in sorted(test_result_path.glob("*/*/*")):
+                artifact_path = test_suite_path / self.common_config.test_artifact_dir
+                metadata_path = test_suite_path / self.common_config.test_metadata_dir
+                if artifact_path.exists() or metadata_path.exists():
+                    workflow_path = test_suite_path.parent
+                    repository = self._normalize_name(workflow_path.parent.name)
+                    test_suite = self._normalize_name(test_suite_path.name, "_")
+                    test_metric_args = MetricReporterArgs(
+                        repository=repository,
+                        workflow=workflow_path.name,
+                        test_suite=test_suite,
+                        metadata_path=metadata_path,
+                        artifact_path=artifact_path,
+                        results_csv_report_path=(
+                            Path(self.metric_reporter_config.reports_dir)
+                            / f"{repository}_{test_suite}_results.csv"
+                        ),
+                    )
+                    test_metric_args_list.append(test_metric_args)
 
             return test_metric_args_list
         except (OSError, ValidationError) as error:
@@ -2,33 +2,43 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
-"""Module for parsing test suite results from JUnit XML content."""
+"""Module for parsing test suite results from JUnit XML content.
+
+Test cases and their children are the bulk of the parsed results, so they are slotted
+dataclasses rather than pydantic models, which take several times the memory per instance. They
+keep the fields and keyword construction of models, and are validated as fields of the test
+suite models when a file is parsed rather than on construction.
+"""
 
 import logging
-import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Collection, Iterator, TextIO, TypeVar
 
 import defusedxml.ElementTree as ElementTree
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
 from scripts.common.error import BaseError
 
 
-class JUnitXmlProperty(BaseModel):
+@dataclass(slots=True)
+class JUnitXmlProperty:
     """Represents a property of a test case."""
 
     name: str
     value: str
 
 
-class JUnitXmlSkipped(BaseModel):
+@dataclass(slots=True)
+class JUnitXmlSkipped:
     """Represents a skipped test case."""
 
     reason: str | None = None
 
 
-class JUnitXmlFailure(BaseModel):
+@dataclass(slots=True)
+class JUnitXmlFailure:
     """Represents a failure of a test case."""
 
     message: str | None = None
@@ -36,13 +46,15 @@ class JUnitXmlFailure(BaseModel):
     text: str | None = None
 
 
-class JUnitXmlSystemOut(BaseModel):
+@dataclass(slots=True)
+class JUnitXmlSystemOut:
     """Represents system out information."""
 
     text: str | None = None
 
 
-class JUnitXmlTestCase(BaseModel):
+@dataclass(slots=True)
+class JUnitXmlTestCase:
     """Represents a test case in a test suite."""
 
     name: str
@@ -89,23 +101,112 @@ class JUnitXmlJobTestSuites(BaseModel):
     test_suites: list[JUnitXmlTestSuites]
 
 
+class JUnitXmlTestSuitesSummary(BaseModel):
+    """Represents the aggregated results of a collection of test suites, without test case
+    detail.
+    """
+
+    time: float | None = None
+    # The timestamp of the first test suite that has one
+    timestamp: str | None = None
+    # The number of test cases, which may differ from the 'tests' attributes of the test suites
+    tests: int = 0
+    failures: int = 0
+    skipped: int = 0
+    # The summation of the test case times in seconds
+    run_time: float = 0
+    # Playwright only. The number of test cases annotated as 'fixme'.
+    fixme: int = 0
+    # Playwright only. The number of test cases with a trace.zip attachment in their system-out.
+    retry: int = 0
+
+    @classmethod
+    def from_test_suites(cls, test_suites: JUnitXmlTestSuites) -> "JUnitXmlTestSuitesSummary":
+        """Aggregate parsed test suites.
+
+        Args:
+            test_suites (JUnitXmlTestSuites): The parsed test suites.
+
+        Returns:
+            JUnitXmlTestSuitesSummary: The aggregated results.
+        """
+        summary = cls(time=test_suites.time)
+        for suite in test_suites.test_suites:
+            if not summary.timestamp and suite.timestamp:
+                summary.timestamp = suite.timestamp
+            summary.tests += len(suite.test_cases)
+            summary.failures += suite.failures
+            summary.skipped += suite.skipped if suite.skipped else 0
+            for case in suite.test_cases:
+                if case.time:
+                    summary.run_time += case.time
+                if case.properties and any(p.name == "fixme" for p in case.properties):
+                    summary.fixme += 1
+                if (
+                    case.system_out
+                    and case.system_out.text
+                    and "trace.zip" in case.system_out.text
+                ):
+                    summary.retry += 1
+        return summary
+
+
+class JUnitXmlJobTestSuitesSummary(BaseModel):
+    """Represents the aggregated test suite results for a CircleCI job."""
+
+    job: int
+    test_suites: list[JUnitXmlTestSuitesSummary]
+
+
 class JUnitXmlParserError(BaseError):
     """Custom exception for errors raised by the JUnit XML parser."""
 
     pass
 
 
+# Validates the name and time attributes of test cases, which are all the aggregation needs
+_TEST_CASE_ATTRIBUTES_ADAPTER = TypeAdapter(list[tuple[str, float | None]])
+# Validates the properties, skipped and failure children of test cases, as parsing them does
+_TEST_CASE_CHILDREN_ADAPTER = TypeAdapter(
+    list[tuple[list[JUnitXmlProperty] | None, JUnitXmlSkipped | None, JUnitXmlFailure | None]]
+)
+
+_Result = TypeVar("_Result", bound=BaseModel)
+
+
+class _NulStrippingReader:
+    """File-like wrapper removing NUL characters, which are invalid in XML, while reading."""
+
+    def __init__(self, file: TextIO) -> None:
+        self._file = file
+
+    def read(self, size: int = -1) -> str:
+        while True:
+            chunk = self._file.read(size)
+            content = chunk.replace("\x00", "")
+            # An empty result signals the end of the file to the parser, so keep reading past
+            # chunks made up of NUL characters only
+            if content or not chunk:
+                return content
+
+
 class JUnitXmlParser:
     """Parses JUnit XML files."""
 
     logger = logging.getLogger(__name__)
 
-    @staticmethod
-    def _normalize_xml_content(content: str) -> str:
-        return re.sub(r"\x00", "", content)
+    def __init__(self, workers: int = 1) -> None:
+        """Initialize the JUnitXmlParser.
+
+        Args:
+            workers (int): The number of processes parsing files in parallel. Defaults to 1,
+                           parsing in the calling process.
+        """
+        self._workers = workers
 
     def _parse_test_case(self, test_case, xml_file_path: Path) -> dict[str, Any]:
-        test_case_dict: dict[str, Any] = test_case.attrib
+        # The attributes are copied, since the element is cleared once it has been parsed
+        test_case_dict: dict[str, Any] = dict(test_case.attrib)
         for child in test_case:
             tag: str = child.tag
             if tag == "properties":
@@ -118,23 +219,54 @@ class JUnitXmlParser:
                 test_case_dict["failure"] = child.attrib
                 test_case_dict["failure"]["text"] = child.text
             else:
-                error_msg = f"Could not parse XML file, {xml_file_path}, unexpected tag: {tag}"
-                self.logger.error(error_msg)
-                raise JUnitXmlParserError(error_msg)
+                self._raise_unexpected_tag(tag, xml_file_path)
         return test_case_dict
 
-    def _parse_test_suite(self, test_suite, xml_file_path: Path) -> dict[str, Any]:
-        test_suite_dict: dict[str, Any] = test_suite.attrib
-        test_suite_dict["test_cases"] = [
-            self._parse_test_case(test_case, xml_file_path) for test_case in test_suite
-        ]
-        return test_suite_dict
-
-    def parse(self, artifact_path: Path) -> list[JUnitXmlJobTestSuites]:
+    def _summarize_test_case(
+        self, test_case, xml_file_path: Path
+    ) -> tuple[bool, bool, tuple[Any, Any, Any] | None]:
+        # Mirrors _parse_test_case, where a repeated child tag replaces the previous one. The
+        # attributes of the properties, skipped and failure children are returned for
+        # validation, the text of failures and system-out is a string and needs none.
+        properties = None
+        skipped = None
+        failure = None
+        system_out = None
+        for child in test_case:
+            tag: str = child.tag
+            if tag == "properties":
+                properties = [prop.attrib for prop in child]
+            elif tag == "skipped":
+                skipped = child.attrib
+            elif tag == "system-out":
+                system_out = child
+            elif tag == "failure":
+                failure = child.attrib
+            else:
+                self._raise_unexpected_tag(tag, xml_file_path)
+        fixme = properties is not None and any(p.get("name") == "fixme" for p in properties)
+        retry = system_out is not None and "trace.zip" in (system_out.text or "")
+        if properties is None and skipped is None and failure is None:
+            return fixme, retry, None
+        return fixme, retry, (properties, skipped, failure)
+
+    def _raise_unexpected_tag(self, tag: str, xml_file_path: Path) -> None:
+        error_msg = f"Could not parse XML file, {xml_file_path}, unexpected tag: {tag}"
+        self.logger.error(error_msg)
+        raise JUnitXmlParserError(error_msg)
+
+    def parse(
+        self, artifact_path: Path, jobs: Collection[int] | None = None
+    ) -> list[JUnitXmlJobTestSuites]:
         """Parse JUnit XML content from the specified directory.
 
+        With more than one worker, files are parsed in a process pool. Results are returned in
+        the same order, and the same error is raised, as when parsing sequentially.
+
         Args:
             artifact_path (Path): The path to the directory containing the JUnit XML test files.
+            jobs (Collection[int] | None): Only parse the directories of these job numbers.
+                                           Defaults to None, parsing all job directories.
 
         Returns:
             list[JUnitXmlJobTestSuites]: A list of parsed `JUnitXMLJobTestSuites` objects.
@@ -142,38 +274,230 @@ class JUnitXmlParser:
         Raises:
             JUnitXmlParserError: If there is an error reading or parsing the XML files.
         """
-        artifact_list: list[JUnitXmlJobTestSuites] = []
-        job_paths: list[Path] = sorted(artifact_path.iterdir())
-        for job_path in job_paths:
-            job_number = int(job_path.name)
-            test_suites_list: list[JUnitXmlTestSuites] = []
-            artifact_file_paths: list[Path] = sorted(job_path.glob("*.xml"))
-            for artifact_file_path in artifact_file_paths:
-                self.logger.info(f"Parsing {artifact_file_path}")
-                try:
-                    with artifact_file_path.open() as xml_file:
-                        content: str = xml_file.read()
-                        normalized_content: str = self._normalize_xml_content(content)
-
-                        root = ElementTree.fromstring(normalized_content)
-                        test_suites_dict: dict[str, Any] = root.attrib
-                        test_suites_dict["test_suites"] = [
-                            self._parse_test_suite(test_suite, artifact_file_path)
-                            for test_suite in root
-                        ]
-                        test_suites = JUnitXmlTestSuites(**test_suites_dict)
-
-                        test_suites_list.append(test_suites)
-                except (OSError, ElementTree.ParseError, ValidationError) as error:
-                    error_mapping: dict[type, str] = {
-                        OSError: f"Error reading the file {artifact_file_path}",
-                        ElementTree.ParseError: f"Invalid XML format for file {artifact_file_path}",
-                        ValidationError: f"Unexpected value or schema in file {artifact_file_path}",
-                    }
-                    error_msg = error_mapping[type(error)]
-                    self.logger.error(error_msg, exc_info=error)
-                    raise JUnitXmlParserError(error_msg, error)
-            artifact_list.append(
-                JUnitXmlJobTestSuites(job=job_number, test_suites=test_suites_list)
+        return [
+            JUnitXmlJobTestSuites(job=job_number, test_suites=test_suites)
+            for job_number, test_suites in self._map_jobs(
+                artifact_path, jobs, self._parse_file_to_json, JUnitXmlTestSuites
             )
-        return artifact_list
+        ]
+
+    def summarize(
+        self, artifact_path: Path, jobs: Collection[int] | None = None
+    ) -> list[JUnitXmlJobTestSuitesSummary]:
+        """Aggregate JUnit XML content from the specified directory.
+
+        Unlike `parse`, no model is built for the individual test cases, which makes this the
+        faster choice when only counts and times are needed. Files are read and validated as in
+        `parse`, down to the properties, skipped and failure elements of the test cases, so a
+        malformed file raises the same error. Aggregating the results of `parse` gives the same
+        summaries.
+
+        Args:
+            artifact_path (Path): The path to the directory containing the JUnit XML test files.
+            jobs (Collection[int] | None): Only summarize the directories of these job numbers.
+                                           Defaults to None, summarizing all job directories.
+
+        Returns:
+            list[JUnitXmlJobTestSuitesSummary]: A list of aggregated results per job.
+
+        Raises:
+            JUnitXmlParserError: If there is an error reading or parsing the XML files.
+        """
+        return [
+            JUnitXmlJobTestSuitesSummary(job=job_number, test_suites=summaries)
+            for job_number, summaries in self._map_jobs(
+                artifact_path, jobs, self._summarize_file_to_json, JUnitXmlTestSuitesSummary
+            )
+        ]
+
+    def _map_jobs(
+        self,
+        artifact_path: Path,
+        jobs: Collection[int] | None,
+        process_file: Callable[[Path], str],
+        model: type[_Result],
+    ) -> list[tuple[int, list[_Result]]]:
+        job_paths: list[tuple[int, Path]] = []
+        for job_path in sorted(artifact_path.iterdir()):
+            if not job_path.name.isdecimal():
+                self.logger.warning(f"Skipping {job_path}, its name is not a job number")
+                continue
+            job_paths.append((int(job_path.name), job_path))
+        job_files: list[tuple[int, list[Path]]] = [
+            (job_number, sorted(job_path.glob("*.xml")))
+            for job_number, job_path in job_paths
+            if jobs is None or job_number in jobs
+        ]
+        artifact_file_paths: list[Path] = [
+            artifact_file_path for _, file_paths in job_files for artifact_file_path in file_paths
+        ]
+        results = iter(self._map_files(artifact_file_paths, process_file, model))
+        return [
+            (job_number, [next(results) for _ in file_paths])
+            for job_number, file_paths in job_files
+        ]
+
+    def _map_files(
+        self,
+        artifact_file_paths: list[Path],
+        process_file: Callable[[Path], str],
+        model: type[_Result],
+    ) -> list[_Result]:
+        # Results are passed as JSON, which is considerably cheaper to transfer from worker
+        # processes and validate again than pickled models
+        if self._workers <= 1 or len(artifact_file_paths) <= 1:
+            return [
+                model.model_validate_json(process_file(file_path))
+                for file_path in artifact_file_paths
+            ]
+        # Hand out files in batches to limit the inter-process overhead, while still spreading
+        # the work evenly across the workers
+        chunk_size = max(len(artifact_file_paths) // (self._workers * 4), 1)
+        executor = ProcessPoolExecutor(max_workers=self._workers)
+        try:
+            # map yields results in submission order and raises the error of the first failed
+            # file in that order, which matches processing sequentially
+            return [
+                model.model_validate_json(result_json)
+                for result_json in executor.map(
+                    process_file, artifact_file_paths, chunksize=chunk_size
+                )
+            ]
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def _parse_file_to_json(self, artifact_file_path: Path) -> str:
+        return self.parse_file(artifact_file_path).model_dump_json()
+
+    def _summarize_file_to_json(self, artifact_file_path: Path) -> str:
+        return self.summarize_file(artifact_file_path).model_dump_json()
+
+    def parse_file(self, artifact_file_path: Path) -> JUnitXmlTestSuites:
+        """Parse a JUnit XML file.
+
+        Args:
+            artifact_file_path (Path): The path to the JUnit XML file.
+
+        Returns:
+            JUnitXmlTestSuites: The parsed test suites.
+
+        Raises:
+            JUnitXmlParserError: If there is an error reading or parsing the XML file.
+        """
+        self.logger.info(f"Parsing {artifact_file_path}")
+        try:
+            with artifact_file_path.open() as xml_file:
+                test_suites_dict = self._parse_elements(
+                    _NulStrippingReader(xml_file), artifact_file_path
+                )
+                return JUnitXmlTestSuites(**test_suites_dict)
+        except (OSError, ElementTree.ParseError, ValidationError) as error:
+            raise self._map_error(error, artifact_file_path)
+
+    def summarize_file(self, artifact_file_path: Path) -> JUnitXmlTestSuitesSummary:
+        """Aggregate a JUnit XML file.
+
+        Args:
+            artifact_file_path (Path): The path to the JUnit XML file.
+
+        Returns:
+            JUnitXmlTestSuitesSummary: The aggregated results of the test suites.
+
+        Raises:
+            JUnitXmlParserError: If there is an error reading or parsing the XML file.
+        """
+        self.logger.info(f"Summarizing {artifact_file_path}")
+        try:
+            with artifact_file_path.open() as xml_file:
+                return self._summarize_elements(_NulStrippingReader(xml_file), artifact_file_path)
+        except (OSError, ElementTree.ParseError, ValidationError) as error:
+            raise self._map_error(error, artifact_file_path)
+
+    def _map_error(self, error: Exception, artifact_file_path: Path) -> JUnitXmlParserError:
+        error_mapping: dict[type, str] = {
+            OSError: f"Error reading the file {artifact_file_path}",
+            ElementTree.ParseError: f"Invalid XML format for file {artifact_file_path}",
+            ValidationError: f"Unexpected value or schema in file {artifact_file_path}",
+        }
+        error_msg = error_mapping[type(error)]
+        self.logger.error(error_msg, exc_info=error)
+        return JUnitXmlParserError(error_msg, error)
+
+    @staticmethod
+    def _iterparse(xml_file: _NulStrippingReader) -> Iterator[tuple[str, int, Any]]:
+        # The file is parsed incrementally. The root element holds the test suites, each of its
+        # children a test suite and each of theirs a test case. The start of the root and test
+        # suite elements and the end of the test suite and test case elements are yielded with
+        # their depth, and the latter are cleared once processed, so the whole document is never
+        # held in memory.
+        depth = 0
+        for event, element in ElementTree.iterparse(xml_file, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth <= 2:
+                    yield event, depth, element
+                continue
+            depth -= 1
+            if 1 <= depth <= 2:
+                yield event, depth + 1, element
+                element.clear()
+
+    def _parse_elements(
+        self, xml_file: _NulStrippingReader, xml_file_path: Path
+    ) -> dict[str, Any]:
+        test_suites_dict: dict[str, Any] = {}
+        test_suite_dict: dict[str, Any] = {}
+        for event, depth, element in self._iterparse(xml_file):
+            if event == "start" and depth == 1:
+                test_suites_dict = {**element.attrib, "test_suites": []}
+            elif event == "start":
+                test_suite_dict = {**element.attrib, "test_cases": []}
+                test_suites_dict["test_suites"].append(test_suite_dict)
+            elif depth == 3:
+                test_suite_dict["test_cases"].append(self._parse_test_case(element, xml_file_path))
+        return test_suites_dict
+
+    def _summarize_elements(
+        self, xml_file: _NulStrippingReader, xml_file_path: Path
+    ) -> JUnitXmlTestSuitesSummary:
+        # The attributes are collected while streaming and only validated at the end of the
+        # file, so errors surface in the same order as in _parse_elements
+        test_suites_attributes: dict[str, Any] = {}
+        test_suite_attributes: list[dict[str, Any]] = []
+        test_case_attributes: list[tuple[Any, Any]] = []
+        test_case_children: list[tuple[Any, Any, Any]] = []
+        fixme = 0
+        retry = 0
+        for event, depth, element in self._iterparse(xml_file):
+            if event == "start" and depth == 1:
+                test_suites_attributes = dict(element.attrib)
+            elif event == "start":
+                test_suite_attributes.append(dict(element.attrib))
+            elif depth == 3:
+                test_case_attributes.append((element.get("name"), element.get("time")))
+                case_fixme, case_retry, children = self._summarize_test_case(
+                    element, xml_file_path
+                )
+                fixme += case_fixme
+                retry += case_retry
+                if children is not None:
+                    test_case_children.append(children)
+
+        summary = JUnitXmlTestSuitesSummary(
+            time=JUnitXmlTestSuites(**{**test_suites_attributes, "test_suites": []}).time,
+            tests=len(test_case_attributes),
+            fixme=fixme,
+            retry=retry,
+        )
+        for attributes in test_suite_attributes:
+            suite = JUnitXmlTestSuite(**{**attributes, "test_cases": []})
+            if not summary.timestamp and suite.timestamp:
+                summary.timestamp = suite.timestamp
+            summary.failures += suite.failures
+            summary.skipped += suite.skipped if suite.skipped else 0
+        _TEST_CASE_CHILDREN_ADAPTER.validate_python(test_case_children)
+        # Sum in document order, so the floating point result matches from_test_suites
+        for _, time in _TEST_CASE_ATTRIBUTES_ADAPTER.validate_python(test_case_attributes):
+            if time:
+                summary.run_time += time
+        return summary
@@ -6,66 +6,340 @@
 
 import argparse
 import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, nullcontext
+from itertools import repeat
+from pathlib import Path
+
+from pydantic import BaseModel
 
 from scripts.metric_reporter.circleci_json_parser import (
     CircleCIJsonParserError,
     CircleCIJsonParser,
     CircleCIJobTestMetadata,
 )
-from scripts.metric_reporter.config import Config, InvalidConfigError
+from scripts.metric_reporter.config import (
+    Config,
+    InvalidConfigError,
+    MetricReporterArgs,
+    MetricReporterConfig,
+    OutputFormat,
+)
 from scripts.metric_reporter.junit_xml_parser import (
     JUnitXmlJobTestSuites,
+    JUnitXmlJobTestSuitesSummary,
     JUnitXmlParser,
     JUnitXmlParserError,
 )
-from scripts.metric_reporter.suite_reporter import SuiteReporter, ReporterError
+from scripts.metric_reporter.parquet_report_writer import (
+    ParquetReportWriter,
+    ParquetReportWriterError,
+)
+from scripts.metric_reporter.parse_manifest import ParseManifest, ParseManifestError
+from scripts.common.profiler import StageProfiler, stage
+from scripts.metric_reporter.suite_reporter import (
+    ReporterError,
+    SuiteReporter,
+    SuiteReporterResult,
+)
 
 # Configure logging
 logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+MANIFEST_DIR_NAME = "manifests"
+DISCOVERY_STAGE = "discovery"
+JSON_PARSE_STAGE = "JSON parse"
+XML_PARSE_STAGE = "XML parse"
+RECONCILE_STAGE = "reconcile"
+CSV_WRITE_STAGE = "CSV write"
+PARQUET_WRITE_STAGE = "Parquet write"
+
+
+class SuiteOutcome(BaseModel):
+    """The outcome of reporting a test suite."""
 
-def main(config_file: str = "config.ini") -> None:
+    repository: str
+    workflow: str
+    test_suite: str
+    # Wall time in seconds
+    duration: float = 0
+    results: list[SuiteReporterResult] = []
+    error: str | None = None
+
+
+def main(
+    config_file: str = "config.ini",
+    full: bool = False,
+    jobs: int = 1,
+    profile: bool = False,
+    profile_dir: str | None = None,
+) -> None:
     """Run the Metric Reporter.
 
+    An error in a test suite is logged and reported in the final summary without stopping the
+    other test suites.
+
     Args:
         config_file (str): Path to the configuration file.
                            Defaults to 'ecosystem-test-scripts/config.ini'.
+        full (bool): Ignore the parse manifests of previous runs and parse all job files.
+                     Defaults to False.
+        jobs (int): The number of worker processes reporting test suites concurrently.
+                    Defaults to 1, reporting one test suite after the other in this process.
+        profile (bool): Time the stages of the run and print them ranked by self time.
+                        Defaults to False.
+        profile_dir (str | None): Directory to write the cProfile statistics and tracemalloc
+                                  snapshots of each stage to, which implies 'profile'.
+                                  Defaults to None.
+    """
+    profiler: StageProfiler | None = None
+    if profile or profile_dir:
+        profiler = StageProfiler(Path(profile_dir) if profile_dir else None)
+        if jobs > 1:
+            # Stages run in the worker processes would not be recorded
+            logger.warning("Profiling reports the test suites in this process, ignoring --jobs")
+            jobs = 1
+    with profiler or nullcontext():
+        try:
+            logger.info(f"Starting Metric Reporter with configuration file: {config_file}")
+            # Loading the configuration discovers the test suites
+            with stage(DISCOVERY_STAGE):
+                config = Config(config_file)
+            reporter_config = config.metric_reporter_config
+            with ExitStack() as stack:
+                parquet_writer: ParquetReportWriter | None = None
+                if OutputFormat.PARQUET in reporter_config.output_formats:
+                    parquet_writer = stack.enter_context(
+                        ParquetReportWriter(Path(reporter_config.reports_dir))
+                    )
+                outcomes = report_suites(reporter_config, config.metric_reporter_args, full, jobs)
+                if parquet_writer:
+                    # The suite results share one file, so they are written here in suite order
+                    with stage(PARQUET_WRITE_STAGE):
+                        for outcome in outcomes:
+                            parquet_writer.write_suite_results(outcome.results)
+            log_summary(outcomes)
+            logger.info("Reporting complete")
+        except InvalidConfigError as error:
+            logger.error(f"Configuration error: {error}")
+        except ParquetReportWriterError as error:
+            logger.error(f"Parquet report error: {error}")
+        except Exception as error:
+            logger.error(f"Unexpected error: {error}", exc_info=error)
+    if profiler:
+        print(profiler.summary())
+
+
+def report_suites(
+    reporter_config: MetricReporterConfig,
+    args_list: list[MetricReporterArgs],
+    full: bool = False,
+    jobs: int = 1,
+) -> list[SuiteOutcome]:
+    """Report the results of test suites, isolating the errors of each test suite.
+
+    Args:
+        reporter_config (MetricReporterConfig): The Metric Reporter configuration.
+        args_list (list[MetricReporterArgs]): The paths and names of the test suites.
+        full (bool): Ignore the parse manifests of previous runs and parse all job files.
+                     Defaults to False.
+        jobs (int): The number of worker processes reporting test suites concurrently.
+                    Defaults to 1, reporting in this process. With more than one, JUnit XML
+                    files are parsed in the worker processes, ignoring 'parse_workers'.
+
+    Returns:
+        list[SuiteOutcome]: The outcome of each test suite, in the order of the arguments.
+    """
+    if jobs <= 1 or len(args_list) <= 1:
+        return [run_suite(reporter_config, args, full) for args in args_list]
+    if reporter_config.parse_workers > 1:
+        # Every worker process would start a pool of parse workers of its own
+        logger.warning("Test suites are reported by --jobs processes, ignoring parse_workers")
+        reporter_config = reporter_config.model_copy(update={"parse_workers": 1})
+    # Test suites have their own files, manifests and reports, so they are independent
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(run_suite, repeat(reporter_config), args_list, repeat(full)))
+
+
+def run_suite(
+    reporter_config: MetricReporterConfig, args: MetricReporterArgs, full: bool = False
+) -> SuiteOutcome:
+    """Report the results of a test suite, catching and recording any error.
+
+    Args:
+        reporter_config (MetricReporterConfig): The Metric Reporter configuration.
+        args (MetricReporterArgs): The paths and names of the test suite.
+        full (bool): Ignore the parse manifest of previous runs and parse all job files.
+                     Defaults to False.
+
+    Returns:
+        SuiteOutcome: The results of the test suite, or the error that stopped it.
     """
+    outcome = SuiteOutcome(
+        repository=args.repository, workflow=args.workflow, test_suite=args.test_suite
+    )
+    start = time.perf_counter()
     try:
-        logger.info(f"Starting Metric Reporter with configuration file: {config_file}")
-        config = Config(config_file)
-        for args in config.metric_reporter_args:
-            logger.info(f"Reporting for {args.repository} {args.workflow} {args.test_suite}")
-            metadata_list: list[CircleCIJobTestMetadata] | None = None
-            if args.metadata_path.is_dir():
-                circleci_parser = CircleCIJsonParser()
-                metadata_list = circleci_parser.parse(args.metadata_path)
-
-            artifact_list: list[JUnitXmlJobTestSuites] | None = None
-            if args.artifact_path.is_dir():
-                junit_xml_parser = JUnitXmlParser()
-                artifact_list = junit_xml_parser.parse(args.artifact_path)
-
-            suite_reporter = SuiteReporter(
-                args.repository, args.workflow, args.test_suite, metadata_list, artifact_list
-            )
-            suite_reporter.output_results_csv(args.results_csv_report_path)
-        logger.info("Reporting complete")
-    except InvalidConfigError as error:
-        logger.error(f"Configuration error: {error}")
-    except CircleCIJsonParserError as error:
-        logger.error(f"CircleCI JSON Parsing error: {error}")
-    except JUnitXmlParserError as error:
-        logger.error(f"JUnit XML Parsing error: {error}")
-    except ReporterError as error:
-        logger.error(f"Test Suite Reporter error: {error}")
+        outcome.results = report_suite(reporter_config, args, full)
+    except (
+        CircleCIJsonParserError,
+        JUnitXmlParserError,
+        ReporterError,
+        ParseManifestError,
+        ParquetReportWriterError,
+    ) as error:
+        error_mapping: dict[type, str] = {
+            CircleCIJsonParserError: "CircleCI JSON Parsing error",
+            JUnitXmlParserError: "JUnit XML Parsing error",
+            ReporterError: "Test Suite Reporter error",
+            ParseManifestError: "Parse manifest error",
+            ParquetReportWriterError: "Parquet report error",
+        }
+        outcome.error = f"{error_mapping[type(error)]}: {error}"
+        logger.error(outcome.error)
     except Exception as error:
-        logger.error(f"Unexpected error: {error}", exc_info=error)
+        outcome.error = f"Unexpected error: {error}"
+        logger.error(outcome.error, exc_info=error)
+    outcome.duration = time.perf_counter() - start
+    return outcome
+
+
+def log_summary(outcomes: list[SuiteOutcome]) -> None:
+    """Log the time taken by each test suite and the failed test suites.
+
+    The summary is logged as a warning, the level the reporter logs at, so it is shown for
+    successful runs too.
+
+    Args:
+        outcomes (list[SuiteOutcome]): The outcomes of the test suites.
+    """
+    failures = [outcome for outcome in outcomes if outcome.error]
+    lines = [f"Reported {len(outcomes) - len(failures)} of {len(outcomes)} test suites"]
+    for outcome in outcomes:
+        status = f"failed, {outcome.error}" if outcome.error else "ok"
+        lines.append(
+            f"  {outcome.repository} {outcome.workflow} {outcome.test_suite} "
+            f"({outcome.duration:.2f}s): {status}"
+        )
+    logger.warning("\n".join(lines))
+
+
+def report_suite(
+    reporter_config: MetricReporterConfig,
+    args: MetricReporterArgs,
+    full: bool = False,
+) -> list[SuiteReporterResult]:
+    """Report the results of a test suite as CSV and Parquet test cases, as configured.
+
+    The results are returned so the Parquet suite results of all test suites can be written
+    to a single file.
+
+    Args:
+        reporter_config (MetricReporterConfig): The Metric Reporter configuration.
+        args (MetricReporterArgs): The paths and names of the test suite.
+        full (bool): Ignore the parse manifest of previous runs and parse all job files.
+                     Defaults to False.
+
+    Returns:
+        list[SuiteReporterResult]: The results of the test suite.
+
+    Raises:
+        CircleCIJsonParserError: If the test metadata cannot be parsed.
+        JUnitXmlParserError: If the test artifacts cannot be parsed.
+        ReporterError: If the results cannot be reported.
+        ParseManifestError: If the parse manifest cannot be read or written.
+        ParquetReportWriterError: If the Parquet test cases cannot be written.
+    """
+    logger.info(f"Reporting for {args.repository} {args.workflow} {args.test_suite}")
+    manifest = ParseManifest(
+        Path(reporter_config.state_dir, MANIFEST_DIR_NAME)
+        / args.repository
+        / args.workflow
+        / f"{args.test_suite}.json"
+    )
+    if full:
+        manifest.clear()
+    with stage(DISCOVERY_STAGE):
+        changed_jobs = manifest.refresh(args.metadata_path, args.artifact_path)
+
+    metadata_list: list[CircleCIJobTestMetadata] | None = None
+    if args.metadata_path.is_dir():
+        circleci_parser = CircleCIJsonParser()
+        with stage(JSON_PARSE_STAGE):
+            metadata_list = circleci_parser.parse(args.metadata_path, changed_jobs)
+
+    # Test case rows need fully parsed artifacts, otherwise aggregating them is enough
+    write_test_cases = (
+        OutputFormat.PARQUET in reporter_config.output_formats
+        and reporter_config.parquet_test_cases
+    )
+    artifact_list: list[JUnitXmlJobTestSuites] | list[JUnitXmlJobTestSuitesSummary] | None = None
+    parsed_artifact_list: list[JUnitXmlJobTestSuites] = []
+    if args.artifact_path.is_dir():
+        junit_xml_parser = JUnitXmlParser(reporter_config.parse_workers)
+        with stage(XML_PARSE_STAGE):
+            if write_test_cases:
+                parsed_artifact_list = junit_xml_parser.parse(args.artifact_path, changed_jobs)
+                artifact_list = parsed_artifact_list
+            else:
+                artifact_list = junit_xml_parser.summarize(args.artifact_path, changed_jobs)
+
+    with stage(RECONCILE_STAGE):
+        suite_reporter = SuiteReporter(
+            args.repository,
+            args.workflow,
+            args.test_suite,
+            metadata_list,
+            artifact_list,
+            manifest.cached_results(),
+        )
+    if OutputFormat.CSV in reporter_config.output_formats:
+        with stage(CSV_WRITE_STAGE):
+            suite_reporter.output_results_csv(args.results_csv_report_path)
+    if write_test_cases:
+        with stage(PARQUET_WRITE_STAGE):
+            ParquetReportWriter(Path(reporter_config.reports_dir)).write_test_cases(
+                args.repository, args.workflow, args.test_suite, parsed_artifact_list
+            )
+    with stage(RECONCILE_STAGE):
+        manifest.record(suite_reporter.results)
+        manifest.save()
+    return suite_reporter.results
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run the Metric Reporter")
     parser.add_argument("--config", help="Path to the config.ini file", default="config.ini")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the parse manifests of previous runs and parse all job files",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes reporting test suites concurrently",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time the stages of the run and print them ranked by self time",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        metavar="DIR",
+        help="Also write cProfile statistics and tracemalloc snapshots of each stage to DIR",
+    )
     parser_args = parser.parse_args()
-    main(parser_args.config)
+    if parser_args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    main(
+        parser_args.config,
+        parser_args.full,
+        parser_args.jobs,
+        parser_args.profile,
+        parser_args.profile_dir,
+    )
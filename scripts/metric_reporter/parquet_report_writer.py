@@ -0,0 +1,263 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Module for writing test suite results as Parquet tables."""
+
+import logging
+from contextlib import ExitStack
+from pathlib import Path
+from types import ModuleType, TracebackType
+from typing import Any
+
+from scripts.common.atomic_write import atomic_write
+from scripts.common.error import BaseError
+from scripts.metric_reporter.junit_xml_parser import JUnitXmlJobTestSuites, JUnitXmlTestCase
+from scripts.metric_reporter.suite_reporter import (
+    FAILURE_RESULT,
+    SKIPPED_RESULT,
+    SuiteReporterResult,
+)
+
+SUITE_RESULTS_FILE_NAME = "suite_results.parquet"
+TEST_CASES_DIR_NAME = "test_cases"
+SUCCESS_RESULT = "success"
+COMPRESSION = "zstd"
+
+
+class ParquetReportWriterError(BaseError):
+    """Exception raised for errors in the ParquetReportWriter."""
+
+    pass
+
+
+class ParquetReportWriter:
+    """Writes test suite results as Parquet tables.
+
+    The results of all test suites go to a single 'suite_results.parquet' file in the reports
+    directory, one row group per test suite. Optionally, the test cases of each job parsed from
+    JUnit XML artifacts are written to '<reports_dir>/test_cases/<repository>_<test_suite>/',
+    one file per job, so new jobs add files without rewriting the existing ones.
+
+    Requires the optional pyarrow package.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, reports_dir: Path) -> None:
+        """Initialize the ParquetReportWriter.
+
+        Args:
+            reports_dir (Path): The directory of the reports.
+
+        Raises:
+            ParquetReportWriterError: If pyarrow is not installed.
+        """
+        self._reports_dir = reports_dir
+        self._pa, self._pq = self._import_pyarrow()
+        pa = self._pa
+        # Dictionary encoded strings for columns with few distinct values
+        label = pa.dictionary(pa.int32(), pa.string())
+        self._suite_results_schema = pa.schema(
+            [
+                ("repository", label),
+                ("workflow", label),
+                ("test_suite", label),
+                ("date", pa.string()),
+                ("timestamp", pa.string()),
+                ("job", pa.int64()),
+                ("status", label),
+                ("execution_time", pa.float64()),
+                ("job_execution_time", pa.float64()),
+                ("run_time", pa.float64()),
+                ("success", pa.int64()),
+                ("failure", pa.int64()),
+                ("skipped", pa.int64()),
+                ("fixme", pa.int64()),
+                ("unknown", pa.int64()),
+                ("retry", pa.int64()),
+                ("total", pa.int64()),
+                ("success_rate", pa.float64()),
+                ("failure_rate", pa.float64()),
+                ("skipped_rate", pa.float64()),
+                ("fixme_rate", pa.float64()),
+                ("unknown_rate", pa.float64()),
+            ]
+        )
+        self._test_cases_schema = pa.schema(
+            [
+                ("repository", label),
+                ("workflow", label),
+                ("test_suite", label),
+                ("job", pa.int64()),
+                ("suite", pa.string()),
+                ("classname", pa.string()),
+                ("name", pa.string()),
+                ("time", pa.float64()),
+                ("result", label),
+                ("fixme", pa.bool_()),
+                ("retry", pa.bool_()),
+                ("failure_message", pa.string()),
+            ]
+        )
+        self._exit_stack = ExitStack()
+        self._suite_results_writer: Any = None
+
+    def _import_pyarrow(self) -> tuple[ModuleType, ModuleType]:
+        # pyarrow is an optional dependency, only imported when Parquet output is configured
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as error:
+            error_msg = "Parquet output requires the pyarrow package to be installed"
+            self.logger.error(error_msg, exc_info=error)
+            raise ParquetReportWriterError(error_msg, error)
+        return pyarrow, pyarrow.parquet
+
+    def __enter__(self) -> "ParquetReportWriter":
+        """Open the suite results file, which is only moved into place once closed without
+        error.
+
+        Raises:
+            ParquetReportWriterError: If the suite results file cannot be created.
+        """
+        path = self._reports_dir / SUITE_RESULTS_FILE_NAME
+        try:
+            self._reports_dir.mkdir(parents=True, exist_ok=True)
+            file = self._exit_stack.enter_context(atomic_write(path))
+            self._suite_results_writer = self._exit_stack.enter_context(
+                self._pq.ParquetWriter(file, self._suite_results_schema, compression=COMPRESSION)
+            )
+        except OSError as error:
+            # Discard the temporary file rather than moving it into place
+            self._exit_stack.__exit__(type(error), error, error.__traceback__)
+            error_msg = f"The Parquet report file {path} cannot be created"
+            self.logger.error(error_msg, exc_info=error)
+            raise ParquetReportWriterError(error_msg, error)
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self._exit_stack.__exit__(exc_type, exc_value, traceback)
+        self._suite_results_writer = None
+
+    def write_suite_results(self, results: list[SuiteReporterResult]) -> None:
+        """Append the results of a test suite as a row group of the suite results file.
+
+        Args:
+            results (list[SuiteReporterResult]): The results of the test suite.
+
+        Raises:
+            ParquetReportWriterError: If the writer is not open or the file cannot be written.
+        """
+        if self._suite_results_writer is None:
+            raise ParquetReportWriterError("The ParquetReportWriter is not open")
+        if not results:
+            return
+        # Columns are filled directly from the results, the rates are computed once per row
+        columns: dict[str, list[Any]] = {name: [] for name in self._suite_results_schema.names}
+        for result in results:
+            columns["repository"].append(result.repository)
+            columns["workflow"].append(result.workflow)
+            columns["test_suite"].append(result.test_suite)
+            columns["date"].append(result.date)
+            columns["timestamp"].append(result.timestamp)
+            columns["job"].append(result.job)
+            columns["status"].append(result.status.value)
+            columns["execution_time"].append(result.execution_time)
+            columns["job_execution_time"].append(result.job_execution_time)
+            columns["run_time"].append(result.run_time)
+            columns["success"].append(result.success)
+            columns["failure"].append(result.failure)
+            columns["skipped"].append(result.skipped)
+            columns["fixme"].append(result.fixme)
+            columns["unknown"].append(result.unknown)
+            columns["retry"].append(result.retry)
+            columns["total"].append(result.total)
+            columns["success_rate"].append(result.success_rate)
+            columns["failure_rate"].append(result.failure_rate)
+            columns["skipped_rate"].append(result.skipped_rate)
+            columns["fixme_rate"].append(result.fixme_rate)
+            columns["unknown_rate"].append(result.unknown_rate)
+        try:
+            self._suite_results_writer.write_table(
+                self._pa.table(columns, schema=self._suite_results_schema)
+            )
+        except OSError as error:
+            error_msg = "The Parquet suite results cannot be written"
+            self.logger.error(error_msg, exc_info=error)
+            raise ParquetReportWriterError(error_msg, error)
+
+    def write_test_cases(
+        self,
+        repository: str,
+        workflow: str,
+        test_suite: str,
+        artifacts_list: list[JUnitXmlJobTestSuites],
+    ) -> None:
+        """Write the test cases of each job to its own file, replacing an existing one.
+
+        Args:
+            repository (str): The repository associated to the test suite.
+            workflow (str): The workflow associated to the test suite.
+            test_suite (str): The test suite name.
+            artifacts_list (list[JUnitXmlJobTestSuites]): The test results from JUnit XML
+                                                          artifacts.
+
+        Raises:
+            ParquetReportWriterError: If a file cannot be written.
+        """
+        test_cases_dir = self._reports_dir / TEST_CASES_DIR_NAME / f"{repository}_{test_suite}"
+        for artifact in artifacts_list:
+            columns: dict[str, list[Any]] = {name: [] for name in self._test_cases_schema.names}
+            for test_suites in artifact.test_suites:
+                for suite in test_suites.test_suites:
+                    for case in suite.test_cases:
+                        columns["suite"].append(suite.name)
+                        columns["classname"].append(case.classname)
+                        columns["name"].append(case.name)
+                        columns["time"].append(case.time)
+                        columns["result"].append(self._result(case))
+                        columns["fixme"].append(
+                            any(p.name == "fixme" for p in case.properties or [])
+                        )
+                        columns["retry"].append(
+                            bool(
+                                case.system_out
+                                and case.system_out.text
+                                and "trace.zip" in case.system_out.text
+                            )
+                        )
+                        columns["failure_message"].append(
+                            case.failure.message if case.failure else None
+                        )
+            rows = len(columns["name"])
+            columns["repository"] = [repository] * rows
+            columns["workflow"] = [workflow] * rows
+            columns["test_suite"] = [test_suite] * rows
+            columns["job"] = [artifact.job] * rows
+            path = test_cases_dir / f"{artifact.job}.parquet"
+            try:
+                test_cases_dir.mkdir(parents=True, exist_ok=True)
+                with atomic_write(path) as file:
+                    self._pq.write_table(
+                        self._pa.table(columns, schema=self._test_cases_schema),
+                        file,
+                        compression=COMPRESSION,
+                    )
+            except OSError as error:
+                error_msg = f"The Parquet test case file {path} cannot be written"
+                self.logger.error(error_msg, exc_info=error)
+                raise ParquetReportWriterError(error_msg, error)
+
+    @staticmethod
+    def _result(case: JUnitXmlTestCase) -> str:
+        if case.failure:
+            return FAILURE_RESULT
+        if case.skipped:
+            return SKIPPED_RESULT
+        return SUCCESS_RESULT
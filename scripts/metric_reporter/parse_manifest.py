@@ -0,0 +1,217 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""ParseManifest and related objects"""
+
+import hashlib
+import logging
+from pathlib import Path
+
+from pydantic import BaseModel, ValidationError
+
+from scripts.common.atomic_write import atomic_write
+from scripts.common.error import BaseError
+from scripts.metric_reporter.suite_reporter import SuiteReporterResult
+
+
+class ManifestFile(BaseModel):
+    """The fingerprint of a job file."""
+
+    # Relative to the test suite directory
+    path: str
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+class ManifestJob(BaseModel):
+    """The files of a job and the result reported from them."""
+
+    files: list[ManifestFile]
+    # None if the files yield no result, for example a canceled job without artifacts
+    result: SuiteReporterResult | None = None
+
+
+class ManifestData(BaseModel):
+    """The content of a manifest file."""
+
+    jobs: dict[int, ManifestJob] = {}
+
+
+class ParseManifestError(BaseError):
+    """Custom exception class for ParseManifest errors."""
+
+    pass
+
+
+class ParseManifest:
+    """Persist the files parsed for a test suite and the result of each job.
+
+    Job files are immutable once scraped, so a job is only parsed again if one of its files was
+    added, removed or changed. A file whose size and modification time are unchanged is
+    considered unchanged; otherwise its content hash decides. The expected structure is
+    '<metadata_path>/<job_number>.json' for test metadata and
+    '<artifact_path>/<job_number>/*.xml' for JUnit XML artifacts.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, path: Path) -> None:
+        """Initialize the ParseManifest, loading an existing manifest from the given path.
+
+        Args:
+            path (Path): The path of the JSON file holding the manifest.
+
+        Raises:
+            ParseManifestError: If the manifest file cannot be read or has an unexpected format.
+        """
+        self._path = path
+        self._jobs: dict[int, ManifestJob] = self._load()
+        # The jobs found new or changed by the last call to refresh
+        self._changed_jobs: dict[int, list[ManifestFile]] = {}
+
+    def _load(self) -> dict[int, ManifestJob]:
+        if not self._path.exists():
+            return {}
+        try:
+            return ManifestData.model_validate_json(self._path.read_bytes()).jobs
+        except (OSError, ValidationError) as error:
+            error_msg = f"Unable to load the parse manifest from {self._path}"
+            self.logger.error(error_msg, exc_info=error)
+            raise ParseManifestError(error_msg, error)
+
+    def clear(self) -> None:
+        """Forget all recorded jobs, so the next refresh reports every job as changed."""
+        self._jobs = {}
+
+    def refresh(self, metadata_path: Path, artifact_path: Path) -> set[int]:
+        """Compare the job files on disk with the manifest.
+
+        Jobs whose files were removed are dropped from the manifest.
+
+        Args:
+            metadata_path (Path): The test metadata directory of the test suite.
+            artifact_path (Path): The test artifact directory of the test suite.
+
+        Returns:
+            set[int]: The numbers of the new or changed jobs, which need to be parsed.
+
+        Raises:
+            ParseManifestError: If the job files cannot be read.
+        """
+        try:
+            job_files = self._scan(metadata_path, artifact_path)
+        except OSError as error:
+            error_msg = f"Unable to read the job files of {metadata_path.parent}"
+            self.logger.error(error_msg, exc_info=error)
+            raise ParseManifestError(error_msg, error)
+
+        self._jobs = {job: entry for job, entry in self._jobs.items() if job in job_files}
+        self._changed_jobs = {}
+        for job, files in job_files.items():
+            entry = self._jobs.get(job)
+            if entry is not None and self._contents(entry.files) == self._contents(files):
+                # Keep the modification times current, so touched files are not hashed again
+                entry.files = files
+            else:
+                self._changed_jobs[job] = files
+        self.logger.info(
+            f"{len(self._changed_jobs)} of {len(job_files)} jobs changed in {metadata_path.parent}"
+        )
+        return set(self._changed_jobs)
+
+    def _scan(self, metadata_path: Path, artifact_path: Path) -> dict[int, list[ManifestFile]]:
+        suite_path = metadata_path.parent
+        previous_files: dict[str, ManifestFile] = {
+            file.path: file for entry in self._jobs.values() for file in entry.files
+        }
+        job_files: dict[int, list[ManifestFile]] = {}
+        if metadata_path.is_dir():
+            for file_path in metadata_path.glob("*.json"):
+                job = self._job_number(file_path, file_path.stem)
+                if job is None:
+                    continue
+                job_files.setdefault(job, []).append(
+                    self._fingerprint(file_path, suite_path, previous_files)
+                )
+        if artifact_path.is_dir():
+            for job_path in artifact_path.iterdir():
+                job = self._job_number(job_path, job_path.name)
+                if job is None:
+                    continue
+                files = job_files.setdefault(job, [])
+                files.extend(
+                    self._fingerprint(file_path, suite_path, previous_files)
+                    for file_path in job_path.glob("*.xml")
+                )
+        for files in job_files.values():
+            files.sort(key=lambda file: file.path)
+        return job_files
+
+    def _job_number(self, path: Path, name: str) -> int | None:
+        # Files and directories of jobs are named after the job number, others are not parsed
+        if not name.isdecimal():
+            self.logger.warning(f"Skipping {path}, its name is not a job number")
+            return None
+        return int(name)
+
+    @staticmethod
+    def _fingerprint(
+        file_path: Path, suite_path: Path, previous_files: dict[str, ManifestFile]
+    ) -> ManifestFile:
+        relative_path = file_path.relative_to(suite_path).as_posix()
+        stat = file_path.stat()
+        previous = previous_files.get(relative_path)
+        if previous and previous.size == stat.st_size and previous.mtime_ns == stat.st_mtime_ns:
+            return previous
+        with file_path.open("rb") as file:
+            sha256 = hashlib.file_digest(file, "sha256").hexdigest()
+        return ManifestFile(
+            path=relative_path, size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha256=sha256
+        )
+
+    @staticmethod
+    def _contents(files: list[ManifestFile]) -> list[tuple[str, str]]:
+        # A file that was only touched has the same hash, so its job is not parsed again
+        return [(file.path, file.sha256) for file in files]
+
+    def cached_results(self) -> list[SuiteReporterResult]:
+        """Get the results of the jobs unchanged since they were recorded.
+
+        Returns:
+            list[SuiteReporterResult]: The cached results.
+        """
+        return [
+            entry.result
+            for job, entry in self._jobs.items()
+            if job not in self._changed_jobs and entry.result is not None
+        ]
+
+    def record(self, results: list[SuiteReporterResult]) -> None:
+        """Record the results of the jobs changed at the last refresh. Call `save` to persist
+        them.
+
+        Args:
+            results (list[SuiteReporterResult]): The reported results, which may include the
+                                                 cached results.
+        """
+        results_by_job = {result.job: result for result in results}
+        for job, files in self._changed_jobs.items():
+            self._jobs[job] = ManifestJob(files=files, result=results_by_job.get(job))
+        self._changed_jobs = {}
+
+    def save(self) -> None:
+        """Write the manifest to disk.
+
+        Raises:
+            ParseManifestError: If the manifest file cannot be written.
+        """
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with atomic_write(self._path, "w") as file:
+                file.write(ManifestData(jobs=self._jobs).model_dump_json())
+        except OSError as error:
+            error_msg = f"Unable to save the parse manifest to {self._path}"
+            self.logger.error(error_msg, exc_info=error)
+            raise ParseManifestError(error_msg, error)
@@ -15,7 +15,11 @@ from pydantic import BaseModel
 
 from scripts.common.error import BaseError
 from scripts.metric_reporter.circleci_json_parser import CircleCIJobTestMetadata
-from scripts.metric_reporter.junit_xml_parser import JUnitXmlJobTestSuites
+from scripts.metric_reporter.junit_xml_parser import (
+    JUnitXmlJobTestSuites,
+    JUnitXmlJobTestSuitesSummary,
+    JUnitXmlTestSuitesSummary,
+)
 
 DATE_FORMAT = "%Y-%m-%d"
 DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
@@ -23,6 +27,8 @@ SUCCESS_RESULTS = {"success", "system-out"}
 FAILURE_RESULT = "failure"
 SKIPPED_RESULT = "skipped"
 CANCELED_JOB_STATUS = "canceled"
+# CSV report fields in seconds, written as "0" rather than "0.0" when zero
+ZERO_AS_INTEGER_FIELDS = ("Execution Time", "Run Time")
 
 
 class Status(Enum):
@@ -177,7 +183,8 @@ class SuiteReporter:
         workflow: str,
         test_suite: str,
         metadata_list: list[CircleCIJobTestMetadata] | None,
-        artifacts_list: list[JUnitXmlJobTestSuites] | None,
+        artifacts_list: list[JUnitXmlJobTestSuites] | list[JUnitXmlJobTestSuitesSummary] | None,
+        cached_results: list[SuiteReporterResult] | None = None,
     ) -> None:
         """Initialize the reporter with the directory containing test result data.
 
@@ -187,11 +194,14 @@ class SuiteReporter:
             test_suite (str): The test suite name.
             metadata_list (list[CircleCIJobTestMetadata] | None): The metadata from CircleCI test
                                                                   jobs.
-            artifacts_list (list[JUnitXmlJobTestSuites] | None): The test results from JUnit XML
-                                                                 artifacts.
+            artifacts_list (list[JUnitXmlJobTestSuites] | list[JUnitXmlJobTestSuitesSummary] | None):
+                The test results from JUnit XML artifacts, either parsed or aggregated.
+            cached_results (list[SuiteReporterResult] | None): Results of previous runs for jobs
+                                                               absent from the metadata and
+                                                               artifacts lists. Defaults to None.
         """
         self.results: list[SuiteReporterResult] = self._parse_results(
-            repository, workflow, test_suite, metadata_list, artifacts_list
+            repository, workflow, test_suite, metadata_list, artifacts_list, cached_results
         )
 
     def _parse_results(
@@ -200,7 +210,8 @@ class SuiteReporter:
         workflow: str,
         test_suite: str,
         metadata_list: list[CircleCIJobTestMetadata] | None,
-        artifacts_list: list[JUnitXmlJobTestSuites] | None,
+        artifacts_list: list[JUnitXmlJobTestSuites] | list[JUnitXmlJobTestSuitesSummary] | None,
+        cached_results: list[SuiteReporterResult] | None,
     ) -> list[SuiteReporterResult]:
         metadata_results_dict: dict[int, SuiteReporterResult] = {}
         if metadata_list:
@@ -227,6 +238,9 @@ class SuiteReporter:
         # Add remaining metadata results that were not matched
         results.extend(metadata_results_dict.values())
 
+        if cached_results:
+            results.extend(cached_results)
+
         # Sort by timestamp and then by job
         sorted_results = sorted(results, key=lambda result: (result.timestamp, result.job))
 
@@ -278,7 +292,7 @@ class SuiteReporter:
         repository: str,
         workflow: str,
         test_suite: str,
-        artifacts_list: list[JUnitXmlJobTestSuites],
+        artifacts_list: list[JUnitXmlJobTestSuites] | list[JUnitXmlJobTestSuitesSummary],
     ) -> dict[int, SuiteReporterResult]:
         results: dict[int, SuiteReporterResult] = {}
         for artifact in artifacts_list:
@@ -286,52 +300,44 @@ class SuiteReporter:
                 repository=repository, workflow=workflow, test_suite=test_suite, job=artifact.job
             )
 
+            summaries: list[JUnitXmlTestSuitesSummary] = (
+                artifact.test_suites
+                if isinstance(artifact, JUnitXmlJobTestSuitesSummary)
+                else [
+                    JUnitXmlTestSuitesSummary.from_test_suites(suites)
+                    for suites in artifact.test_suites
+                ]
+            )
             run_times: list[float] = []
             execution_times: list[float] = []
-            for suites in artifact.test_suites:
-                run_time: float = 0
+            for summary in summaries:
+                if not test_suite_result.date and summary.timestamp:
+                    test_suite_result.timestamp = summary.timestamp
+                    test_suite_result.date = summary.timestamp.split("T")[0]
+
+                # Mocha test reporting has been known to inaccurately total the number of tests
+                # in the 'tests' attribute, so the summary counts the number of test cases
+                test_suite_result.failure += summary.failures
+                test_suite_result.skipped += summary.skipped
+                test_suite_result.success += summary.tests - summary.failures - summary.skipped
+
+                # 'fixme' is a Playwright annotation. An assumption is made that the presence of
+                # a nested system-out tag in a test case that contains a link to a trace.zip
+                # attachment file as content is the result of a retry, also Playwright only.
+                test_suite_result.fixme += summary.fixme
+                test_suite_result.retry += summary.retry
+
                 # A top level test_suites time is not always available. The top level time may
                 # not be equal to the sum of the test case times due to the use of threads/workers.
                 execution_time: float | None = (
-                    suites.time if suites.time and suites.time > 0 else None
+                    summary.time if summary.time and summary.time > 0 else None
                 )
-                for suite in suites.test_suites:
-                    if not test_suite_result.date and suite.timestamp:
-                        test_suite_result.timestamp = suite.timestamp
-                        test_suite_result.date = suite.timestamp.split("T")[0]
-
-                    # Mocha test reporting has been known to inaccurately total the number of tests
-                    # in the 'tests' attribute, so we count the number of test cases
-                    tests = len(suite.test_cases)
-                    skipped = suite.skipped if suite.skipped else 0
-                    test_suite_result.failure += suite.failures
-                    test_suite_result.skipped += skipped
-                    test_suite_result.success += tests - suite.failures - skipped
-
-                    for case in suite.test_cases:
-                        # Summing the time for each test case if test_suite.time is not available
-                        if case.time:
-                            run_time += case.time
-
-                        # Increment "fixme" count, Playwright only
-                        if case.properties and any(p.name == "fixme" for p in case.properties):
-                            test_suite_result.fixme += 1
-
-                        # Check for retry condition, Playwright only
-                        # An assumption is made that the presence of a nested system-out tag in a
-                        # test case that contains a link to a trace.zip attachment file as content
-                        # is the result of a retry.
-                        if (
-                            case.system_out
-                            and case.system_out.text
-                            and "trace.zip" in case.system_out.text
-                        ):
-                            test_suite_result.retry += 1
-
-                run_times.append(run_time)
+                run_times.append(summary.run_time)
                 # If a time at the test suites level is not provided, then use the summation of
                 # times at the test case level, or run_time.
-                execution_times.append(execution_time if execution_time is not None else run_time)
+                execution_times.append(
+                    execution_time if execution_time is not None else summary.run_time
+                )
 
             test_suite_result.run_time = round(sum(run_times), 3)
             test_suite_result.execution_time = round(max(execution_times), 3)
@@ -393,7 +399,12 @@ class SuiteReporter:
                 writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
                 writer.writeheader()
                 for result in self.results:
-                    writer.writerow(result.dict_with_fieldnames())
+                    row = result.dict_with_fieldnames()
+                    # Test suites without test times add up to zero seconds
+                    for field in ZERO_AS_INTEGER_FIELDS:
+                        if row[field] == 0:
+                            row[field] = 0
+                    writer.writerow(row)
         except (OSError, IOError) as error:
             error_mapping: dict[type, str] = {
                 OSError: "Error creating directories for the report file",
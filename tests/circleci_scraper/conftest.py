@@ -0,0 +1,24 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Module for test configurations for the CircleCI Scraper."""
+
+from typing import Iterator
+
+import pytest
+
+from tests.circleci_scraper.mock_circleci_server import (
+    MockCircleCIServer,
+    MockCircleCIServerConfig,
+)
+
+
+@pytest.fixture
+def mock_circleci_server() -> Iterator[MockCircleCIServer]:
+    """Provide a running local stand-in for the CircleCI API."""
+    config = MockCircleCIServerConfig(
+        pipelines=3, jobs_per_workflow=2, test_items_per_job=25, artifacts_per_job=2, page_size=10
+    )
+    with MockCircleCIServer(config) as server:
+        yield server
@@ -0,0 +1,408 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Local stand-in for the CircleCI API endpoints used by the CircleCIClient, and helpers to
+scrape it, shared by the tests and benchmarks of the CircleCI Scraper.
+"""
+
+import json
+import logging
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import parse_qs, urlsplit
+
+from pydantic import BaseModel, Field
+
+from scripts.circleci_scraper.async_client import AsyncCircleCIClient
+from scripts.circleci_scraper.async_scraper import AsyncCircleCIScraper
+from scripts.circleci_scraper.cassette import Cassette
+from scripts.circleci_scraper.client import CircleCIClient
+from scripts.circleci_scraper.config import CircleCIScraperConfig, CircleCIScraperPipelineConfig
+from scripts.circleci_scraper.scraper import CircleCIScraper
+from scripts.common.config import CommonConfig
+
+API_PREFIX = "/api/v2"
+WORKFLOW_NAME = "nightly"
+CREATED_AT_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+class MockCircleCIServerConfig(BaseModel):
+    """Shape and behaviour of the synthetic CircleCI data."""
+
+    organization: str = "mozilla"
+    repository: str = "fxa"
+    # Pipelines are assigned to the repository and these in turn
+    extra_repositories: list[str] = []
+    branch: str = "main"
+    pipelines: int = Field(default=20, ge=0)
+    jobs_per_workflow: int = Field(default=4, ge=0)
+    test_items_per_job: int = Field(default=50, ge=0)
+    artifacts_per_job: int = Field(default=2, ge=0)
+    page_size: int = Field(default=20, gt=0)
+    latency: float = Field(default=0.0, ge=0)
+    running_pipelines: int = Field(default=0, ge=0)
+    # The first API requests are answered with '429 Too Many Requests'
+    throttled_requests: int = Field(default=0, ge=0)
+    retry_after: float = Field(default=0.0, ge=0)
+    # Fraction of requests answered with '503 Service Unavailable', drawn from a seeded generator
+    error_rate: float = Field(default=0.0, ge=0, le=1)
+    seed: int = 0
+
+    @property
+    def job_names(self) -> list[str]:
+        """The names of the test jobs in every workflow."""
+        return [f"job-{index}" for index in range(self.jobs_per_workflow)]
+
+
+class MockCircleCIServerStats(BaseModel):
+    """Counts of the requests answered by a MockCircleCIServer."""
+
+    requests: int = 0
+    errors: int = 0
+    bytes_sent: int = 0
+
+
+class MockCircleCIServer:
+    """Serve deterministic synthetic CircleCI data from a background thread.
+
+    Use as a context manager; the server listens on an ephemeral localhost port and
+    `base_url` is suitable for the 'base_url' option of the 'circleci_scraper' config section.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, config: MockCircleCIServerConfig | None = None) -> None:
+        """Initialize the MockCircleCIServer.
+
+        Args:
+            config (MockCircleCIServerConfig | None): The synthetic data configuration.
+                                                      Defaults to MockCircleCIServerConfig().
+        """
+        self.config = config or MockCircleCIServerConfig()
+        self._created_at = datetime.now(timezone.utc).replace(microsecond=0)
+        self._lock = threading.Lock()
+        self._throttled_requests = 0
+        self._random = random.Random(self.config.seed)
+        self._stats = MockCircleCIServerStats()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._routes: list[tuple[re.Pattern[str], Callable[..., Any]]] = [
+            (re.compile(rf"^{API_PREFIX}/pipeline$"), self._pipelines),
+            (re.compile(rf"^{API_PREFIX}/pipeline/(?P<pipeline>\d+)/workflow$"), self._workflows),
+            (re.compile(rf"^{API_PREFIX}/workflow/(?P<workflow>\d+)/job$"), self._jobs),
+            (
+                re.compile(rf"^{API_PREFIX}/project/[^/]+/[^/]+/[^/]+/(?P<job_number>\d+)/tests$"),
+                self._tests,
+            ),
+            (
+                re.compile(
+                    rf"^{API_PREFIX}/project/[^/]+/[^/]+/[^/]+/(?P<job_number>\d+)/artifacts$"
+                ),
+                self._artifacts,
+            ),
+        ]
+        self._artifact_route = re.compile(r"^/artifacts/(?P<job_number>\d+)/(?P<index>\d+)\.xml$")
+
+    @property
+    def url(self) -> str:
+        """The root URL of the server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    @property
+    def base_url(self) -> str:
+        """The CircleCI API base URL of the server."""
+        return f"{self.url}{API_PREFIX}"
+
+    @property
+    def stats(self) -> MockCircleCIServerStats:
+        """A snapshot of the request counts since the server started or was last reset."""
+        with self._lock:
+            return self._stats.model_copy()
+
+    def reset_stats(self) -> None:
+        """Reset the request counts to zero."""
+        with self._lock:
+            self._stats = MockCircleCIServerStats()
+
+    def __enter__(self) -> "MockCircleCIServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Allow keep-alive connections, like the real API
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                server._handle(self)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
+
+    def _handle(self, handler: BaseHTTPRequestHandler) -> None:
+        if self.config.latency:
+            time.sleep(self.config.latency)
+        url = urlsplit(handler.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if self._is_failed():
+            self._respond(handler, 503, b'{"message": "Service unavailable"}', "application/json")
+            return
+        artifact_match = self._artifact_route.match(url.path)
+        if artifact_match:
+            body = self._artifact_body(
+                int(artifact_match["job_number"]), int(artifact_match["index"])
+            )
+            self._respond(handler, 200, body, "application/xml")
+            return
+        for route, route_handler in self._routes:
+            match = route.match(url.path)
+            if match and self._is_throttled():
+                self._respond(
+                    handler,
+                    429,
+                    b'{"message": "Rate limit exceeded"}',
+                    "application/json",
+                    {"Retry-After": str(self.config.retry_after)},
+                )
+                return
+            if match:
+                payload = route_handler(query, **match.groupdict())
+                self._respond(handler, 200, json.dumps(payload).encode(), "application/json")
+                return
+        self._respond(handler, 404, b'{"message": "Not found"}', "application/json")
+
+    def _is_throttled(self) -> bool:
+        with self._lock:
+            if self._throttled_requests >= self.config.throttled_requests:
+                return False
+            self._throttled_requests += 1
+            return True
+
+    def _is_failed(self) -> bool:
+        if not self.config.error_rate:
+            return False
+        # Draw under the lock, so a seed gives the same sequence of failed requests
+        with self._lock:
+            return self._random.random() < self.config.error_rate
+
+    def _respond(
+        self,
+        handler: BaseHTTPRequestHandler,
+        status: int,
+        body: bytes,
+        content_type: str,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+        with self._lock:
+            self._stats.requests += 1
+            if status >= 400:
+                self._stats.errors += 1
+            self._stats.bytes_sent += len(body)
+
+    def _page(self, items: list[Any], query: dict[str, str]) -> dict[str, Any]:
+        start = int(query.get("page-token", "0"))
+        end = start + self.config.page_size
+        return {
+            "items": items[start:end],
+            "next_page_token": str(end) if end < len(items) else None,
+        }
+
+    def _project_slug(self, pipeline: int) -> str:
+        repositories = [self.config.repository, *self.config.extra_repositories]
+        return f"gh/{self.config.organization}/{repositories[pipeline % len(repositories)]}"
+
+    def _pipeline_created_at(self, pipeline: int) -> datetime:
+        return self._created_at - timedelta(hours=pipeline)
+
+    def _job_number(self, pipeline: int, job: int) -> int:
+        return pipeline * self.config.jobs_per_workflow + job + 1
+
+    def _pipelines(self, query: dict[str, str]) -> dict[str, Any]:
+        items = [
+            {
+                "created_at": self._pipeline_created_at(pipeline).strftime(CREATED_AT_FORMAT),
+                "errors": [],
+                "id": str(pipeline),
+                "number": self.config.pipelines - pipeline,
+                "project_slug": self._project_slug(pipeline),
+                "state": "created",
+                "trigger": {"type": "schedule"},
+                "vcs": {"branch": self.config.branch},
+            }
+            for pipeline in range(self.config.pipelines)
+        ]
+        return self._page(items, query)
+
+    def _workflows(self, query: dict[str, str], pipeline: str) -> dict[str, Any]:
+        created_at = self._pipeline_created_at(int(pipeline))
+        items = [
+            {
+                "created_at": created_at.strftime(TIMESTAMP_FORMAT),
+                "id": pipeline,
+                "name": WORKFLOW_NAME,
+                "pipeline_id": pipeline,
+                "pipeline_number": self.config.pipelines - int(pipeline),
+                "project_slug": self._project_slug(int(pipeline)),
+                "started_by": "scheduler",
+                # The newest pipelines are optionally reported as still running
+                "status": "running"
+                if int(pipeline) < self.config.running_pipelines
+                else "success",
+                "stopped_at": (created_at + timedelta(minutes=30)).strftime(TIMESTAMP_FORMAT),
+            }
+        ]
+        return self._page(items, query)
+
+    def _jobs(self, query: dict[str, str], workflow: str) -> dict[str, Any]:
+        # Every pipeline has a single workflow which shares the pipeline's ID
+        pipeline = workflow
+        created_at = self._pipeline_created_at(int(pipeline))
+        # The jobs of a running pipeline are still running
+        status = "running" if int(pipeline) < self.config.running_pipelines else "success"
+        items = [
+            {
+                "dependencies": [],
+                "id": f"{pipeline}-{job}",
+                "job_number": self._job_number(int(pipeline), job),
+                "name": job_name,
+                "project_slug": self._project_slug(int(pipeline)),
+                "started_at": created_at.strftime(TIMESTAMP_FORMAT),
+                "status": status,
+                "stopped_at": (created_at + timedelta(minutes=20)).strftime(TIMESTAMP_FORMAT),
+                "type": "build",
+            }
+            for job, job_name in enumerate(self.config.job_names)
+        ]
+        return self._page(items, query)
+
+    def _tests(self, query: dict[str, str], job_number: str) -> dict[str, Any]:
+        items = [
+            {
+                "classname": f"suite_{job_number}",
+                "name": f"test_{index}",
+                "result": "success",
+                "message": "",
+                "run_time": 0.25,
+                "source": "unknown",
+            }
+            for index in range(self.config.test_items_per_job)
+        ]
+        return self._page(items, query)
+
+    def _artifacts(self, query: dict[str, str], job_number: str) -> dict[str, Any]:
+        items = [
+            {
+                "path": f"test-results/report-{index}.xml",
+                "node_index": 0,
+                "url": f"{self.url}/artifacts/{job_number}/{index}.xml",
+            }
+            for index in range(self.config.artifacts_per_job)
+        ]
+        return self._page(items, query)
+
+    def _artifact_body(self, job_number: int, index: int) -> bytes:
+        test_cases = "".join(
+            f'<testcase name="test_{case}" classname="suite_{job_number}" time="0.25"/>'
+            for case in range(self.config.test_items_per_job)
+        )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            f'<testsuites name="report-{index}" tests="{self.config.test_items_per_job}">'
+            f'<testsuite name="suite_{job_number}" tests="{self.config.test_items_per_job}" '
+            f'failures="0" skipped="0">{test_cases}</testsuite></testsuites>'
+        ).encode()
+
+
+def build_scraper_config(
+    server: MockCircleCIServer, concurrency: int, backoff_factor: float = 0.0
+) -> CircleCIScraperConfig:
+    """Build a scraper configuration targeting the mock server.
+
+    Args:
+        server (MockCircleCIServer): The running mock server.
+        concurrency (int): The maximum number of concurrent requests.
+        backoff_factor (float): The backoff factor between retries of failed requests.
+                                Defaults to 0, so injected errors are retried immediately.
+
+    Returns:
+        CircleCIScraperConfig: The scraper configuration.
+    """
+    pipeline_config = CircleCIScraperPipelineConfig(
+        organization="mozilla",
+        repository=server.config.repository,
+        workflows={WORKFLOW_NAME: server.config.job_names},
+    )
+    return CircleCIScraperConfig(
+        token="benchmark",  # nosec B106
+        base_url=server.base_url,
+        vcs_slug="gh",
+        pipelines=[pipeline_config],
+        days_of_data=None,
+        date_limit=None,
+        concurrency=concurrency,
+        backoff_factor=backoff_factor,
+    )
+
+
+def run_scraper(
+    scraper_config: CircleCIScraperConfig,
+    output_dir: Path,
+    use_async: bool,
+    cassette: Cassette | None = None,
+) -> float:
+    """Run a full scrape and return the elapsed wall time in seconds.
+
+    Args:
+        scraper_config (CircleCIScraperConfig): The scraper configuration.
+        output_dir (Path): The directory to write test results to.
+        use_async (bool): Whether to use the asynchronous scraper.
+        cassette (Cassette | None): The cassette to record to or replay from. Defaults to None.
+
+    Returns:
+        float: The elapsed wall time in seconds.
+    """
+    common_config = CommonConfig(
+        test_result_dir=str(output_dir), test_metadata_dir="circle_ci", test_artifact_dir="junit"
+    )
+    start = time.perf_counter()
+    if use_async:
+        async_client = AsyncCircleCIClient(scraper_config, cassette=cassette)
+        try:
+            AsyncCircleCIScraper(common_config, async_client).export_test_metadata_and_artifacts(
+                scraper_config.pipelines
+            )
+        finally:
+            async_client.close()
+    else:
+        CircleCIScraper(
+            common_config, CircleCIClient(scraper_config, cassette=cassette)
+        ).export_test_metadata_and_artifacts(scraper_config.pipelines)
+    return time.perf_counter() - start
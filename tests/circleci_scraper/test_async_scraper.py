@@ -0,0 +1,205 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for the AsyncCircleCIScraper module."""
+
+import asyncio
+import threading
+from pathlib import Path
+from typing import Any
+
+import pytest
+from pytest_mock import MockerFixture
+
+from scripts.circleci_scraper.async_client import AsyncCircleCIClient
+from scripts.circleci_scraper.async_scraper import AsyncCircleCIScraper
+from scripts.circleci_scraper.client import CircleCIClientError
+from scripts.circleci_scraper.config import CircleCIScraperConfig
+from scripts.circleci_scraper.watermark import WatermarkStore
+from scripts.common.config import CommonConfig
+from tests.circleci_scraper.mock_circleci_server import (
+    MockCircleCIServer,
+    MockCircleCIServerConfig,
+    build_scraper_config,
+    run_scraper,
+)
+
+
+def _read_tree(directory: Path) -> dict[str, bytes]:
+    return {
+        str(path.relative_to(directory)): path.read_bytes()
+        for path in sorted(directory.rglob("*"))
+        if path.is_file()
+    }
+
+
+def _export(scraper_config: CircleCIScraperConfig, output_dir: Path) -> AsyncCircleCIScraper:
+    common_config = CommonConfig(
+        test_result_dir=str(output_dir), test_metadata_dir="circle_ci", test_artifact_dir="junit"
+    )
+    async_client = AsyncCircleCIClient(scraper_config)
+    scraper = AsyncCircleCIScraper(common_config, async_client)
+    try:
+        scraper.export_test_metadata_and_artifacts(scraper_config.pipelines)
+    finally:
+        async_client.close()
+    return scraper
+
+
+def test_export_matches_sequential_scraper(
+    mock_circleci_server: MockCircleCIServer, tmp_path: Path
+) -> None:
+    """Test that the AsyncCircleCIScraper writes the same files as the CircleCIScraper.
+
+    Args:
+        mock_circleci_server (MockCircleCIServer): Local stand-in for the CircleCI API.
+        tmp_path (Path): Temporary directory for the scraper output.
+    """
+    scraper_config = build_scraper_config(mock_circleci_server, concurrency=4)
+    sync_dir = tmp_path / "sync"
+    async_dir = tmp_path / "async"
+
+    run_scraper(scraper_config, sync_dir, use_async=False)
+    run_scraper(scraper_config, async_dir, use_async=True)
+
+    expected_files = _read_tree(sync_dir)
+    # pipelines * jobs * (metadata + 2 artifacts + completion marker)
+    assert len(expected_files) == 3 * 2 * 4
+    assert _read_tree(async_dir) == expected_files
+
+
+@pytest.mark.parametrize(
+    "running_pipelines, expected_pipeline_id",
+    [(0, "0"), (1, "1"), (3, None)],
+    ids=["all_complete", "newest_running", "all_running"],
+)
+def test_export_advances_watermarks(
+    tmp_path: Path, running_pipelines: int, expected_pipeline_id: str | None
+) -> None:
+    """Test that the AsyncCircleCIScraper advances watermarks like the CircleCIScraper.
+
+    Args:
+        tmp_path (Path): Temporary directory for the scraper output and watermarks.
+        running_pipelines (int): The number of newest pipelines reported as still running.
+        expected_pipeline_id (str | None): The pipeline ID expected in the watermark.
+    """
+    config = MockCircleCIServerConfig(
+        pipelines=3, jobs_per_workflow=2, artifacts_per_job=2, running_pipelines=running_pipelines
+    )
+    common_config = CommonConfig(
+        test_result_dir=str(tmp_path), test_metadata_dir="circle_ci", test_artifact_dir="junit"
+    )
+    watermark_path = tmp_path / "state" / "watermarks.json"
+    with MockCircleCIServer(config) as server:
+        scraper_config = build_scraper_config(server, concurrency=4)
+        async_client = AsyncCircleCIClient(scraper_config)
+        try:
+            AsyncCircleCIScraper(
+                common_config, async_client, watermark_store=WatermarkStore(watermark_path)
+            ).export_test_metadata_and_artifacts(scraper_config.pipelines)
+        finally:
+            async_client.close()
+
+    watermark = WatermarkStore(watermark_path).get("mozilla", "fxa", "main")
+    assert (watermark.pipeline_id if watermark else None) == expected_pipeline_id
+
+
+def test_export_cancels_sibling_tasks_on_error(
+    mock_circleci_server: MockCircleCIServer, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    """Test that a failed job export cancels the other exports of its workflow before the
+    client error itself is raised.
+
+    Args:
+        mock_circleci_server (MockCircleCIServer): Local stand-in for the CircleCI API.
+        tmp_path (Path): Temporary directory for the scraper output.
+        mocker (MockerFixture): pytest_mock fixture for mocking.
+    """
+    export_pipeline = AsyncCircleCIScraper._export_test_metadata_and_artifacts_by_pipeline_id
+    started: list[int] = []
+    cancelled: list[int] = []
+    cancelled_on_error: list[int] = []
+
+    async def record_cancelled_on_error(*args: Any) -> bool:
+        try:
+            return await export_pipeline(*args)
+        except CircleCIClientError:
+            cancelled_on_error.append(len(cancelled))
+            raise
+
+    async def export_test_artifacts_by_job(*args: Any) -> None:
+        job_number = args[-1].job_number
+        started.append(job_number)
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(job_number)
+            raise
+
+    mocker.patch.object(
+        AsyncCircleCIClient, "get_test_metadata", side_effect=CircleCIClientError("failed")
+    )
+    mocker.patch.object(
+        AsyncCircleCIScraper, "_export_test_artifacts_by_job", export_test_artifacts_by_job
+    )
+    mocker.patch.object(
+        AsyncCircleCIScraper,
+        "_export_test_metadata_and_artifacts_by_pipeline_id",
+        record_cancelled_on_error,
+    )
+    scraper_config = build_scraper_config(mock_circleci_server, concurrency=4)
+
+    with pytest.raises(CircleCIClientError, match="failed"):
+        _export(scraper_config, tmp_path)
+
+    assert started
+    assert sorted(cancelled) == sorted(started)
+    # Each pipeline raises only once the artifact exports of its workflow are cancelled
+    assert len(cancelled_on_error) == 3
+    assert min(cancelled_on_error) >= 2
+
+
+def test_export_bounds_pipelines_in_flight(tmp_path: Path, mocker: MockerFixture) -> None:
+    """Test that paging waits while twice the client's concurrency of pipelines are exported,
+    and that files are written off the event loop thread.
+
+    Args:
+        tmp_path (Path): Temporary directory for the scraper output.
+        mocker (MockerFixture): pytest_mock fixture for mocking.
+    """
+    export_pipeline = AsyncCircleCIScraper._export_test_metadata_and_artifacts_by_pipeline_id
+    in_flight: list[int] = [0]
+    max_in_flight: list[int] = [0]
+
+    async def count_pipelines(*args: Any) -> bool:
+        in_flight[0] += 1
+        max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+        try:
+            return await export_pipeline(*args)
+        finally:
+            in_flight[0] -= 1
+
+    mocker.patch.object(
+        AsyncCircleCIScraper,
+        "_export_test_metadata_and_artifacts_by_pipeline_id",
+        count_pipelines,
+    )
+    export_test_metadata = AsyncCircleCIScraper.export_test_metadata
+    writer_threads: list[threading.Thread] = []
+
+    def record_writer_thread(*args: Any) -> None:
+        writer_threads.append(threading.current_thread())
+        export_test_metadata(*args)
+
+    mocker.patch.object(AsyncCircleCIScraper, "export_test_metadata", record_writer_thread)
+    config = MockCircleCIServerConfig(pipelines=10, jobs_per_workflow=1, artifacts_per_job=1)
+
+    with MockCircleCIServer(config) as server:
+        scraper = _export(build_scraper_config(server, concurrency=1), tmp_path)
+
+    assert max_in_flight[0] == 2
+    assert len(writer_threads) == 10
+    assert threading.main_thread() not in writer_threads
+    assert len(list(tmp_path.rglob("*.json"))) == 10
+    assert scraper.download_statistics[config.repository].files == 10
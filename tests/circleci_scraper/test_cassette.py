@@ -0,0 +1,163 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for the Cassette module."""
+
+from pathlib import Path
+from typing import Generator, cast
+
+import pytest
+import requests
+from pytest_mock import MockerFixture
+
+from scripts.circleci_scraper.cassette import Cassette, CassetteError, CassetteStatistics
+from scripts.circleci_scraper.client import CircleCIClient, CircleCIClientError
+from tests.circleci_scraper.mock_circleci_server import (
+    MockCircleCIServer,
+    MockCircleCIServerConfig,
+    build_scraper_config,
+    run_scraper,
+)
+
+
+def _read_tree(directory: Path) -> dict[str, bytes]:
+    return {
+        str(path.relative_to(directory)): path.read_bytes()
+        for path in sorted(directory.rglob("*"))
+        if path.is_file()
+    }
+
+
+@pytest.mark.parametrize("use_async", [False, True], ids=["sequential", "async"])
+def test_replay_matches_recorded_scrape(tmp_path: Path, use_async: bool) -> None:
+    """Test that a replayed scrape writes the same files as the recorded one, offline.
+
+    Args:
+        tmp_path (Path): Temporary directory for the cassette and the scraper output.
+        use_async (bool): Whether to use the asynchronous scraper.
+    """
+    cassette_path = tmp_path / "cassettes" / "scrape.sqlite"
+    config = MockCircleCIServerConfig(
+        pipelines=3, jobs_per_workflow=2, test_items_per_job=25, artifacts_per_job=2, page_size=10
+    )
+    with MockCircleCIServer(config) as server:
+        scraper_config = build_scraper_config(server, concurrency=4)
+        cassette = Cassette(cassette_path, "record")
+        run_scraper(scraper_config, tmp_path / "recorded", use_async, cassette)
+        cassette.close()
+        recorded_requests = server.stats.requests
+
+    cassette = Cassette(cassette_path, "replay")
+    run_scraper(scraper_config, tmp_path / "replayed", use_async, cassette)
+    cassette.close()
+
+    expected_files = _read_tree(tmp_path / "recorded")
+    # pipelines * jobs * (metadata + 2 artifacts + completion marker)
+    assert len(expected_files) == 3 * 2 * 4
+    assert _read_tree(tmp_path / "replayed") == expected_files
+    assert cassette.statistics.replayed == recorded_requests
+    assert cassette.statistics.missing == 0
+    assert scraper_config.token.encode() not in cassette_path.read_bytes()
+
+
+def test_replay_missing_response(mock_circleci_server: MockCircleCIServer, tmp_path: Path) -> None:
+    """Test that a request which was not recorded fails like a request to an unreachable API.
+
+    Args:
+        mock_circleci_server (MockCircleCIServer): Local stand-in for the CircleCI API.
+        tmp_path (Path): Temporary directory for the cassette.
+    """
+    cassette_path = tmp_path / "scrape.sqlite"
+    scraper_config = build_scraper_config(mock_circleci_server, concurrency=2)
+    recording_cassette = Cassette(cassette_path, "record")
+    CircleCIClient(scraper_config, cassette=recording_cassette).get_workflows("0")
+    recording_cassette.close()
+    cassette = Cassette(cassette_path, "replay")
+    client = CircleCIClient(scraper_config, cassette=cassette)
+
+    workflows = client.get_workflows("0")
+    with pytest.raises(CircleCIClientError, match="Request to .* failed"):
+        client.get_workflows("1")
+
+    assert [workflow.id for workflow in workflows.items] == ["0"]
+    assert cassette.statistics.replayed == 1
+    assert cassette.statistics.missing == 1
+
+
+def test_replay_latency(
+    mock_circleci_server: MockCircleCIServer, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    """Test that every replayed response is delayed by the simulated latency.
+
+    Args:
+        mock_circleci_server (MockCircleCIServer): Local stand-in for the CircleCI API.
+        tmp_path (Path): Temporary directory for the cassette.
+        mocker (MockerFixture): pytest_mock fixture for mocking.
+    """
+    cassette_path = tmp_path / "scrape.sqlite"
+    scraper_config = build_scraper_config(mock_circleci_server, concurrency=2)
+    url = f"{mock_circleci_server.url}/artifacts/1/0.xml"
+    recording_cassette = Cassette(cassette_path, "record")
+    recorded_chunks = list(
+        CircleCIClient(scraper_config, cassette=recording_cassette).iter_artifact(url)
+    )
+    recording_cassette.close()
+    sleep = mocker.patch("scripts.circleci_scraper.cassette.time.sleep")
+    cassette = Cassette(cassette_path, "replay", latency=0.25)
+
+    replayed_chunks = list(CircleCIClient(scraper_config, cassette=cassette).iter_artifact(url))
+
+    assert b"".join(replayed_chunks) == b"".join(recorded_chunks)
+    sleep.assert_called_once_with(0.25)
+    assert cassette.statistics == CassetteStatistics(
+        replayed=1, body_bytes=len(b"".join(recorded_chunks))
+    )
+
+
+def test_record_streams_artifact(
+    mock_circleci_server: MockCircleCIServer, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    """Test that an artifact is recorded from its streamed chunks, without reading the whole
+    body at once, and only once it has been read to the end.
+
+    Args:
+        mock_circleci_server (MockCircleCIServer): Local stand-in for the CircleCI API.
+        tmp_path (Path): Temporary directory for the cassette.
+        mocker (MockerFixture): pytest_mock fixture for mocking.
+    """
+    cassette_path = tmp_path / "scrape.sqlite"
+    scraper_config = build_scraper_config(mock_circleci_server, concurrency=2)
+    url = f"{mock_circleci_server.url}/artifacts/1/0.xml"
+    abandoned_url = f"{mock_circleci_server.url}/artifacts/1/1.xml"
+    recording_cassette = Cassette(cassette_path, "record")
+    client = CircleCIClient(scraper_config, cassette=recording_cassette)
+    content = mocker.patch.object(requests.Response, "content", new_callable=mocker.PropertyMock)
+    recorded_chunks = list(client.iter_artifact(url, 256))
+    abandoned_chunks = cast(Generator[bytes, None, None], client.iter_artifact(abandoned_url, 256))
+    next(abandoned_chunks)
+    abandoned_chunks.close()
+    mocker.stop(content)
+    recording_cassette.close()
+    cassette = Cassette(cassette_path, "replay")
+
+    replayed_response = cassette.replay(url)
+
+    assert len(recorded_chunks) > 1
+    assert recording_cassette.statistics == CassetteStatistics(
+        recorded=1, body_bytes=len(b"".join(recorded_chunks))
+    )
+    assert replayed_response is not None
+    assert replayed_response.content == b"".join(recorded_chunks)
+    assert cassette.replay(abandoned_url) is None
+    content.assert_not_called()
+
+
+def test_replay_missing_cassette(tmp_path: Path) -> None:
+    """Test that replaying a cassette which does not exist raises a CassetteError.
+
+    Args:
+        tmp_path (Path): Temporary directory for the cassette.
+    """
+    with pytest.raises(CassetteError, match="Unable to open the cassette"):
+        Cassette(tmp_path / "missing.sqlite", "replay")
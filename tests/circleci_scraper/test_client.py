@@ -0,0 +1,122 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for the CircleCIClient module."""
+
+import time
+from pathlib import Path
+
+import pytest
+from requests.adapters import HTTPAdapter
+
+from scripts.circleci_scraper.client import CircleCIClient, CircleCIClientError
+from scripts.circleci_scraper.metrics import MetricSample
+from scripts.circleci_scraper.response_cache import ResponseCache
+from tests.circleci_scraper.mock_circleci_server import (
+    MockCircleCIServer,
+    MockCircleCIServerConfig,
+    build_scraper_config,
+)
+
+
+def test_session_pool_and_retry_settings(mock_circleci_server: MockCircleCIServer) -> None:
+    """Test that the client session uses the configured pool size and retry policy.
+
+    Args:
+        mock_circleci_server (MockCircleCIServer): Local stand-in for the CircleCI API.
+    """
+    scraper_config = build_scraper_config(mock_circleci_server, concurrency=2).model_copy(
+        update={"pool_size": 3, "max_retries": 5, "backoff_factor": 0.1}
+    )
+
+    client = CircleCIClient(scraper_config)
+
+    adapter = client._session.get_adapter(mock_circleci_server.base_url)
+    assert isinstance(adapter, HTTPAdapter)
+    assert adapter._pool_maxsize == 3  # type: ignore[attr-defined]
+    assert adapter.max_retries.total == 5
+    assert adapter.max_retries.backoff_factor == 0.1
+    assert adapter.max_retries.allowed_methods == frozenset({"GET"})
+
+
+def test_iter_artifact(mock_circleci_server: MockCircleCIServer) -> None:
+    """Test that artifacts are streamed through the client session.
+
+    Args:
+        mock_circleci_server (MockCircleCIServer): Local stand-in for the CircleCI API.
+    """
+    client = CircleCIClient(build_scraper_config(mock_circleci_server, concurrency=2))
+
+    chunks = list(client.iter_artifact(f"{mock_circleci_server.url}/artifacts/1/0.xml", 256))
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 256 for chunk in chunks)
+    content = b"".join(chunks)
+
+    assert content.startswith(b'<?xml version="1.0" encoding="UTF-8"?><testsuites')
+
+
+def test_iter_artifact_failure(mock_circleci_server: MockCircleCIServer) -> None:
+    """Test that a failed artifact download raises a CircleCIClientError.
+
+    Args:
+        mock_circleci_server (MockCircleCIServer): Local stand-in for the CircleCI API.
+    """
+    client = CircleCIClient(build_scraper_config(mock_circleci_server, concurrency=2))
+
+    with pytest.raises(CircleCIClientError, match="Request to .* failed"):
+        list(client.iter_artifact(f"{mock_circleci_server.url}/missing.xml"))
+
+
+def test_terminal_pages_served_from_cache(tmp_path: Path) -> None:
+    """Test that job pages are cached only once all their jobs have finished.
+
+    Workflow pages are never cached, since rerunning a workflow adds one to its pipeline.
+
+    Args:
+        tmp_path (Path): Temporary directory for the response cache.
+    """
+    cache_path = tmp_path / "responses.sqlite"
+    config = MockCircleCIServerConfig(pipelines=2, jobs_per_workflow=2, running_pipelines=1)
+    with MockCircleCIServer(config) as server:
+        scraper_config = build_scraper_config(server, concurrency=1).model_copy(
+            update={"max_retries": 0}
+        )
+        first_cache = ResponseCache(cache_path)
+        first_client = CircleCIClient(scraper_config, first_cache)
+        first_client.get_workflows("1")
+        running_jobs = first_client.get_jobs("0")
+        finished_jobs = first_client.get_jobs("1")
+        first_cache.close()
+
+    # The server is gone, only cached pages can be served
+    second_cache = ResponseCache(cache_path)
+    second_client = CircleCIClient(scraper_config, second_cache)
+
+    assert running_jobs.items[0].status == "running"
+    assert second_client.get_jobs("1") == finished_jobs
+    with pytest.raises(CircleCIClientError):
+        second_client.get_jobs("0")
+    with pytest.raises(CircleCIClientError):
+        second_client.get_workflows("1")
+    assert first_client.metrics.snapshot().counters["response_cache_lookups_total"] == [
+        MetricSample(labels={"result": "miss"}, value=2)
+    ]
+    assert second_client.metrics.snapshot().counters["response_cache_lookups_total"] == [
+        MetricSample(labels={"result": "hit"}, value=1),
+        MetricSample(labels={"result": "miss"}, value=1),
+    ]
+
+
+def test_throttled_requests_are_retried() -> None:
+    """Test that requests answered with '429 Too Many Requests' are retried after a cool-down."""
+    config = MockCircleCIServerConfig(pipelines=2, throttled_requests=2, retry_after=0.05)
+    with MockCircleCIServer(config) as server:
+        client = CircleCIClient(build_scraper_config(server, concurrency=1))
+
+        start = time.monotonic()
+        pipelines = client.get_pipelines("mozilla")
+
+    assert len(pipelines.items) == 2
+    assert time.monotonic() - start >= 0.1
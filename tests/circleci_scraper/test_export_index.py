@@ -0,0 +1,52 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for the ExportIndex module."""
+
+from pathlib import Path
+
+from scripts.circleci_scraper.export_index import ARTIFACTS_COMPLETE_MARKER, ExportIndex
+
+
+def test_scan(tmp_path: Path) -> None:
+    """Test that the scan indexes exported jobs and removes the files of interrupted writes.
+
+    Args:
+        tmp_path (Path): Temporary test result directory.
+    """
+    job_path = tmp_path / "fxa" / "nightly" / "Unit Test (nightly)"
+    (job_path / "circle_ci").mkdir(parents=True)
+    (job_path / "circle_ci" / "10.json").write_text("{}")
+    (job_path / "circle_ci" / "11.json.part").write_text("{")
+    (job_path / "junit" / "10").mkdir(parents=True)
+    (job_path / "junit" / "10" / ARTIFACTS_COMPLETE_MARKER).touch()
+    (job_path / "junit" / "11").mkdir(parents=True)
+    (job_path / "junit" / "11" / "0-report.xml").write_text("<testsuites/>")
+    (job_path / "junit" / "11" / ".1-report.xml.abc.part").write_text("<testsuites")
+
+    index = ExportIndex.scan(tmp_path, "circle_ci", "junit")
+
+    assert index.has_metadata("fxa", "nightly", "Unit Test (nightly)", 10)
+    assert not index.has_metadata("fxa", "nightly", "Unit Test (nightly)", 11)
+    assert index.has_artifacts("fxa", "nightly", "Unit Test (nightly)", 10)
+    assert not index.has_artifacts("fxa", "nightly", "Unit Test (nightly)", 11)
+    assert not index.has_metadata("fxa", "other", "Unit Test (nightly)", 10)
+    assert sorted(path.name for path in job_path.rglob("*") if path.is_file()) == [
+        ARTIFACTS_COMPLETE_MARKER,
+        "0-report.xml",
+        "10.json",
+    ]
+
+
+def test_scan_missing_directory(tmp_path: Path) -> None:
+    """Test that a missing test result directory results in an empty index.
+
+    Args:
+        tmp_path (Path): Temporary test result directory.
+    """
+    index = ExportIndex.scan(tmp_path / "missing", "circle_ci", "junit")
+    index.add_metadata("fxa", "nightly", "job-0", 1)
+
+    assert index.has_metadata("fxa", "nightly", "job-0", 1)
+    assert not index.has_artifacts("fxa", "nightly", "job-0", 1)
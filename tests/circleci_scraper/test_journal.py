@@ -0,0 +1,277 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for the ScrapeJournal module."""
+
+import json
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from scripts.circleci_scraper.async_client import AsyncCircleCIClient
+from scripts.circleci_scraper.async_scraper import AsyncCircleCIScraper
+from scripts.circleci_scraper.client import CircleCIClient, CircleCIClientError, WorkflowGroup
+from scripts.circleci_scraper.config import CircleCIScraperConfig
+from scripts.circleci_scraper.journal import (
+    OrganizationProgress,
+    ProcessedPipeline,
+    RepositoryProgress,
+    ScrapeJournal,
+    ScrapeJournalError,
+)
+from scripts.circleci_scraper.scraper import CircleCIScraper
+from scripts.circleci_scraper.watermark import WatermarkStore
+from scripts.common.config import CommonConfig
+from tests.circleci_scraper.mock_circleci_server import (
+    MockCircleCIServer,
+    MockCircleCIServerConfig,
+    build_scraper_config,
+)
+
+PIPELINE = ProcessedPipeline(
+    id="abc", number=42, created_at="2024-01-01T00:00:00.000Z", branch="main", complete=True
+)
+
+
+def _read_tree(directory: Path) -> dict[str, bytes]:
+    return {
+        str(path.relative_to(directory)): path.read_bytes()
+        for path in sorted(directory.rglob("*"))
+        if path.is_file()
+    }
+
+
+def _scrape(
+    scraper_config: CircleCIScraperConfig,
+    output_dir: Path,
+    state_dir: Path,
+    use_async: bool,
+    mocker: MockerFixture,
+    failed_pipeline_id: str | None = None,
+    resume: bool = False,
+) -> list[str]:
+    # Returns the IDs of the pipelines whose workflows were requested
+    common_config = CommonConfig(
+        test_result_dir=str(output_dir), test_metadata_dir="circle_ci", test_artifact_dir="junit"
+    )
+    watermark_store = WatermarkStore(state_dir / "watermarks.json")
+    journal = ScrapeJournal(state_dir / "journal.jsonl")
+    async_client = AsyncCircleCIClient(scraper_config) if use_async else None
+    client = async_client.client if async_client else CircleCIClient(scraper_config)
+    requested_pipeline_ids: list[str] = []
+    get_workflows = client.get_workflows
+
+    def get_failing_workflows(
+        pipeline_id: str, next_page_token: str | None = None
+    ) -> WorkflowGroup:
+        requested_pipeline_ids.append(pipeline_id)
+        if pipeline_id == failed_pipeline_id:
+            raise CircleCIClientError(f"Failed to list the workflows of {pipeline_id}")
+        return get_workflows(pipeline_id, next_page_token)
+
+    mocker.patch.object(client, "get_workflows", side_effect=get_failing_workflows)
+    if async_client:
+        try:
+            AsyncCircleCIScraper(
+                common_config, async_client, None, watermark_store, journal
+            ).export_test_metadata_and_artifacts(scraper_config.pipelines, resume=resume)
+        finally:
+            async_client.close()
+    else:
+        CircleCIScraper(
+            common_config, client, None, 1, watermark_store, journal
+        ).export_test_metadata_and_artifacts(scraper_config.pipelines, resume=resume)
+    return requested_pipeline_ids
+
+
+def test_save_and_load(tmp_path: Path) -> None:
+    """Test that the progress of an interrupted scrape is loaded by a new ScrapeJournal.
+
+    Args:
+        tmp_path (Path): Temporary directory for the journal file.
+    """
+    path = tmp_path / "state" / "journal.jsonl"
+    journal = ScrapeJournal(path)
+    journal.start("mozilla", resume=False)
+    journal.record_pipeline("mozilla", "fxa", PIPELINE)
+    journal.finish_repository("mozilla", "autopush-rs")
+    journal.set_page_token("mozilla", "next")
+    journal.start("mozilla-services", resume=False)
+    journal.record_pipeline("mozilla-services", "syncstorage-rs", PIPELINE)
+    journal.finish("mozilla-services")
+
+    resumed_journal = ScrapeJournal(path)
+
+    assert resumed_journal.start("mozilla", resume=True) == OrganizationProgress(
+        page_token="next",
+        repositories={
+            "fxa": RepositoryProgress(pipelines=[PIPELINE]),
+            "autopush-rs": RepositoryProgress(finished=True),
+        },
+    )
+    assert ScrapeJournal(path).start("mozilla", resume=False) == OrganizationProgress()
+    assert [json.loads(line) for line in path.read_text().splitlines()] == [
+        {
+            "event": "start",
+            "organization": "mozilla",
+            "repository": None,
+            "pipeline": None,
+            "page_token": None,
+        }
+    ]
+
+
+def test_records_are_appended(tmp_path: Path) -> None:
+    """Test that progress is appended to the journal, which is compacted once a scrape ends.
+
+    Args:
+        tmp_path (Path): Temporary directory for the journal file.
+    """
+    path = tmp_path / "journal.jsonl"
+    journal = ScrapeJournal(path)
+    journal.start("mozilla", resume=False)
+    journal.start("mozilla-services", resume=False)
+    contents = [path.read_text()]
+    for number in range(3):
+        journal.record_pipeline(
+            "mozilla", "fxa", PIPELINE.model_copy(update={"id": str(number), "number": number})
+        )
+        contents.append(path.read_text())
+    journal.set_page_token("mozilla", "next")
+    appended_content = path.read_text()
+
+    journal.finish("mozilla-services")
+
+    # Every write appends a single line and leaves the previous lines untouched
+    for previous, content in zip(contents, contents[1:]):
+        assert content.startswith(previous)
+        assert content[len(previous) :].count("\n") == 1
+    assert len(appended_content.splitlines()) == 6
+    assert [json.loads(line)["event"] for line in path.read_text().splitlines()] == [
+        "start",
+        "page_token",
+        "pipeline",
+        "pipeline",
+        "pipeline",
+    ]
+    assert ScrapeJournal(path).start("mozilla", resume=True) == journal.start(
+        "mozilla", resume=True
+    )
+
+
+def test_load_incomplete_last_record(tmp_path: Path) -> None:
+    """Test that a record cut short by a killed run is ignored.
+
+    Args:
+        tmp_path (Path): Temporary directory for the journal file.
+    """
+    path = tmp_path / "journal.jsonl"
+    journal = ScrapeJournal(path)
+    journal.start("mozilla", resume=False)
+    journal.set_page_token("mozilla", "next")
+    record = path.read_text().splitlines()[-1]
+    path.write_text(path.read_text().replace("next", "last") + record[:20])
+
+    assert ScrapeJournal(path).start("mozilla", resume=True) == OrganizationProgress(
+        page_token="last"
+    )
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "not json\n",
+        '["not", "a", "mapping"]\n',
+        '{"event": "page_token", "organization": "mozilla", "page_token": ["abc"]}\n',
+        '{"event": "page_token", "organization": "mozilla", "page_token": "abc"}\n',
+        '{"event": "start", "organization": "mozilla"}\n'
+        '{"event": "pipeline", "organization": "mozilla", "repository": "fxa"}\n',
+        'not json\n{"event": "start", "organization": "mozilla"}\n',
+    ],
+    ids=[
+        "invalid_json",
+        "invalid_structure",
+        "invalid_record",
+        "organization_not_started",
+        "missing_pipeline",
+        "invalid_record_before_last",
+    ],
+)
+def test_load_invalid_file(tmp_path: Path, content: str) -> None:
+    """Test that an unreadable journal file raises a ScrapeJournalError.
+
+    Args:
+        tmp_path (Path): Temporary directory for the journal file.
+        content (str): The content of the journal file.
+    """
+    path = tmp_path / "journal.jsonl"
+    path.write_text(content)
+
+    with pytest.raises(ScrapeJournalError, match="Unable to load the scrape journal"):
+        ScrapeJournal(path)
+
+
+@pytest.mark.parametrize("use_async", [False, True], ids=["sequential", "async"])
+def test_resume_interrupted_scrape(tmp_path: Path, mocker: MockerFixture, use_async: bool) -> None:
+    """Test that a resumed scrape continues after the processed pipelines of an interrupted one.
+
+    The resumed scrape writes the same files and watermark as an uninterrupted scrape.
+
+    Args:
+        tmp_path (Path): Temporary directory for the scraper output and state.
+        mocker (MockerFixture): pytest_mock fixture for mocking.
+        use_async (bool): Whether to use the asynchronous scraper.
+    """
+    config = MockCircleCIServerConfig(
+        pipelines=6, jobs_per_workflow=1, artifacts_per_job=1, page_size=2
+    )
+    with MockCircleCIServer(config) as server:
+        scraper_config = build_scraper_config(server, concurrency=2)
+        _scrape(scraper_config, tmp_path / "expected", tmp_path / "expected_state", False, mocker)
+        with pytest.raises(CircleCIClientError, match="Failed to list the workflows of 3"):
+            _scrape(
+                scraper_config, tmp_path / "output", tmp_path / "state", use_async, mocker, "3"
+            )
+        journal = ScrapeJournal(tmp_path / "state" / "journal.jsonl").start("mozilla", True)
+        resumed_pipeline_ids = _scrape(
+            scraper_config, tmp_path / "output", tmp_path / "state", use_async, mocker, resume=True
+        )
+
+    # The listing resumes at the second page, holding the failed pipeline
+    assert journal.page_token == "2"
+    # The asynchronous scraper finishes the pipelines in progress when another one fails
+    assert resumed_pipeline_ids == (["3"] if use_async else ["3", "4", "5"])
+    assert _read_tree(tmp_path / "output") == _read_tree(tmp_path / "expected")
+    assert (tmp_path / "state" / "journal.jsonl").read_text() == ""
+    assert (tmp_path / "state" / "watermarks.json").read_text() == (
+        tmp_path / "expected_state" / "watermarks.json"
+    ).read_text()
+
+
+def test_export_test_metadata_is_atomic(
+    mock_circleci_server: MockCircleCIServer, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    """Test that test metadata interrupted while being written leaves no file behind.
+
+    Args:
+        mock_circleci_server (MockCircleCIServer): Local stand-in for the CircleCI API.
+        tmp_path (Path): Temporary directory for the scraper output.
+        mocker (MockerFixture): pytest_mock fixture for mocking.
+    """
+    common_config = CommonConfig(
+        test_result_dir=str(tmp_path), test_metadata_dir="circle_ci", test_artifact_dir="junit"
+    )
+    scraper_config = build_scraper_config(mock_circleci_server, concurrency=2)
+    scraper = CircleCIScraper(common_config, CircleCIClient(scraper_config))
+    mocker.patch("scripts.common.atomic_write.os.replace", side_effect=KeyboardInterrupt)
+    workflows: WorkflowGroup = scraper._client.get_workflows("0")
+
+    with pytest.raises(KeyboardInterrupt):
+        scraper.export_test_metadata_and_artifacts_workflow_id(
+            "mozilla", "fxa", workflows.items[0], ["job-0"]
+        )
+
+    metadata_directory = tmp_path / "fxa" / "nightly" / "job-0" / "circle_ci"
+    assert list(metadata_directory.iterdir()) == []
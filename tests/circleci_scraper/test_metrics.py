@@ -0,0 +1,151 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for the ScraperMetrics module."""
+
+import os
+import stat
+from pathlib import Path
+
+import pytest
+
+from scripts.circleci_scraper.client import CircleCIClient
+from scripts.circleci_scraper.metrics import MetricsSnapshot, ScraperMetrics
+from scripts.circleci_scraper.scraper import CircleCIScraper
+from scripts.common.config import CommonConfig
+from tests.circleci_scraper.mock_circleci_server import MockCircleCIServer, build_scraper_config
+
+
+def _values(metrics: ScraperMetrics, name: str) -> dict[tuple[str, ...], float]:
+    return {
+        tuple(sample.labels.values()): sample.value
+        for sample in metrics.snapshot().counters.get(name, [])
+    }
+
+
+def test_to_prometheus() -> None:
+    """Test the Prometheus text format of counters, gauges and histograms."""
+    metrics = ScraperMetrics()
+    metrics.increment("requests_total", endpoint="tests", status="200")
+    metrics.increment("requests_total", 2, endpoint="tests", status="200")
+    metrics.increment("jobs_exported_total", repository='a "quoted"\\name')
+    metrics.set("run_success", 1)
+    metrics.observe("request_duration_seconds", 0.05, endpoint="tests")
+    metrics.observe("request_duration_seconds", 0.2, endpoint="tests")
+    metrics.observe("request_duration_seconds", 500, endpoint="tests")
+
+    text = metrics.to_prometheus()
+
+    assert text.startswith(
+        "# HELP circleci_scraper_jobs_exported_total Test metadata files written, by repository.\n"
+        "# TYPE circleci_scraper_jobs_exported_total counter\n"
+        'circleci_scraper_jobs_exported_total{repository="a \\"quoted\\"\\\\name"} 1\n'
+        "# HELP circleci_scraper_requests_total HTTP requests by endpoint and response status.\n"
+        "# TYPE circleci_scraper_requests_total counter\n"
+        'circleci_scraper_requests_total{endpoint="tests",status="200"} 3\n'
+    )
+    assert "# TYPE circleci_scraper_run_success gauge\ncircleci_scraper_run_success 1\n" in text
+    assert "# TYPE circleci_scraper_request_duration_seconds histogram\n" in text
+    assert (
+        'circleci_scraper_request_duration_seconds_bucket{endpoint="tests",le="0.025"} 0\n' in text
+    )
+    assert (
+        'circleci_scraper_request_duration_seconds_bucket{endpoint="tests",le="0.05"} 1\n' in text
+    )
+    assert (
+        'circleci_scraper_request_duration_seconds_bucket{endpoint="tests",le="0.25"} 2\n' in text
+    )
+    assert (
+        'circleci_scraper_request_duration_seconds_bucket{endpoint="tests",le="300"} 2\n' in text
+    )
+    assert (
+        'circleci_scraper_request_duration_seconds_bucket{endpoint="tests",le="+Inf"} 3\n' in text
+    )
+    assert 'circleci_scraper_request_duration_seconds_sum{endpoint="tests"} 500.25\n' in text
+    assert text.endswith('circleci_scraper_request_duration_seconds_count{endpoint="tests"} 3\n')
+
+
+def test_unknown_metric() -> None:
+    """Test that recording a metric which is not defined raises a KeyError."""
+    with pytest.raises(KeyError, match="Unknown metric 'request_total'"):
+        ScraperMetrics().increment("request_total")
+
+
+def test_write(tmp_path: Path) -> None:
+    """Test that the metrics are written as JSON and as a Prometheus textfile readable by all.
+
+    The textfile collector usually runs as another user than the scraper.
+
+    Args:
+        tmp_path (Path): Temporary directory for the metrics files.
+    """
+    metrics = ScraperMetrics()
+    metrics.increment("pages_total", entity="jobs")
+    with metrics.time("workflow_export_duration_seconds", repository="fxa", workflow="nightly"):
+        pass
+    json_path = tmp_path / "metrics" / "metrics.json"
+    textfile_path = tmp_path / "metrics" / "circleci_scraper.prom"
+
+    # The common umask, under which newly created files are readable by all
+    previous_umask = os.umask(0o022)
+    try:
+        metrics.write(json_path, textfile_path)
+    finally:
+        os.umask(previous_umask)
+
+    assert MetricsSnapshot.model_validate_json(json_path.read_text()) == metrics.snapshot()
+    assert textfile_path.read_text() == metrics.to_prometheus()
+    assert textfile_path.stat().st_mode & (stat.S_IRGRP | stat.S_IROTH)
+    assert json_path.stat().st_mode & (stat.S_IRGRP | stat.S_IROTH)
+    assert sorted(path.name for path in json_path.parent.iterdir()) == [
+        "circleci_scraper.prom",
+        "metrics.json",
+    ]
+
+
+def test_scrape_metrics(mock_circleci_server: MockCircleCIServer, tmp_path: Path) -> None:
+    """Test the requests, pages, exports and skips counted while scraping twice.
+
+    Args:
+        mock_circleci_server (MockCircleCIServer): Local stand-in for the CircleCI API.
+        tmp_path (Path): Temporary directory for the scraper output.
+    """
+    scraper_config = build_scraper_config(mock_circleci_server, concurrency=2)
+    common_config = CommonConfig(
+        test_result_dir=str(tmp_path), test_metadata_dir="circle_ci", test_artifact_dir="junit"
+    )
+    metrics = ScraperMetrics()
+    scraper = CircleCIScraper(common_config, CircleCIClient(scraper_config, metrics=metrics))
+
+    scraper.export_test_metadata_and_artifacts(scraper_config.pipelines)
+    first_requests = _values(metrics, "requests_total")
+    scraper.export_test_metadata_and_artifacts(scraper_config.pipelines)
+
+    # 3 pipelines with 2 jobs, each job with 25 tests in pages of 10 and 2 artifacts
+    assert first_requests == {
+        ("artifact_download", "200"): 12,
+        ("artifacts", "200"): 6,
+        ("jobs", "200"): 3,
+        ("pipelines", "200"): 1,
+        ("tests", "200"): 18,
+        ("workflows", "200"): 3,
+    }
+    # The second run only lists the pipelines, workflows and jobs, and skips the exported jobs
+    assert sum(first_requests.values()) + 1 + 3 + 3 == mock_circleci_server.stats.requests
+    assert _values(metrics, "pages_total")[("tests",)] == 18
+    assert _values(metrics, "jobs_exported_total") == {("fxa",): 6}
+    assert _values(metrics, "artifacts_total") == {("fxa", "downloaded"): 12}
+    assert _values(metrics, "jobs_skipped_total") == {
+        ("artifacts", "fxa"): 6,
+        ("metadata", "fxa"): 6,
+    }
+    job_histograms = metrics.snapshot().histograms["job_export_duration_seconds"]
+    assert sorted(
+        (sample.labels["job"], sample.labels["stage"], sample.count) for sample in job_histograms
+    ) == [
+        ("job-0", "artifacts", 3),
+        ("job-0", "metadata", 3),
+        ("job-1", "artifacts", 3),
+        ("job-1", "metadata", 3),
+    ]
@@ -0,0 +1,83 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for the RateLimiter module."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from scripts.circleci_scraper.rate_limiter import (
+    RateLimiter,
+    parse_rate_limit_reset,
+    parse_retry_after,
+)
+
+
+@pytest.mark.parametrize(
+    "headers, expected_delay",
+    [
+        ({}, None),
+        ({"Retry-After": "3"}, 3.0),
+        ({"Retry-After": "-1"}, 0.0),
+        ({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}, 0.0),
+        ({"Retry-After": "soon"}, None),
+    ],
+    ids=["missing", "seconds", "negative", "past_date", "invalid"],
+)
+def test_parse_retry_after(headers: dict[str, str], expected_delay: float | None) -> None:
+    """Test parsing of the 'Retry-After' header.
+
+    Args:
+        headers (dict[str, str]): The response headers.
+        expected_delay (float | None): The expected delay in seconds.
+    """
+    assert parse_retry_after(headers) == expected_delay
+
+
+@pytest.mark.parametrize(
+    "headers, expected_delay",
+    [
+        ({}, None),
+        ({"X-RateLimit-Remaining": "5", "X-RateLimit-Reset": "10"}, None),
+        ({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "10"}, 10.0),
+        ({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1500000000"}, 0.0),
+        ({"X-RateLimit-Remaining": "none", "X-RateLimit-Reset": "10"}, None),
+    ],
+    ids=["missing", "remaining", "exhausted_delay", "exhausted_past_epoch", "invalid"],
+)
+def test_parse_rate_limit_reset(headers: dict[str, str], expected_delay: float | None) -> None:
+    """Test parsing of the 'X-RateLimit-*' headers.
+
+    Args:
+        headers (dict[str, str]): The response headers.
+        expected_delay (float | None): The expected delay in seconds.
+    """
+    assert parse_rate_limit_reset(headers) == expected_delay
+
+
+def test_acquire_paces_requests() -> None:
+    """Test that requests from several threads are paced to the configured rate after a burst."""
+    rate_limiter = RateLimiter(requests_per_second=50)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda _: rate_limiter.acquire(), range(60)))
+    elapsed = time.monotonic() - start
+
+    # The first 50 requests are a burst, the remaining 10 are spaced 20ms apart
+    assert 0.18 <= elapsed < 0.5
+
+
+def test_cool_down_pauses_requests() -> None:
+    """Test that a cool-down delays the next request of every thread."""
+    rate_limiter = RateLimiter()
+    rate_limiter.cool_down(0.1)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(lambda _: rate_limiter.acquire(), range(2)))
+
+    assert time.monotonic() - start >= 0.1
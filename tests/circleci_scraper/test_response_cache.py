@@ -0,0 +1,42 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for the ResponseCache module."""
+
+from pathlib import Path
+
+import pytest
+
+from scripts.circleci_scraper.response_cache import ResponseCache, ResponseCacheError
+
+
+def test_put_and_get(tmp_path: Path) -> None:
+    """Test that stored responses persist across instances.
+
+    Args:
+        tmp_path (Path): Temporary directory for the cache database.
+    """
+    path = tmp_path / "state" / "responses.sqlite"
+    cache = ResponseCache(path)
+    cache.put("workflow/1/job", '{"items": []}')
+    cache.put("workflow/1/job", '{"items": [], "next_page_token": null}')
+    cache.close()
+
+    reopened_cache = ResponseCache(path)
+
+    assert reopened_cache.get("workflow/1/job") == '{"items": [], "next_page_token": null}'
+    assert reopened_cache.get("workflow/2/job") is None
+
+
+def test_open_invalid_database(tmp_path: Path) -> None:
+    """Test that a file which is not a SQLite database raises a ResponseCacheError.
+
+    Args:
+        tmp_path (Path): Temporary directory for the cache database.
+    """
+    path = tmp_path / "responses.sqlite"
+    path.write_text("not a database")
+
+    with pytest.raises(ResponseCacheError, match="Unable to open the response cache"):
+        ResponseCache(path)
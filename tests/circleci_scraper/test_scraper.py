@@ -0,0 +1,430 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for the CircleCIScraper module."""
+
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from pytest import LogCaptureFixture
+from pytest_mock import MockerFixture
+
+from scripts.circleci_scraper.async_client import AsyncCircleCIClient
+from scripts.circleci_scraper.async_scraper import AsyncCircleCIScraper
+from scripts.circleci_scraper.client import Artifact, CircleCIClient, Job
+from scripts.circleci_scraper.config import CircleCIScraperPipelineConfig
+from scripts.circleci_scraper.export_index import ARTIFACTS_COMPLETE_MARKER
+from scripts.circleci_scraper.metrics import MetricSample
+from scripts.circleci_scraper.scraper import (
+    ArtifactDownloadStatistics,
+    CircleCIScraper,
+    CircleCIScraperError,
+)
+from scripts.circleci_scraper import scraper as scraper_module
+from scripts.circleci_scraper.watermark import WatermarkStore
+from scripts.common.config import CommonConfig
+from tests.circleci_scraper.mock_circleci_server import (
+    MockCircleCIServer,
+    MockCircleCIServerConfig,
+    build_scraper_config,
+)
+
+
+JOB = Job(
+    dependencies=[],
+    id="1",
+    job_number=1,
+    name="job-0",
+    project_slug="gh/mozilla/fxa",
+    started_at="2024-01-01T00:00:00Z",
+    status="success",
+    stopped_at="2024-01-01T01:00:00Z",
+    type="build",
+)
+
+
+def _build_scraper(
+    server: MockCircleCIServer,
+    output_dir: Path,
+    max_artifact_size: int | None = None,
+    download_workers: int = 1,
+    watermark_store: WatermarkStore | None = None,
+) -> CircleCIScraper:
+    common_config = CommonConfig(
+        test_result_dir=str(output_dir), test_metadata_dir="circle_ci", test_artifact_dir="junit"
+    )
+    client = CircleCIClient(build_scraper_config(server, concurrency=2))
+    return CircleCIScraper(
+        common_config, client, max_artifact_size, download_workers, watermark_store
+    )
+
+
+def _count_files(directory: Path) -> int:
+    # Counts the exported test metadata and artifacts, ignoring completion markers
+    return sum(1 for path in directory.rglob("*") if path.suffix in {".json", ".xml"})
+
+
+def test_download_artifact(mock_circleci_server: MockCircleCIServer, tmp_path: Path) -> None:
+    """Test that a downloaded artifact is written in full without leaving temporary files.
+
+    Args:
+        mock_circleci_server (MockCircleCIServer): Local stand-in for the CircleCI API.
+        tmp_path (Path): Temporary directory for the scraper output.
+    """
+    scraper = _build_scraper(mock_circleci_server, tmp_path)
+    file_path = tmp_path / "0-report.xml"
+
+    size = scraper.download_artifact(
+        str(file_path), f"{mock_circleci_server.url}/artifacts/1/0.xml"
+    )
+
+    assert size == file_path.stat().st_size
+    assert file_path.read_bytes().endswith(b"</testsuites>")
+    assert [path.name for path in tmp_path.iterdir()] == ["0-report.xml"]
+
+
+def test_download_artifact_exceeding_max_size(
+    mock_circleci_server: MockCircleCIServer, tmp_path: Path, caplog: LogCaptureFixture
+) -> None:
+    """Test that an artifact above the maximum size is skipped and logged.
+
+    Args:
+        mock_circleci_server (MockCircleCIServer): Local stand-in for the CircleCI API.
+        tmp_path (Path): Temporary directory for the scraper output.
+        caplog (LogCaptureFixture): pytest fixture for capturing log output.
+    """
+    scraper = _build_scraper(mock_circleci_server, tmp_path, max_artifact_size=100)
+    file_path = tmp_path / "0-report.xml"
+    url = f"{mock_circleci_server.url}/artifacts/1/0.xml"
+
+    with caplog.at_level(logging.WARNING):
+        size = scraper.download_artifact(str(file_path), url)
+
+    assert size is None
+    assert list(tmp_path.iterdir()) == []
+    assert f"Skipping artifact from {url}, it exceeds the maximum size of 100 bytes" in caplog.text
+
+
+def test_download_artifact_failure(
+    mock_circleci_server: MockCircleCIServer, tmp_path: Path
+) -> None:
+    """Test that a failed download raises a CircleCIScraperError and leaves no files behind.
+
+    Args:
+        mock_circleci_server (MockCircleCIServer): Local stand-in for the CircleCI API.
+        tmp_path (Path): Temporary directory for the scraper output.
+    """
+    scraper = _build_scraper(mock_circleci_server, tmp_path)
+
+    with pytest.raises(CircleCIScraperError, match="Failed to download artifact"):
+        scraper.download_artifact(
+            str(tmp_path / "0-report.xml"), f"{mock_circleci_server.url}/missing.xml"
+        )
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_export_test_artifacts_with_failed_download(
+    mock_circleci_server: MockCircleCIServer, tmp_path: Path
+) -> None:
+    """Test that a failed download does not stop the other downloads of a job.
+
+    Args:
+        mock_circleci_server (MockCircleCIServer): Local stand-in for the CircleCI API.
+        tmp_path (Path): Temporary directory for the scraper output.
+    """
+    scraper = _build_scraper(mock_circleci_server, tmp_path, download_workers=3)
+    artifacts = [
+        Artifact(path="report-0.xml", url=f"{mock_circleci_server.url}/artifacts/1/0.xml"),
+        Artifact(path="missing.xml", url=f"{mock_circleci_server.url}/missing.xml"),
+        Artifact(path="report-1.xml", url=f"{mock_circleci_server.url}/artifacts/1/1.xml"),
+    ]
+    artifact_directory = tmp_path / "fxa" / "nightly" / "job-0" / "junit" / "1"
+
+    results = scraper.export_test_artifacts("fxa", "nightly", JOB, artifacts)
+
+    assert [result.error is None for result in results] == [True, False, True]
+    assert sorted(path.name for path in artifact_directory.iterdir()) == [
+        "0-report-0.xml",
+        "2-report-1.xml",
+    ]
+    assert scraper.download_statistics == {
+        "fxa": ArtifactDownloadStatistics(
+            files=2, bytes=results[0].size + results[2].size, failures=1
+        )
+    }
+
+
+@pytest.mark.parametrize(
+    "max_artifact_size, expected_result, expected_complete",
+    [(None, "downloaded", True), (100, "skipped", False)],
+    ids=["downloaded", "skipped"],
+)
+def test_export_test_artifacts_with_skipped_download(
+    mock_circleci_server: MockCircleCIServer,
+    tmp_path: Path,
+    max_artifact_size: int | None,
+    expected_result: str,
+    expected_complete: bool,
+) -> None:
+    """Test that oversized artifacts are counted as skipped and leave their job incomplete.
+
+    Args:
+        mock_circleci_server (MockCircleCIServer): Local stand-in for the CircleCI API.
+        tmp_path (Path): Temporary directory for the scraper output.
+        max_artifact_size (int | None): The maximum size of an artifact in bytes.
+        expected_result (str): The expected result label of the downloads.
+        expected_complete (bool): Whether the job is expected to be marked as exported.
+    """
+    scraper = _build_scraper(mock_circleci_server, tmp_path, max_artifact_size)
+    artifacts = [
+        Artifact(path=f"report-{index}.xml", url=f"{mock_circleci_server.url}/artifacts/1/0.xml")
+        for index in range(2)
+    ]
+    artifact_directory = tmp_path / "fxa" / "nightly" / "job-0" / "junit" / "1"
+
+    results = scraper.export_test_artifacts("fxa", "nightly", JOB, artifacts)
+
+    assert [result.skipped for result in results] == [not expected_complete] * 2
+    assert (artifact_directory / ARTIFACTS_COMPLETE_MARKER).exists() == expected_complete
+    statistics = scraper.download_statistics["fxa"]
+    assert (statistics.files, statistics.skipped) == ((2, 0) if expected_complete else (0, 2))
+    assert scraper._metrics.snapshot().counters["artifacts_total"] == [
+        MetricSample(labels={"repository": "fxa", "result": expected_result}, value=2)
+    ]
+
+
+def test_export_shares_download_pool(
+    mock_circleci_server: MockCircleCIServer, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    """Test that the artifacts of every job of a run are downloaded by one thread pool, which
+    is shut down when the run ends.
+
+    Args:
+        mock_circleci_server (MockCircleCIServer): Local stand-in for the CircleCI API.
+        tmp_path (Path): Temporary directory for the scraper output.
+        mocker (MockerFixture): pytest_mock fixture for mocking.
+    """
+    thread_pool_executor = mocker.spy(scraper_module, "ThreadPoolExecutor")
+    scraper = _build_scraper(mock_circleci_server, tmp_path, download_workers=2)
+
+    scraper.export_test_metadata_and_artifacts(
+        build_scraper_config(mock_circleci_server, concurrency=2).pipelines
+    )
+
+    # pipelines * jobs * (metadata + 2 artifacts)
+    assert _count_files(tmp_path) == 3 * 2 * 3
+    thread_pool_executor.assert_called_once()
+    assert not any(thread.name.startswith("download") for thread in threading.enumerate())
+
+
+@pytest.mark.parametrize(
+    "running_pipelines, expected_pipeline_id, expected_rescraped_files",
+    [
+        (0, "0", 0),
+        (1, "1", 6),
+        (3, None, 18),
+    ],
+    ids=["all_complete", "newest_running", "all_running"],
+)
+def test_export_with_watermarks(
+    tmp_path: Path,
+    running_pipelines: int,
+    expected_pipeline_id: str | None,
+    expected_rescraped_files: int,
+) -> None:
+    """Test that watermarks stop at running pipelines and limit the next run to newer pipelines.
+
+    Args:
+        tmp_path (Path): Temporary directory for the scraper output and watermarks.
+        running_pipelines (int): The number of newest pipelines reported as still running.
+        expected_pipeline_id (str | None): The pipeline ID expected in the watermark.
+        expected_rescraped_files (int): The number of files expected from the second run.
+    """
+    config = MockCircleCIServerConfig(
+        pipelines=3, jobs_per_workflow=2, artifacts_per_job=2, running_pipelines=running_pipelines
+    )
+    watermark_path = tmp_path / "state" / "watermarks.json"
+    with MockCircleCIServer(config) as server:
+        first_scraper = _build_scraper(
+            server, tmp_path / "first", watermark_store=WatermarkStore(watermark_path)
+        )
+        first_scraper.export_test_metadata_and_artifacts(
+            build_scraper_config(server, concurrency=2).pipelines
+        )
+        second_scraper = _build_scraper(
+            server, tmp_path / "second", watermark_store=WatermarkStore(watermark_path)
+        )
+        second_scraper.export_test_metadata_and_artifacts(
+            build_scraper_config(server, concurrency=2).pipelines
+        )
+
+    watermark = WatermarkStore(watermark_path).get("mozilla", "fxa", "main")
+    assert (watermark.pipeline_id if watermark else None) == expected_pipeline_id
+    assert _count_files(tmp_path / "first") == 18  # pipelines * jobs * (metadata + 2 artifacts)
+    assert _count_files(tmp_path / "second") == expected_rescraped_files
+
+
+@pytest.mark.parametrize(
+    "error_rate, expect_errors",
+    [(0.0, False), (0.2, True)],
+    ids=["no_errors", "retried_errors"],
+)
+def test_export_with_failed_requests(
+    tmp_path: Path, error_rate: float, expect_errors: bool
+) -> None:
+    """Test that requests failed by the server are retried and the export is complete.
+
+    Args:
+        tmp_path (Path): Temporary directory for the scraper output.
+        error_rate (float): The fraction of requests failed by the server.
+        expect_errors (bool): Whether failed requests are expected.
+    """
+    config = MockCircleCIServerConfig(
+        pipelines=3, jobs_per_workflow=2, artifacts_per_job=2, error_rate=error_rate, seed=1
+    )
+    with MockCircleCIServer(config) as server:
+        scraper = _build_scraper(server, tmp_path)
+        scraper.export_test_metadata_and_artifacts(
+            build_scraper_config(server, concurrency=2).pipelines
+        )
+        stats = server.stats
+
+    assert _count_files(tmp_path) == 18  # pipelines * jobs * (metadata + 2 artifacts)
+    assert (stats.errors > 0) == expect_errors
+    assert stats.bytes_sent > 0
+    # A pipelines page, per pipeline a workflows and a jobs page, and per job 3 pages of tests,
+    # an artifacts page and 2 artifact downloads
+    assert stats.requests - stats.errors == 1 + 3 * 2 + 6 * (3 + 1 + 2)
+
+
+def test_export_full_ignores_watermarks(
+    mock_circleci_server: MockCircleCIServer, tmp_path: Path
+) -> None:
+    """Test that a full export pages past the watermarks.
+
+    Args:
+        mock_circleci_server (MockCircleCIServer): Local stand-in for the CircleCI API.
+        tmp_path (Path): Temporary directory for the scraper output and watermarks.
+    """
+    pipeline_configs = build_scraper_config(mock_circleci_server, concurrency=2).pipelines
+    watermark_store = WatermarkStore(tmp_path / "state" / "watermarks.json")
+    _build_scraper(
+        mock_circleci_server, tmp_path / "first", watermark_store=watermark_store
+    ).export_test_metadata_and_artifacts(pipeline_configs)
+
+    _build_scraper(
+        mock_circleci_server, tmp_path / "second", watermark_store=watermark_store
+    ).export_test_metadata_and_artifacts(pipeline_configs, full=True)
+
+    assert _count_files(tmp_path / "second") == _count_files(tmp_path / "first")
+
+
+def test_export_pages_organization_once(tmp_path: Path, mocker: MockerFixture) -> None:
+    """Test that the pipelines of an organization are paged once for all its repositories.
+
+    Args:
+        tmp_path (Path): Temporary directory for the scraper output.
+        mocker (MockerFixture): pytest_mock fixture for mocking.
+    """
+    config = MockCircleCIServerConfig(
+        pipelines=6,
+        jobs_per_workflow=1,
+        artifacts_per_job=1,
+        page_size=2,
+        extra_repositories=["autopush-rs", "merino-py"],
+    )
+    with MockCircleCIServer(config) as server:
+        scraper = _build_scraper(server, tmp_path)
+        get_pipelines = mocker.spy(scraper._client, "get_pipelines")
+        pipeline_configs = [
+            CircleCIScraperPipelineConfig(
+                organization="mozilla", repository=repository, workflows={"nightly": ["job-0"]}
+            )
+            for repository in ["fxa", "autopush-rs"]
+        ]
+
+        scraper.export_test_metadata_and_artifacts(pipeline_configs)
+
+    assert get_pipelines.call_count == 3
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["autopush-rs", "fxa"]
+    assert _count_files(tmp_path / "fxa") == 4  # pipelines * (metadata + artifact)
+    assert _count_files(tmp_path / "autopush-rs") == 4
+
+
+def test_export_skips_exported_jobs(
+    mock_circleci_server: MockCircleCIServer, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    """Test that exported jobs are skipped before their metadata and artifacts are requested.
+
+    Args:
+        mock_circleci_server (MockCircleCIServer): Local stand-in for the CircleCI API.
+        tmp_path (Path): Temporary directory for the scraper output.
+        mocker (MockerFixture): pytest_mock fixture for mocking.
+    """
+    pipeline_configs = build_scraper_config(mock_circleci_server, concurrency=2).pipelines
+    _build_scraper(mock_circleci_server, tmp_path).export_test_metadata_and_artifacts(
+        pipeline_configs
+    )
+    # An incomplete job is exported again
+    (tmp_path / "fxa" / "nightly" / "job-1" / "junit" / "2" / ".complete").unlink()
+    (tmp_path / "fxa" / "nightly" / "job-1" / "junit" / "2" / "1-report-1.xml").unlink()
+    scraper = _build_scraper(mock_circleci_server, tmp_path)
+    get_test_metadata = mocker.spy(scraper._client, "get_test_metadata")
+    get_job_artifacts = mocker.spy(scraper._client, "get_job_artifacts")
+
+    scraper.export_test_metadata_and_artifacts(pipeline_configs)
+
+    assert get_test_metadata.call_count == 0
+    assert get_job_artifacts.call_count == 1
+    assert scraper.download_statistics["fxa"].files == 1
+    assert _count_files(tmp_path) == 18
+
+
+@pytest.mark.parametrize("use_async", [False, True], ids=["sequential", "async"])
+def test_export_stops_at_date_limit_without_matching_pipelines(
+    tmp_path: Path, mocker: MockerFixture, use_async: bool
+) -> None:
+    """Test that paging stops at the date limit even for a configuration matching no pipeline.
+
+    Args:
+        tmp_path (Path): Temporary directory for the scraper output.
+        mocker (MockerFixture): pytest_mock fixture for mocking.
+        use_async (bool): Whether to use the asynchronous scraper.
+    """
+    config = MockCircleCIServerConfig(
+        pipelines=10, jobs_per_workflow=1, artifacts_per_job=1, page_size=2
+    )
+    common_config = CommonConfig(
+        test_result_dir=str(tmp_path), test_metadata_dir="circle_ci", test_artifact_dir="junit"
+    )
+    with MockCircleCIServer(config) as server:
+        scraper_config = build_scraper_config(server, concurrency=2)
+        pipeline_configs = [
+            CircleCIScraperPipelineConfig(
+                organization="mozilla", repository=repository, workflows={"nightly": ["job-0"]}
+            )
+            for repository in ["fxa", "idle-repository"]
+        ]
+        # Pipelines are created an hour apart, so pipelines 0 to 3 are within the limit
+        date_limit = datetime.now(timezone.utc) - timedelta(hours=3.5)
+        async_client = AsyncCircleCIClient(scraper_config)
+        try:
+            client = async_client.client if use_async else CircleCIClient(scraper_config)
+            get_pipelines = mocker.spy(client, "get_pipelines")
+            scraper = (
+                AsyncCircleCIScraper(common_config, async_client)
+                if use_async
+                else CircleCIScraper(common_config, client)
+            )
+            scraper.export_test_metadata_and_artifacts(pipeline_configs, date_limit)
+        finally:
+            async_client.close()
+
+    # The third page holds the first pipeline older than the date limit
+    assert get_pipelines.call_count == 3
+    assert _count_files(tmp_path / "fxa") == 8  # pipelines * (metadata + artifact)
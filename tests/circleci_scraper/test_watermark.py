@@ -0,0 +1,52 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for the WatermarkStore module."""
+
+from pathlib import Path
+
+import pytest
+
+from scripts.circleci_scraper.watermark import Watermark, WatermarkStore, WatermarkStoreError
+
+WATERMARK = Watermark(pipeline_id="abc", pipeline_number=42, created_at="2024-01-01T00:00:00.000Z")
+
+
+def test_save_and_load(tmp_path: Path) -> None:
+    """Test that saved watermarks are loaded by a new WatermarkStore.
+
+    Args:
+        tmp_path (Path): Temporary directory for the watermark file.
+    """
+    path = tmp_path / "state" / "watermarks.json"
+    store = WatermarkStore(path)
+    store.set("mozilla", "fxa", "main", WATERMARK)
+    store.set("mozilla", "fxa", None, WATERMARK)
+    store.save()
+
+    loaded_store = WatermarkStore(path)
+
+    assert loaded_store.get("mozilla", "fxa", "main") == WATERMARK
+    assert loaded_store.get("mozilla", "fxa", None) == WATERMARK
+    assert loaded_store.get("mozilla", "fxa", "other") is None
+    assert loaded_store.get("mozilla-services", "fxa", "main") is None
+
+
+@pytest.mark.parametrize(
+    "content",
+    ["not json", '["not", "a", "mapping"]', '{"mozilla/fxa/main": {"pipeline_id": "abc"}}'],
+    ids=["invalid_json", "invalid_structure", "invalid_watermark"],
+)
+def test_load_invalid_file(tmp_path: Path, content: str) -> None:
+    """Test that an unreadable watermark file raises a WatermarkStoreError.
+
+    Args:
+        tmp_path (Path): Temporary directory for the watermark file.
+        content (str): The content of the watermark file.
+    """
+    path = tmp_path / "watermarks.json"
+    path.write_text(content)
+
+    with pytest.raises(WatermarkStoreError, match="Unable to load the watermarks"):
+        WatermarkStore(path)
@@ -0,0 +1,60 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for the atomic_write module."""
+
+import os
+import stat
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from scripts.common.atomic_write import atomic_write
+
+
+@pytest.fixture(params=[0o022, 0o077], ids=["022", "077"])
+def umask(request: pytest.FixtureRequest) -> Iterator[int]:
+    """Set the process umask for the duration of a test."""
+    previous_umask = os.umask(request.param)
+    yield request.param
+    os.umask(previous_umask)
+
+
+def test_atomic_write(tmp_path: Path, umask: int) -> None:
+    """Test that the file is moved into place with the mode of a newly created file.
+
+    Args:
+        tmp_path (Path): Temporary directory for the file.
+        umask (int): The process umask.
+    """
+    path = tmp_path / "report.csv"
+    reference_path = tmp_path / "reference.csv"
+    reference_path.write_text("")
+
+    with atomic_write(path, "w") as file:
+        file.write("name,count\n")
+
+    assert path.read_text() == "name,count\n"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o666 & ~umask
+    assert stat.S_IMODE(path.stat().st_mode) == stat.S_IMODE(reference_path.stat().st_mode)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["reference.csv", "report.csv"]
+
+
+def test_atomic_write_error(tmp_path: Path) -> None:
+    """Test that an error while writing leaves an existing file untouched and no temporary file.
+
+    Args:
+        tmp_path (Path): Temporary directory for the file.
+    """
+    path = tmp_path / "report.csv"
+    path.write_text("previous")
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(path, "w") as file:
+            file.write("partial")
+            raise RuntimeError("interrupted")
+
+    assert path.read_text() == "previous"
+    assert [path.name for path in tmp_path.iterdir()] == ["report.csv"]
@@ -0,0 +1,109 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for the StageProfiler module."""
+
+import pstats
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+from pytest_mock import MockerFixture
+
+from scripts.common.profiler import StageProfiler, StageStatistics, stage
+
+
+def test_stage_without_profiler() -> None:
+    """Test that a stage outside of a StageProfiler is not recorded."""
+    profiler = StageProfiler()
+
+    with stage("parse"):
+        pass
+    with profiler:
+        pass
+
+    assert profiler.statistics == {}
+
+
+def test_nested_stages(mocker: MockerFixture) -> None:
+    """Test that the time of a nested stage is excluded from the self time of its parent.
+
+    Args:
+        mocker (MockerFixture): pytest_mock fixture for mocking.
+    """
+    # Profiler start, parse start, write start, write end, parse end, profiler end
+    mocker.patch(
+        "scripts.common.profiler.time.perf_counter", side_effect=[0.0, 1.0, 2.0, 5.0, 10.0, 12.0]
+    )
+
+    with StageProfiler() as profiler:
+        with stage("parse"):
+            with stage("write"):
+                pass
+
+    assert profiler.elapsed == 12.0
+    assert profiler.statistics == {
+        "parse": StageStatistics(calls=1, total_time=9.0, self_time=6.0),
+        "write": StageStatistics(calls=1, total_time=3.0, self_time=3.0),
+    }
+    assert profiler.summary().splitlines() == [
+        "Stage profile of 12.00s, ranked by self time:",
+        "  stage                  calls   self (s)  total (s)  self %",
+        "  parse                      1      6.000      9.000   50.0%",
+        "  write                      1      3.000      3.000   25.0%",
+    ]
+
+
+def test_stages_on_threads() -> None:
+    """Test that the calls of a stage on several threads are all recorded."""
+    barrier = threading.Barrier(2)
+
+    def download() -> None:
+        barrier.wait()
+        with stage("download"):
+            time.sleep(0.1)
+
+    with StageProfiler() as profiler:
+        threads = [threading.Thread(target=download) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    statistics = profiler.statistics["download"]
+    assert statistics.calls == 2
+    assert statistics.self_time == statistics.total_time >= 0.2
+    assert profiler.summary().endswith(
+        "Stages ran on several threads, so their times add up to more than the run."
+    )
+
+
+def test_output_dir(tmp_path: Path) -> None:
+    """Test that the cProfile statistics and memory snapshots of the stages are written.
+
+    Args:
+        tmp_path (Path): Temporary directory for the profiles.
+    """
+    output_dir = tmp_path / "profile"
+    kept: list[bytearray] = []
+
+    with StageProfiler(output_dir) as profiler:
+        with stage("JSON parse"):
+            kept.append(bytearray(2**20))
+        with stage("CSV write"):
+            bytearray(2**20)
+
+    assert not tracemalloc.is_tracing()
+    assert {"csv_write.pstats", "json_parse.pstats", "json_parse.tracemalloc"} <= {
+        path.name for path in output_dir.iterdir()
+    }
+    parse_statistics = profiler.statistics["JSON parse"]
+    write_statistics = profiler.statistics["CSV write"]
+    assert parse_statistics.held >= 2**20 and parse_statistics.peak >= 2**20
+    assert write_statistics.held < 2**20 <= write_statistics.peak
+    assert pstats.Stats(str(output_dir / "json_parse.pstats")).get_stats_profile().func_profiles
+    snapshot = tracemalloc.Snapshot.load(str(output_dir / "json_parse.tracemalloc"))
+    assert sum(statistic.size for statistic in snapshot.statistics("filename")) >= 2**20
+    assert "held (MiB)" in profiler.summary()
@@ -4,6 +4,8 @@
 
 """Tests for the CircleCIJsonParser module."""
 
+import json
+import shutil
 from pathlib import Path
 
 import pytest
@@ -13,6 +15,7 @@ from scripts.metric_reporter.circleci_json_parser import (
     CircleCITestMetadata,
     CircleCIJob,
     CircleCIJsonParser,
+    CircleCIJsonParserError,
 )
 
 EXPECTED_EMPTY: list[CircleCIJobTestMetadata] = [
@@ -173,3 +176,69 @@ def test_parse(
     actual_results: list[CircleCIJobTestMetadata] = parser.parse(metadata_path)
 
     assert actual_results == expected_results
+
+
+def test_parse_jobs(circleci_json_samples_directory: Path, tmp_path: Path) -> None:
+    """Test that CircleCIJsonParser parse method only reads the files of the given jobs.
+
+    Args:
+        circleci_json_samples_directory (Path): circleci_json_samples directory path.
+        tmp_path (Path): Temporary directory for the test data.
+    """
+    for job_number, sample in [(2, "failure"), (4, "success")]:
+        shutil.copy(
+            circleci_json_samples_directory / sample / f"{sample}.json",
+            tmp_path / f"{job_number}.json",
+        )
+    parser = CircleCIJsonParser()
+
+    actual_results: list[CircleCIJobTestMetadata] = parser.parse(tmp_path, {4, 5})
+
+    assert actual_results == EXPECTED_SUCCESS
+
+
+def test_parse_validates_test_metadata(tmp_path: Path) -> None:
+    """Test that test metadata records are validated when a file is parsed.
+
+    Args:
+        tmp_path (Path): Temporary directory for the test data.
+    """
+    metadata = EXPECTED_FAILURE[0].model_dump()
+    metadata["test_metadata"][0]["run_time"] = "slow"
+    invalid_file_path = tmp_path / "2.json"
+    invalid_file_path.write_text(json.dumps(metadata))
+
+    with pytest.raises(CircleCIJsonParserError) as error_info:
+        CircleCIJsonParser().parse(tmp_path)
+
+    assert str(error_info.value).startswith(
+        f"Unexpected value or schema in file {invalid_file_path}"
+    )
+
+
+@pytest.mark.parametrize(
+    "content, expected_error",
+    [
+        ('{"job": {}, "test_metadata": [', "Invalid JSON format for"),
+        ('{"job": {}} []', "Invalid JSON format for"),
+        ('{"job": {}, "test_metadata": [,]}', "Invalid JSON format for"),
+        ("[]", "Unexpected value or schema in"),
+        ('{"job": {}, "test_metadata": []}', "Unexpected value or schema in"),
+    ],
+    ids=["truncated", "extra_data", "missing_item", "not_an_object", "invalid_job"],
+)
+def test_parse_invalid_file(tmp_path: Path, content: str, expected_error: str) -> None:
+    """Test that invalid files raise the expected error.
+
+    Args:
+        tmp_path (Path): Temporary directory for the test data.
+        content (str): The content of the invalid file.
+        expected_error (str): The start of the expected error message.
+    """
+    invalid_file_path = tmp_path / "1.json"
+    invalid_file_path.write_text(content)
+
+    with pytest.raises(CircleCIJsonParserError) as error_info:
+        CircleCIJsonParser().parse(tmp_path)
+
+    assert str(error_info.value).startswith(f"{expected_error} file {invalid_file_path}")
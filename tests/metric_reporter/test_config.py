@@ -0,0 +1,56 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for the Metric Reporter Config module."""
+
+from pathlib import Path
+
+from scripts.metric_reporter.config import Config, MetricReporterArgs
+
+
+def test_build_metric_reporter_args(tmp_path: Path) -> None:
+    """Test that test suites are discovered at the repository/workflow/test_suite depth only.
+
+    Args:
+        tmp_path (Path): Temporary directory for the configuration and test results.
+    """
+    test_result_path = tmp_path / "test_result_dir"
+    fxa_suite_path = test_result_path / "fxa" / "main" / "Functional Tests"
+    (fxa_suite_path / "junit" / "1").mkdir(parents=True)
+    (fxa_suite_path / "circle_ci").mkdir()
+    # A job directory of the same name as the artifact directory is not a test suite
+    (fxa_suite_path / "junit" / "2" / "junit").mkdir(parents=True)
+    merino_suite_path = test_result_path / "merino-py" / "nightly" / "unit-tests"
+    (merino_suite_path / "circle_ci").mkdir(parents=True)
+    (test_result_path / "merino-py" / "nightly" / "without-results").mkdir()
+    config_path = tmp_path / "config.ini"
+    config_path.write_text(
+        "[common]\n"
+        f"test_result_dir = {test_result_path}\n"
+        "test_metadata_dir = circle_ci\n"
+        "test_artifact_dir = junit\n"
+        "[metric_reporter]\n"
+        "reports_dir = reports\n"
+    )
+
+    config = Config(str(config_path))
+
+    assert config.metric_reporter_args == [
+        MetricReporterArgs(
+            repository="fxa",
+            workflow="main",
+            test_suite="functional_tests",
+            metadata_path=fxa_suite_path / "circle_ci",
+            artifact_path=fxa_suite_path / "junit",
+            results_csv_report_path=Path("reports") / "fxa_functional_tests_results.csv",
+        ),
+        MetricReporterArgs(
+            repository="merinopy",
+            workflow="nightly",
+            test_suite="unit_tests",
+            metadata_path=merino_suite_path / "circle_ci",
+            artifact_path=merino_suite_path / "junit",
+            results_csv_report_path=Path("reports") / "merinopy_unit_tests_results.csv",
+        ),
+    ]
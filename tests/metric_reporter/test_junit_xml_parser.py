@@ -4,20 +4,25 @@
 
 """Tests for the JUnitXmlParser module."""
 
+import shutil
 from pathlib import Path
 
 import pytest
+from defusedxml import EntitiesForbidden
 
 from scripts.metric_reporter.junit_xml_parser import (
     JUnitXmlFailure,
     JUnitXmlJobTestSuites,
+    JUnitXmlJobTestSuitesSummary,
     JUnitXmlParser,
+    JUnitXmlParserError,
     JUnitXmlProperty,
     JUnitXmlSkipped,
     JUnitXmlSystemOut,
     JUnitXmlTestCase,
     JUnitXmlTestSuite,
     JUnitXmlTestSuites,
+    JUnitXmlTestSuitesSummary,
 )
 
 EXPECTED_JEST = [
@@ -622,3 +627,220 @@ def test_parse(
     actual_results: list[JUnitXmlJobTestSuites] = parser.parse(artifact_path)
 
     assert actual_results == expected_results
+
+
+@pytest.mark.parametrize(
+    "artifact_directory, expected_results",
+    [
+        ("xml_samples_jest", EXPECTED_JEST),
+        ("xml_samples_mocha", EXPECTED_MOCHA),
+        ("xml_samples_playwright", EXPECTED_PLAYWRIGHT),
+        ("xml_samples_pytest", EXPECTED_PYTEST),
+        ("xml_samples_tap", EXPECTED_TAP),
+    ],
+    ids=["jest", "mocha", "playwright", "pytest", "tap"],
+)
+def test_summarize(
+    test_data_directory: Path,
+    artifact_directory: str,
+    expected_results: list[JUnitXmlJobTestSuites],
+) -> None:
+    """Test that JUnitXmlParser summarize method aggregates the same results as parse.
+
+    Args:
+        test_data_directory (Path): Test data directory for the Metric Reporter.
+        artifact_directory (str): Test data directory name.
+        expected_results (list[JUnitXmlJobTestSuites]): Expected results from the parse method.
+    """
+    artifact_path = test_data_directory / artifact_directory
+    parser = JUnitXmlParser()
+    expected_summaries = [
+        JUnitXmlJobTestSuitesSummary(
+            job=result.job,
+            test_suites=[
+                JUnitXmlTestSuitesSummary.from_test_suites(test_suites)
+                for test_suites in result.test_suites
+            ],
+        )
+        for result in expected_results
+    ]
+
+    actual_summaries: list[JUnitXmlJobTestSuitesSummary] = parser.summarize(artifact_path)
+
+    assert actual_summaries == expected_summaries
+
+
+def test_parse_parallel(test_data_directory: Path, tmp_path: Path) -> None:
+    """Test that parsing in a process pool returns the same results in the same order.
+
+    Args:
+        test_data_directory (Path): Test data directory for the Metric Reporter.
+        tmp_path (Path): Temporary directory for the combined test data.
+    """
+    # Combine the samples into one directory with several jobs
+    for job_number, sample in enumerate(["jest", "mocha", "playwright", "pytest", "tap"], 8):
+        shutil.copytree(
+            test_data_directory / f"xml_samples_{sample}" / "1", tmp_path / str(job_number)
+        )
+
+    expected_results = JUnitXmlParser().parse(tmp_path)
+    actual_results = JUnitXmlParser(workers=2).parse(tmp_path)
+
+    assert [result.job for result in actual_results] == [10, 11, 12, 8, 9]
+    assert actual_results == expected_results
+
+
+@pytest.mark.parametrize("workers", [1, 2], ids=["sequential", "parallel"])
+@pytest.mark.parametrize("method", ["parse", "summarize"])
+def test_parse_invalid_xml(
+    test_data_directory: Path, tmp_path: Path, workers: int, method: str
+) -> None:
+    """Test that the first invalid file raises the same error with and without a process pool.
+
+    Args:
+        test_data_directory (Path): Test data directory for the Metric Reporter.
+        tmp_path (Path): Temporary directory for the test data.
+        workers (int): The number of parser processes.
+        method (str): The name of the parser method.
+    """
+    shutil.copytree(test_data_directory / "xml_samples_pytest" / "1", tmp_path / "1")
+    (tmp_path / "2").mkdir()
+    invalid_file_path = tmp_path / "2" / "a_invalid.xml"
+    invalid_file_path.write_text("<testsuites><testsuite>")
+    (tmp_path / "2" / "b_invalid.xml").write_text("<testsuites")
+
+    with pytest.raises(JUnitXmlParserError) as error_info:
+        getattr(JUnitXmlParser(workers=workers), method)(tmp_path)
+
+    assert str(error_info.value).startswith(f"Invalid XML format for file {invalid_file_path}")
+    assert "(caused by no element found" in str(error_info.value)
+
+
+def test_parse_file_strips_nul_characters(test_data_directory: Path, tmp_path: Path) -> None:
+    """Test that NUL characters are removed from a file while it is parsed.
+
+    Args:
+        test_data_directory (Path): Test data directory for the Metric Reporter.
+        tmp_path (Path): Temporary directory for the test data.
+    """
+    sample_path = next((test_data_directory / "xml_samples_pytest" / "1").glob("*.xml"))
+    nul_file_path = tmp_path / "nul.xml"
+    # Place NUL characters inside markup, text and a run longer than a read chunk
+    content = sample_path.read_text()
+    nul_file_path.write_text(
+        content.replace("<testcase ", "<test\x00case ").replace("\n", "\n" + "\x00" * 70000, 1)
+    )
+
+    actual_results = JUnitXmlParser().parse_file(nul_file_path)
+
+    assert actual_results == JUnitXmlParser().parse_file(sample_path)
+
+
+def test_parse_file_forbids_entities(tmp_path: Path) -> None:
+    """Test that entity declarations are rejected while streaming a file.
+
+    Args:
+        tmp_path (Path): Temporary directory for the test data.
+    """
+    bomb_file_path = tmp_path / "bomb.xml"
+    bomb_file_path.write_text(
+        '<?xml version="1.0"?><!DOCTYPE lolz [<!ENTITY lol "lol">'
+        '<!ENTITY lol2 "&lol;&lol;&lol;&lol;&lol;&lol;&lol;&lol;">]>'
+        '<testsuites><testsuite name="&lol2;"/></testsuites>'
+    )
+
+    with pytest.raises(EntitiesForbidden):
+        JUnitXmlParser().parse_file(bomb_file_path)
+
+
+def test_parse_file_validates_test_cases(test_data_directory: Path, tmp_path: Path) -> None:
+    """Test that test case records are validated when a file is parsed.
+
+    Args:
+        test_data_directory (Path): Test data directory for the Metric Reporter.
+        tmp_path (Path): Temporary directory for the test data.
+    """
+    sample_path = next((test_data_directory / "xml_samples_playwright" / "1").glob("*.xml"))
+    test_suites = JUnitXmlParser().parse_file(sample_path)
+    test_case = test_suites.test_suites[0].test_cases[0]
+    invalid_file_path = tmp_path / "invalid.xml"
+    invalid_file_path.write_text(
+        '<testsuites><testsuite name="suite" tests="1" failures="0">'
+        '<testcase name="test" time="fast"/></testsuite></testsuites>'
+    )
+
+    with pytest.raises(JUnitXmlParserError) as error_info:
+        JUnitXmlParser().parse_file(invalid_file_path)
+
+    assert isinstance(test_case.time, float)
+    assert not hasattr(test_case, "__dict__")
+    assert str(error_info.value).startswith(
+        f"Unexpected value or schema in file {invalid_file_path}"
+    )
+
+
+@pytest.mark.parametrize(
+    "content, expected_error",
+    [
+        (
+            '<testsuites><testsuite name="suite" tests="1" failures="0"><testcase name="test">'
+            '<properties><property name="fixme"/></properties></testcase></testsuite>'
+            "</testsuites>",
+            "Unexpected value or schema in",
+        ),
+        (
+            '<testsuites><testsuite name="suite" tests="1" failures="0"><testcase name="test">'
+            "<properties><property/></properties><skipped/><failure/></testcase></testsuite>"
+            "</testsuites>",
+            "Unexpected value or schema in",
+        ),
+        (
+            '<testsuites><testsuite name="suite" tests="1" failures="0"><testcase name="test">'
+            '<properties><property value="x"/></properties></testcase></testsuite>',
+            "Invalid XML format for",
+        ),
+        (
+            '<testsuites><testsuite name="suite" tests="1" failures="0"><testcase name="test">'
+            "<error/></testcase></testsuite></testsuites>",
+            "Could not parse XML file,",
+        ),
+        (
+            '<testsuites><testsuite name="suite" failures="0"><testcase name="test">'
+            '<skipped message="x"/><failure message="x" type="y">text</failure></testcase>'
+            "</testsuite></testsuites>",
+            "Unexpected value or schema in",
+        ),
+    ],
+    ids=[
+        "property_without_value",
+        "property_without_name",
+        "truncated_after_invalid_property",
+        "unexpected_tag",
+        "suite_without_tests",
+    ],
+)
+def test_summarize_validates_as_parse(tmp_path: Path, content: str, expected_error: str) -> None:
+    """Test that a malformed file fails identically when it is parsed and summarized.
+
+    Args:
+        tmp_path (Path): Temporary directory for the test data.
+        content (str): The content of the malformed file.
+        expected_error (str): The start of the expected error message.
+    """
+    (tmp_path / "1").mkdir()
+    invalid_file_path = tmp_path / "1" / "invalid.xml"
+    invalid_file_path.write_text(content)
+    parser = JUnitXmlParser()
+
+    with pytest.raises(JUnitXmlParserError) as parse_error_info:
+        parser.parse(tmp_path)
+    with pytest.raises(JUnitXmlParserError) as summarize_error_info:
+        parser.summarize(tmp_path)
+
+    parse_error = parse_error_info.value
+    summarize_error = summarize_error_info.value
+    assert parse_error.args[0].startswith(expected_error)
+    # The validation errors locate the invalid value in different models, so only the error
+    # messages and the types of the inner errors are compared
+    assert summarize_error.args == parse_error.args
+    assert type(summarize_error.inner_exception) is type(parse_error.inner_exception)
@@ -0,0 +1,190 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for the Metric Reporter main module."""
+
+import logging
+import shutil
+from pathlib import Path
+
+import pytest
+from pytest import LogCaptureFixture
+from pytest_mock import MockerFixture
+
+from scripts.common.profiler import StageProfiler
+from scripts.metric_reporter.config import MetricReporterArgs, MetricReporterConfig
+from scripts.metric_reporter.main import SuiteOutcome, log_summary, report_suites
+
+
+def _suite_args(
+    test_data_directory: Path, tmp_path: Path, samples: list[str]
+) -> list[MetricReporterArgs]:
+    args_list: list[MetricReporterArgs] = []
+    for sample in samples:
+        suite_path = tmp_path / "test_result_dir" / "repo" / "main" / sample
+        shutil.copytree(
+            test_data_directory / f"xml_samples_{sample}" / "1", suite_path / "junit" / "1"
+        )
+        args_list.append(
+            MetricReporterArgs(
+                repository="repo",
+                workflow="main",
+                test_suite=sample,
+                metadata_path=suite_path / "circle_ci",
+                artifact_path=suite_path / "junit",
+                results_csv_report_path=tmp_path / "reports" / f"repo_{sample}_results.csv",
+            )
+        )
+    return args_list
+
+
+@pytest.mark.parametrize("jobs", [1, 2], ids=["sequential", "parallel"])
+def test_report_suites_isolates_errors(
+    test_data_directory: Path, tmp_path: Path, jobs: int
+) -> None:
+    """Test that an error in one test suite does not stop the other test suites.
+
+    Args:
+        test_data_directory (Path): Test data directory for the Metric Reporter.
+        tmp_path (Path): Temporary directory for the test results, state and reports.
+        jobs (int): The number of worker processes.
+    """
+    args_list = _suite_args(test_data_directory, tmp_path, ["jest", "mocha", "pytest"])
+    invalid_file_path = next(args_list[1].artifact_path.glob("*/*.xml"))
+    invalid_file_path.write_text("<testsuites")
+    reporter_config = MetricReporterConfig(
+        reports_dir=str(tmp_path / "reports"), state_dir=str(tmp_path / "state")
+    )
+
+    outcomes = report_suites(reporter_config, args_list, jobs=jobs)
+
+    assert [outcome.test_suite for outcome in outcomes] == ["jest", "mocha", "pytest"]
+    assert [bool(outcome.results) for outcome in outcomes] == [True, False, True]
+    assert outcomes[0].error is None and outcomes[2].error is None
+    assert str(outcomes[1].error).startswith(
+        f"JUnit XML Parsing error: Invalid XML format for file {invalid_file_path}"
+    )
+    assert args_list[0].results_csv_report_path.exists()
+    assert not args_list[1].results_csv_report_path.exists()
+    assert args_list[2].results_csv_report_path.exists()
+
+
+def test_report_suites_parallel(test_data_directory: Path, tmp_path: Path) -> None:
+    """Test that reporting test suites in worker processes gives the same results and reports.
+
+    Args:
+        test_data_directory (Path): Test data directory for the Metric Reporter.
+        tmp_path (Path): Temporary directory for the test results, state and reports.
+    """
+    args_list = _suite_args(test_data_directory, tmp_path, ["jest", "playwright", "pytest"])
+    sequential_config = MetricReporterConfig(
+        reports_dir=str(tmp_path / "reports"), state_dir=str(tmp_path / "sequential_state")
+    )
+    parallel_config = MetricReporterConfig(
+        reports_dir=str(tmp_path / "reports"), state_dir=str(tmp_path / "parallel_state")
+    )
+
+    sequential_outcomes = report_suites(sequential_config, args_list)
+    sequential_reports = [args.results_csv_report_path.read_bytes() for args in args_list]
+    parallel_outcomes = report_suites(parallel_config, args_list, jobs=3)
+    parallel_reports = [args.results_csv_report_path.read_bytes() for args in args_list]
+
+    assert [outcome.results for outcome in parallel_outcomes] == [
+        outcome.results for outcome in sequential_outcomes
+    ]
+    assert parallel_reports == sequential_reports
+
+
+def test_report_suites_parallel_ignores_parse_workers(
+    test_data_directory: Path, tmp_path: Path, mocker: MockerFixture, caplog: LogCaptureFixture
+) -> None:
+    """Test that worker processes reporting test suites do not start parse workers of their own.
+
+    Args:
+        test_data_directory (Path): Test data directory for the Metric Reporter.
+        tmp_path (Path): Temporary directory for the test results, state and reports.
+        mocker (MockerFixture): pytest_mock fixture for mocking.
+        caplog (LogCaptureFixture): pytest fixture for capturing log output.
+    """
+    args_list = _suite_args(test_data_directory, tmp_path, ["jest", "pytest"])
+    reporter_config = MetricReporterConfig(
+        reports_dir=str(tmp_path / "reports"), state_dir=str(tmp_path / "state"), parse_workers=4
+    )
+    process_pool_executor = mocker.patch("scripts.metric_reporter.main.ProcessPoolExecutor")
+    executor_map = process_pool_executor.return_value.__enter__.return_value.map
+    executor_map.return_value = []
+
+    with caplog.at_level(logging.WARNING):
+        report_suites(reporter_config, args_list, jobs=2)
+
+    worker_config = next(executor_map.call_args.args[1])
+    assert worker_config.parse_workers == 1
+    assert reporter_config.parse_workers == 4
+    assert "ignoring parse_workers" in caplog.text
+
+
+def test_report_suites_profile(test_data_directory: Path, tmp_path: Path) -> None:
+    """Test that profiling records the stages of reporting test suites.
+
+    Args:
+        test_data_directory (Path): Test data directory for the Metric Reporter.
+        tmp_path (Path): Temporary directory for the test results, state and reports.
+    """
+    args_list = _suite_args(test_data_directory, tmp_path, ["jest", "pytest"])
+    args_list[0].metadata_path.mkdir()
+    reporter_config = MetricReporterConfig(
+        reports_dir=str(tmp_path / "reports"), state_dir=str(tmp_path / "state")
+    )
+
+    with StageProfiler() as profiler:
+        report_suites(reporter_config, args_list)
+
+    assert {name: statistics.calls for name, statistics in profiler.statistics.items()} == {
+        "discovery": 2,
+        "JSON parse": 1,
+        "XML parse": 2,
+        "reconcile": 4,
+        "CSV write": 2,
+    }
+
+
+@pytest.mark.parametrize(
+    "error, expected_summary",
+    [
+        (
+            None,
+            "Reported 2 of 2 test suites\n"
+            "  fxa nightly pytest (1.50s): ok\n"
+            "  fxa nightly jest (0.25s): ok",
+        ),
+        (
+            "Unable to parse",
+            "Reported 1 of 2 test suites\n"
+            "  fxa nightly pytest (1.50s): ok\n"
+            "  fxa nightly jest (0.25s): failed, Unable to parse",
+        ),
+    ],
+    ids=["successful", "failed"],
+)
+def test_log_summary(
+    caplog: pytest.LogCaptureFixture, error: str | None, expected_summary: str
+) -> None:
+    """Test that the summary of the test suites is shown at the configured logging level.
+
+    Args:
+        caplog (pytest.LogCaptureFixture): pytest fixture for capturing log records.
+        error (str | None): The error of the second test suite.
+        expected_summary (str): The expected summary.
+    """
+    caplog.set_level(logging.WARNING)
+    outcomes = [
+        SuiteOutcome(repository="fxa", workflow="nightly", test_suite="pytest", duration=1.5),
+        SuiteOutcome(
+            repository="fxa", workflow="nightly", test_suite="jest", duration=0.25, error=error
+        ),
+    ]
+
+    log_summary(outcomes)
+
+    assert caplog.messages == [expected_summary]
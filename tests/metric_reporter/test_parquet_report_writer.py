@@ -0,0 +1,121 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for the ParquetReportWriter module."""
+
+import sys
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from scripts.metric_reporter.junit_xml_parser import JUnitXmlParser
+from scripts.metric_reporter.parquet_report_writer import (
+    ParquetReportWriter,
+    ParquetReportWriterError,
+)
+from scripts.metric_reporter.suite_reporter import SuiteReporter
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def test_write_suite_results(test_data_directory: Path, tmp_path: Path) -> None:
+    """Test that each test suite is written as a row group with the values of the results.
+
+    Args:
+        test_data_directory (Path): Test data directory for the Metric Reporter.
+        tmp_path (Path): Temporary directory for the reports.
+    """
+    parser = JUnitXmlParser()
+    reporters = [
+        SuiteReporter("repo", "main", sample, None, parser.summarize(test_data_directory / sample))
+        for sample in ["xml_samples_jest", "xml_samples_playwright"]
+    ]
+
+    with ParquetReportWriter(tmp_path) as writer:
+        for reporter in reporters:
+            writer.write_suite_results(reporter.results)
+
+    parquet_file = pq.ParquetFile(tmp_path / "suite_results.parquet")
+    assert parquet_file.metadata.num_row_groups == 2
+    assert str(parquet_file.schema_arrow.field("success").type) == "int64"
+    rows = parquet_file.read().to_pylist()
+    expected_rows = [
+        {
+            "repository": result.repository,
+            "workflow": result.workflow,
+            "test_suite": result.test_suite,
+            "date": result.date,
+            "timestamp": result.timestamp,
+            "job": result.job,
+            "status": result.status.value,
+            "execution_time": result.execution_time,
+            "job_execution_time": result.job_execution_time,
+            "run_time": result.run_time,
+            "success": result.success,
+            "failure": result.failure,
+            "skipped": result.skipped,
+            "fixme": result.fixme,
+            "unknown": result.unknown,
+            "retry": result.retry,
+            "total": result.total,
+            "success_rate": result.success_rate,
+            "failure_rate": result.failure_rate,
+            "skipped_rate": result.skipped_rate,
+            "fixme_rate": result.fixme_rate,
+            "unknown_rate": result.unknown_rate,
+        }
+        for reporter in reporters
+        for result in reporter.results
+    ]
+    assert rows == expected_rows
+
+
+def test_write_test_cases(test_data_directory: Path, tmp_path: Path) -> None:
+    """Test that the test cases of each job are written to a file per job.
+
+    Args:
+        test_data_directory (Path): Test data directory for the Metric Reporter.
+        tmp_path (Path): Temporary directory for the reports.
+    """
+    artifacts_list = JUnitXmlParser().parse(test_data_directory / "xml_samples_playwright")
+
+    with ParquetReportWriter(tmp_path) as writer:
+        writer.write_test_cases("repo", "main", "suite", artifacts_list)
+
+    rows = pq.read_table(tmp_path / "test_cases" / "repo_suite" / "1.parquet").to_pylist()
+    reporter = SuiteReporter("repo", "main", "suite", None, artifacts_list)
+    assert len(rows) == reporter.results[0].total
+    assert sum(row["fixme"] for row in rows) == reporter.results[0].fixme
+    assert sum(row["retry"] for row in rows) == reporter.results[0].retry
+    assert {row["result"] for row in rows} <= {"success", "failure", "skipped"}
+    assert all(row["job"] == 1 and row["repository"] == "repo" for row in rows)
+
+
+def test_write_suite_results_error_discards_file(tmp_path: Path) -> None:
+    """Test that the suite results file is not created if writing fails.
+
+    Args:
+        tmp_path (Path): Temporary directory for the reports.
+    """
+    with pytest.raises(RuntimeError):
+        with ParquetReportWriter(tmp_path):
+            raise RuntimeError("failure while reporting")
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_missing_pyarrow(tmp_path: Path, mocker: MockerFixture) -> None:
+    """Test that a ParquetReportWriterError is raised if pyarrow is not installed.
+
+    Args:
+        tmp_path (Path): Temporary directory for the reports.
+        mocker (MockerFixture): pytest_mock fixture for mocking.
+    """
+    mocker.patch.dict(sys.modules, {"pyarrow": None, "pyarrow.parquet": None})
+
+    with pytest.raises(ParquetReportWriterError) as error_info:
+        ParquetReportWriter(tmp_path)
+
+    assert str(error_info.value).startswith("Parquet output requires the pyarrow package")
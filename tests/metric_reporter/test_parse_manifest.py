@@ -0,0 +1,157 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for the ParseManifest module."""
+
+import hashlib
+import logging
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from scripts.metric_reporter.junit_xml_parser import JUnitXmlParser
+from scripts.metric_reporter.parse_manifest import ParseManifest, ParseManifestError
+from scripts.metric_reporter.suite_reporter import SuiteReporter
+
+
+@pytest.fixture
+def suite_path(test_data_directory: Path, tmp_path: Path) -> Path:
+    """Provide a test suite directory with the JUnit XML samples as jobs 1 to 4."""
+    suite_path = tmp_path / "suite"
+    for job_number, sample in enumerate(["jest", "mocha", "playwright", "pytest"], 1):
+        shutil.copytree(
+            test_data_directory / f"xml_samples_{sample}" / "1",
+            suite_path / "junit" / str(job_number),
+        )
+    return suite_path
+
+
+def _report(suite_path: Path, manifest: ParseManifest, report_path: Path) -> set[int]:
+    changed_jobs = manifest.refresh(suite_path / "circle_ci", suite_path / "junit")
+    artifact_list = JUnitXmlParser().summarize(suite_path / "junit", changed_jobs)
+    reporter = SuiteReporter(
+        "repo", "main", "suite", None, artifact_list, manifest.cached_results()
+    )
+    reporter.output_results_csv(report_path)
+    manifest.record(reporter.results)
+    manifest.save()
+    return changed_jobs
+
+
+def test_parse_manifest_reports_only_changed_jobs(suite_path: Path, tmp_path: Path) -> None:
+    """Test that only new or changed jobs are parsed again, with the same CSV report.
+
+    Args:
+        suite_path (Path): Test suite directory with the JUnit XML samples.
+        tmp_path (Path): Temporary directory for the manifest and reports.
+    """
+    manifest_path = tmp_path / "manifest.json"
+    full_report_path = tmp_path / "full.csv"
+    report_path = tmp_path / "incremental.csv"
+
+    assert _report(suite_path, ParseManifest(manifest_path), full_report_path) == {1, 2, 3, 4}
+
+    # Unchanged and touched files are served from the manifest
+    playwright_file = next((suite_path / "junit" / "3").glob("*.xml"))
+    os.utime(playwright_file, ns=(0, 0))
+    assert _report(suite_path, ParseManifest(manifest_path), report_path) == set()
+    assert report_path.read_bytes() == full_report_path.read_bytes()
+
+    # Changed content, new jobs and removed jobs are picked up
+    playwright_file.write_text(playwright_file.read_text().replace('time="', 'time="1'))
+    shutil.copytree(suite_path / "junit" / "1", suite_path / "junit" / "6")
+    shutil.rmtree(suite_path / "junit" / "4")
+    assert _report(suite_path, ParseManifest(manifest_path), report_path) == {3, 6}
+
+    _report(suite_path, ParseManifest(tmp_path / "new_manifest.json"), full_report_path)
+    assert report_path.read_bytes() == full_report_path.read_bytes()
+
+
+def test_parse_manifest_hashes_only_modified_files(
+    suite_path: Path, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    """Test that files with an unchanged size and modification time are not read again.
+
+    Args:
+        suite_path (Path): Test suite directory with the JUnit XML samples.
+        tmp_path (Path): Temporary directory for the manifest and reports.
+        mocker (MockerFixture): pytest_mock fixture for mocking.
+    """
+    manifest_path = tmp_path / "manifest.json"
+    _report(suite_path, ParseManifest(manifest_path), tmp_path / "report.csv")
+    modified_file = next((suite_path / "junit" / "1").glob("*.xml"))
+    os.utime(modified_file, ns=(0, 0))
+    file_digest = mocker.spy(hashlib, "file_digest")
+
+    manifest = ParseManifest(manifest_path)
+    changed_jobs = manifest.refresh(suite_path / "circle_ci", suite_path / "junit")
+
+    assert changed_jobs == set()
+    assert file_digest.call_count == 1
+    assert file_digest.call_args.args[0].name == str(modified_file)
+
+
+def test_parse_manifest_clear(suite_path: Path, tmp_path: Path) -> None:
+    """Test that a cleared manifest reports every job as changed.
+
+    Args:
+        suite_path (Path): Test suite directory with the JUnit XML samples.
+        tmp_path (Path): Temporary directory for the manifest and reports.
+    """
+    manifest_path = tmp_path / "manifest.json"
+    _report(suite_path, ParseManifest(manifest_path), tmp_path / "report.csv")
+    manifest = ParseManifest(manifest_path)
+
+    manifest.clear()
+
+    assert manifest.refresh(suite_path / "circle_ci", suite_path / "junit") == {1, 2, 3, 4}
+    assert manifest.cached_results() == []
+
+
+def test_parse_manifest_skips_non_numeric_names(
+    suite_path: Path, tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test that files and directories not named after a job number are skipped and logged.
+
+    Args:
+        suite_path (Path): Test suite directory with the JUnit XML samples.
+        tmp_path (Path): Temporary directory for the manifest and reports.
+        caplog (pytest.LogCaptureFixture): pytest fixture for capturing log records.
+    """
+    (suite_path / "circle_ci").mkdir()
+    (suite_path / "circle_ci" / "notes.json").write_text("{}")
+    shutil.copytree(suite_path / "junit" / "1", suite_path / "junit" / "backup")
+    report_path = tmp_path / "report.csv"
+    full_report_path = tmp_path / "full.csv"
+
+    with caplog.at_level(logging.WARNING):
+        changed_jobs = _report(suite_path, ParseManifest(tmp_path / "manifest.json"), report_path)
+
+    assert changed_jobs == {1, 2, 3, 4}
+    assert f"Skipping {suite_path / 'circle_ci' / 'notes.json'}" in caplog.text
+    assert f"Skipping {suite_path / 'junit' / 'backup'}" in caplog.text
+    (suite_path / "circle_ci" / "notes.json").unlink()
+    shutil.rmtree(suite_path / "junit" / "backup")
+    _report(suite_path, ParseManifest(tmp_path / "new_manifest.json"), full_report_path)
+    assert report_path.read_bytes() == full_report_path.read_bytes()
+
+
+def test_parse_manifest_invalid_file(tmp_path: Path) -> None:
+    """Test that a corrupt manifest file raises a ParseManifestError.
+
+    Args:
+        tmp_path (Path): Temporary directory for the manifest.
+    """
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text("{")
+
+    with pytest.raises(ParseManifestError) as error_info:
+        ParseManifest(manifest_path)
+
+    assert str(error_info.value).startswith(
+        f"Unable to load the parse manifest from {manifest_path}"
+    )
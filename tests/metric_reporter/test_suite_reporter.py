@@ -20,6 +20,7 @@ from scripts.metric_reporter.circleci_json_parser import (
 from scripts.metric_reporter.junit_xml_parser import (
     JUnitXmlFailure,
     JUnitXmlJobTestSuites,
+    JUnitXmlParser,
     JUnitXmlProperty,
     JUnitXmlSkipped,
     JUnitXmlSystemOut,
@@ -728,3 +729,39 @@ def test_suite_reporter_output_csv_with_empty_test_results(
 
         mock_open.assert_not_called()
         assert expected_log in caplog.text
+
+
+@pytest.mark.parametrize(
+    "artifact_directory",
+    [
+        "xml_samples_jest",
+        "xml_samples_mocha",
+        "xml_samples_playwright",
+        "xml_samples_pytest",
+        "xml_samples_tap",
+    ],
+    ids=["jest", "mocha", "playwright", "pytest", "tap"],
+)
+def test_suite_reporter_output_csv_with_summaries(
+    test_data_directory: Path, tmp_path: Path, artifact_directory: str
+) -> None:
+    """Test that aggregated JUnit XML results produce the same CSV as fully parsed results.
+
+    Args:
+        test_data_directory (Path): Test data directory for the Metric Reporter.
+        tmp_path (Path): Temporary directory for the CSV reports.
+        artifact_directory (str): Test data directory name.
+    """
+    artifact_path = test_data_directory / artifact_directory
+    parser = JUnitXmlParser()
+    parsed_report_path = tmp_path / "parsed.csv"
+    summarized_report_path = tmp_path / "summarized.csv"
+
+    SuiteReporter("repo", "main", "suite", None, parser.parse(artifact_path)).output_results_csv(
+        parsed_report_path
+    )
+    SuiteReporter(
+        "repo", "main", "suite", None, parser.summarize(artifact_path)
+    ).output_results_csv(summarized_report_path)
+
+    assert summarized_report_path.read_bytes() == parsed_report_path.read_bytes()